@@ -17,6 +17,7 @@ from fastapi import FastAPI, HTTPException, Query
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.openapi.utils import get_openapi
 from pydantic import BaseModel
@@ -41,6 +42,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Gzip responses over 1 KB (/api/scrape/all returns hundreds of KB of JSON)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # ============= DATA MODELS =============
 
 class ArticleResponse(BaseModel):
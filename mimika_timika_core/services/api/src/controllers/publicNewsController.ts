@@ -4,6 +4,64 @@ import { config } from "../config";
 
 const BACKEND_URL = config.BACKEND_SERVICE_URL;
 
+// Last backend body per path, revalidated with If-None-Match so an unchanged
+// feed costs the backend a 304 instead of a full query + JSON transfer.
+type CachedBody = { etag: string; lastModified: string | null; data: unknown };
+const backendCache = new Map<string, CachedBody>();
+const MAX_CACHED_PATHS = 200;
+
+type BackendResult =
+    | { status: number }
+    | { status: 200; body: CachedBody; cacheControl: string | null };
+
+async function fetchBackend(path: string): Promise<BackendResult> {
+    const cached = backendCache.get(path);
+    const headers: Record<string, string> = cached ? { "If-None-Match": cached.etag } : {};
+    const response = await fetch(`${BACKEND_URL}${path}`, { headers });
+    const cacheControl = response.headers.get("cache-control");
+
+    if (response.status === 304 && cached) {
+        return { status: 200, body: cached, cacheControl };
+    }
+    if (!response.ok) {
+        return { status: response.status };
+    }
+
+    const body: CachedBody = {
+        etag: response.headers.get("etag") ?? "",
+        lastModified: response.headers.get("last-modified"),
+        data: await response.json(),
+    };
+    if (body.etag) {
+        if (!cached && backendCache.size >= MAX_CACHED_PATHS) {
+            // Drop the oldest entry (Map keeps insertion order)
+            backendCache.delete(backendCache.keys().next().value as string);
+        }
+        backendCache.set(path, body);
+    }
+    return { status: 200, body, cacheControl };
+}
+
+// The gateway reshapes the backend JSON, so it derives its own validator from the backend's
+function gatewayEtag(backendEtag: string): string {
+    return backendEtag ? backendEtag.replace(/^(W\/)?"/, 'W/"v1-') : "";
+}
+
+// Sets validators/Cache-Control; returns true when a 304 was sent instead of a body
+function applyValidators(req: Request, res: Response, body: CachedBody, cacheControl: string | null): boolean {
+    const etag = gatewayEtag(body.etag);
+    if (etag) res.set("ETag", etag);
+    if (body.lastModified) res.set("Last-Modified", body.lastModified);
+    if (cacheControl) res.set("Cache-Control", cacheControl);
+
+    const ifNoneMatch = req.header("if-none-match");
+    if (etag && ifNoneMatch && ifNoneMatch.split(",").some((v) => v.trim() === etag || v.trim() === "*")) {
+        res.status(304).end();
+        return true;
+    }
+    return false;
+}
+
 export async function listNews(req: Request, res: Response) {
     try {
         const { region, limit, page, category } = req.query;
@@ -22,13 +80,16 @@ export async function listNews(req: Request, res: Response) {
         // Note: Python backend might not yet support page/category, but we pass them if it does later
         // or we can ignore them for now to match backend strictness
 
-        const response = await fetch(`${BACKEND_URL}/articles?${params.toString()}`);
+        const result = await fetchBackend(`/articles?${params.toString()}`);
 
-        if (!response.ok) {
-            throw new Error(`Backend responded with ${response.status}`);
+        if (!("body" in result)) {
+            throw new Error(`Backend responded with ${result.status}`);
+        }
+        if (applyValidators(req, res, result.body, result.cacheControl)) {
+            return;
         }
 
-        const data = await response.json();
+        const data = result.body.data;
 
         // Transform to standard contract
         res.json({
@@ -49,18 +110,20 @@ export async function getNewsDetail(req: Request, res: Response) {
     try {
         const { id } = req.params;
 
-        const response = await fetch(`${BACKEND_URL}/articles/${id}`);
+        const result = await fetchBackend(`/articles/${id}`);
 
-        if (response.status === 404) {
+        if (result.status === 404) {
             return res.status(404).json({ error: "Article Not Found" });
         }
 
-        if (!response.ok) {
-            throw new Error(`Backend responded with ${response.status}`);
+        if (!("body" in result)) {
+            throw new Error(`Backend responded with ${result.status}`);
+        }
+        if (applyValidators(req, res, result.body, result.cacheControl)) {
+            return;
         }
 
-        const data = await response.json();
-        res.json({ data });
+        res.json({ data: result.body.data });
 
     } catch (error) {
         console.error("Proxy Error:", error);
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -22,3 +22,29 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def ensure_columns(table, columns):
+    """
+    Add columns (and their indexes) that create_all() cannot add to an existing table.
+    `columns` maps column name -> SQL type, e.g. {"url_hash": "VARCHAR(40)"}.
+    Returns the names of the columns that were added.
+    """
+    inspector = inspect(engine)
+    if not inspector.has_table(table.name):
+        return []
+
+    existing = {col["name"] for col in inspector.get_columns(table.name)}
+    added = []
+    with engine.begin() as conn:
+        for name, sql_type in columns.items():
+            if name not in existing:
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {name} {sql_type}"))
+                added.append(name)
+    return added
+
+def ensure_indexes(table):
+    """Create any index declared on the model that is missing in the database"""
+    existing = {idx["name"] for idx in inspect(engine).get_indexes(table.name)}
+    for index in table.indexes:
+        if index.name not in existing:
+            index.create(bind=engine)
@@ -1,10 +1,21 @@
-from fastapi import FastAPI, Depends, HTTPException, Query, Header
+from fastapi import FastAPI, Depends, HTTPException, Query, Header, Request, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from . import models, database
 from pydantic import BaseModel
 from datetime import datetime
-from .utils.helpers import normalize_category
+from .utils.helpers import canonicalize_url, url_hash
+from .utils.serialization import FastJSONResponse, article_columns, row_to_dict, dumps
+from .utils.compression import CompressionMiddleware, negotiate_encoding, response_cache, encoded_response
+from .utils.http_cache import make_etag, is_not_modified, not_modified, cache_headers
+from .services.ingest_versions import regions_for, bump_versions, get_versions, ALL_REGIONS
+from .services.scrape_runs import RunCheckpoint, last_scraped, list_runs, site_yields
+from .services.source_health import load_health, save_health, list_health
+from .utils.metrics import DB_QUERY_SECONDS, SCHEDULER_RUN_SECONDS, timed, render_latest
+from .utils.profiling import profile_session
+from .utils.timing import TimingMiddleware, install_query_timing, route_latency
+from .utils.parse_pool import shutdown_parse_pool
+from .utils.budget import ScrapeBudget
 
 # Database creation moved to startup event
 
@@ -19,6 +30,11 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Added after CORS so it wraps CORS and sees the final response headers
+app.add_middleware(CompressionMiddleware)
+# Outermost: its Server-Timing header includes the compression time
+app.add_middleware(TimingMiddleware)
+install_query_timing(database.engine)
 
 # --- Schemas ---
 class ArticleCreate(BaseModel):
@@ -45,8 +61,16 @@ class ArticleResponse(ArticleCreate):
 def read_root():
     return {"message": "Papua News Backend API Running"}
 
-@app.get("/articles", response_model=List[ArticleResponse])
+# Article reads return FastJSONResponse directly: response_model documents the shape,
+# but trusted DB rows skip per-row Pydantic validation and jsonable_encoder.
+# Both carry ETag / Last-Modified from the ingest versions of the regions they read;
+# a matching If-None-Match gets a 304 before the article query runs (for a
+# single article, after the cheap lookup that decides between it and a 404).
+# The list body is cached compressed per (ETag, encoding), so repeat polls
+# of unchanged data skip the query, encoding and compression too.
+@app.get("/articles", response_model=List[ArticleResponse], response_class=FastJSONResponse)
 def get_articles(
+    request: Request,
     db: Session = Depends(database.get_db),
     region: Optional[str] = Query(None, description="Filter by region (mimika/timika)"),
     x_region: Optional[str] = Header(None, alias="x-region"),
@@ -56,40 +80,62 @@ def get_articles(
     Get articles filtered by region.
     """
     effective_region = region or x_region
+
+    versions, last_modified = get_versions(db, regions_for(effective_region))
+    etag = make_etag(effective_region or "general", *versions, limit)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    cached = response_cache.get(etag, encoding)
+    if cached is not None:
+        return encoded_response(*cached, headers=cache_headers(etag, last_modified))
     
-    query = db.query(models.Article)
+    query = db.query(*article_columns(models.Article))
     
-    if effective_region:
-        query = query.filter(models.Article.region.in_([effective_region, "general"]))
-        if effective_region == "mimika":
-             query = query.filter(models.Article.region != "timika")
-        elif effective_region == "timika":
-             query = query.filter(models.Article.region != "mimika")
-    else:
-        query = query.filter(models.Article.region == "general")
-
-    return query.order_by(models.Article.published_at.desc()).limit(limit).all()
-
-@app.get("/articles/{article_id}", response_model=ArticleResponse)
+    # A portal sees its own region, articles naming both regions, and general ones
+    query = query.filter(models.Article.region.in_(regions_for(effective_region)))
+
+    with timed(DB_QUERY_SECONDS, "articles"):
+        rows = query.order_by(models.Article.published_at.desc()).limit(limit).all()
+    body, content_encoding = response_cache.store(etag, encoding, dumps([row_to_dict(row) for row in rows]))
+    return encoded_response(body, content_encoding, headers=cache_headers(etag, last_modified))
+
+def _isolate_region(query, x_region: Optional[str]):
+    """Hide the other portal's articles when the x-region header is present"""
+    if x_region == "mimika":
+        return query.filter(models.Article.region != "timika")
+    if x_region == "timika":
+        return query.filter(models.Article.region != "mimika")
+    return query
+
+@app.get("/articles/{article_id}", response_model=ArticleResponse, response_class=FastJSONResponse)
 def read_article(
     article_id: int, 
+    request: Request,
     db: Session = Depends(database.get_db),
     x_region: Optional[str] = Header(None, alias="x-region")
 ):
-    query = db.query(models.Article).filter(models.Article.id == article_id)
-    
-    # Enforce region isolation if header is present
-    if x_region:
-        if x_region == "mimika":
-            query = query.filter(models.Article.region != "timika")
-        elif x_region == "timika":
-            query = query.filter(models.Article.region != "mimika")
-            
-    db_article = query.first()
+    # A missing or other-region article is a 404 whatever validators the client
+    # sends, so the primary-key lookup under the region filter comes first
+    with timed(DB_QUERY_SECONDS, "article"):
+        visible = _isolate_region(db.query(models.Article.id).filter(models.Article.id == article_id), x_region).first()
+    if visible is None:
+        raise HTTPException(status_code=404, detail="Article not found")
+
+    # Ingest may update any article (image, category), so the detail ETag follows all regions
+    versions, last_modified = get_versions(db, ALL_REGIONS)
+    etag = make_etag("article", article_id, x_region or "any", *versions)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+
+    query = _isolate_region(db.query(*article_columns(models.Article)).filter(models.Article.id == article_id), x_region)
+    with timed(DB_QUERY_SECONDS, "article"):
+        db_article = query.first()
     
     if db_article is None:
         raise HTTPException(status_code=404, detail="Article not found")
-    return db_article
+    return FastJSONResponse(row_to_dict(db_article), headers=cache_headers(etag, last_modified))
 
 @app.post("/articles", response_model=ArticleResponse)
 def create_article(article: ArticleCreate, db: Session = Depends(database.get_db)):
@@ -98,13 +144,16 @@ def create_article(article: ArticleCreate, db: Session = Depends(database.get_db
     if article.source_name.lower() not in ALLOWED_SOURCES:
         raise HTTPException(status_code=400, detail=f"Source '{article.source_name}' is not allowed.")
 
-    # 2. Deduplication check
-    existing = db.query(models.Article).filter(models.Article.source_url == article.source_url).first()
+    # 2. Deduplication check (on the canonical URL hash)
+    canonical_url = canonicalize_url(article.source_url)
+    key = url_hash(canonical_url)
+    existing = db.query(models.Article).filter(models.Article.url_hash == key).first()
     if existing:
         return existing
         
-    db_article = models.Article(**article.dict())
+    db_article = models.Article(**{**article.dict(), "source_url": canonical_url}, url_hash=key)
     db.add(db_article)
+    bump_versions(db, [article.region])
     db.commit()
     db.refresh(db_article)
     return db_article
@@ -113,6 +162,8 @@ def create_article(article: ArticleCreate, db: Session = Depends(database.get_db
 @app.post("/ingest/run")
 def run_scraper_and_ingest(
     background_tasks: bool = Query(False, description="Run in background"), 
+    profile: bool = Query(False, description="Profile this run (see utils/profiling.py)"),
+    budget_seconds: Optional[float] = Query(None, alias="budget", gt=0, description="Run deadline in seconds (default SCRAPE_BUDGET_SECONDS)"),
     db: Session = Depends(database.get_db),
     api_key: Optional[str] = Header(None, alias="x-api-key"),
     key: Optional[str] = Query(None)
@@ -122,155 +173,201 @@ def run_scraper_and_ingest(
     if (api_key != expected_secret) and (key != expected_secret):
         raise HTTPException(status_code=401, detail="Invalid API Key")
 
+    scrape_result = None
+    session = profile_session(profile, label="api")
+    # Each site is ingested and recorded as soon as it completes
+    checkpoint = RunCheckpoint(db, "api")
     try:
-        from .services.scraper_engine import run_all_scrapers
+        from .services.scraper_engine import SCRAPERS, run_all_scrapers
         
-        # Run scrapers (sync for now, better to be async or background task)
-        scrape_result = run_all_scrapers(return_json=True)
+        # Run scrapers (sync for now, better to be async or background task), best-yielding sites first
+        budget = ScrapeBudget.from_env(budget_seconds, yields=site_yields(db, SCRAPERS))
+        load_health(db, SCRAPERS)
+        scrape_result = run_all_scrapers(
+            return_json=False, profile=session, budget=budget, checkpoint=checkpoint,
+            last_scraped=last_scraped(db, SCRAPERS),
+        )
+        save_health(db, SCRAPERS)
         
         if scrape_result.get('status') != 'success':
+            checkpoint.finish(scrape_result)
             return {"status": "error", "message": "Scraper engine failed"}
             
         articles_data = scrape_result.get('data', {}).get('articles', [])
-        saved_count = 0
-        
-        for article in articles_data:
-            # Validate source
-            from .utils.helpers import validate_source
-            if not validate_source(article.get('url')):
-                continue
-
-            # Check for existing URL
-            existing = db.query(models.Article).filter(models.Article.source_url == article['url']).first()
-            if existing:
-                # Update image if missing
-                if not existing.image_url and article.get('image_url'):
-                    existing.image_url = article.get('image_url')
-                    db.add(existing)
-                # Update category
-                # Update category
-                if article.get('category'):
-                    normalized_cat = normalize_category(article.get('category'))
-                    if existing.category in ["news", "News"] and normalized_cat != "Nasional":
-                        existing.category = normalized_cat
-                        db.add(existing)
-                continue
-                
-            # Parse date
-            published_at = datetime.now()
-            try:
-                if article.get('date'):
-                    published_at = datetime.strptime(article['date'], '%Y-%m-%d %H:%M:%S')
-            except ValueError:
-                pass # Use now() fallback
-                
-            new_article = models.Article(
-                title=article.get('title', 'No Title'),
-                summary=article.get('description', ''),
-                source_url=article.get('url', ''),
-                source_name=article.get('source', 'Unknown'),
-                category=normalize_category(article.get('category', 'news')),
-                region=article.get('region', 'general'),
-                image_url=article.get('image_url', None),
-                published_at=published_at
-            )
-            
-            db.add(new_article)
-            saved_count += 1
-            
-        db.commit()
+        run = checkpoint.finish(scrape_result)
+        ingest_result = checkpoint.ingest_result
         
         return {
+            "run_id": run.id if run else None,
             "status": "success", 
             "articles_found": len(articles_data),
-            "articles_saved": saved_count,
-            "site_results": scrape_result.get('site_results', {})
+            "articles_saved": ingest_result['saved'],
+            "articles_updated": ingest_result['updated'],
+            "site_results": scrape_result.get('site_results', {}),
+            "resumed_from": sorted(set(checkpoint.done.values())),
+            "profile_files": session.files if session else []
         }
         
     except Exception as e:
+        db.rollback()
+        checkpoint.finish(scrape_result, error=str(e))
         return {"status": "error", "message": f"Ingest failed: {str(e)}"}
 
+@app.get("/scrape/runs")
+def get_scrape_runs(
+    db: Session = Depends(database.get_db),
+    limit: int = Query(20, ge=1, le=500),
+    site: Optional[str] = Query(None, description="Only runs of this site (detik, kompas, ...)"),
+    status: Optional[str] = Query(None, description="running, success, failed, error or interrupted")
+):
+    """
+    Recorded scrape runs, newest first, with per-site timings, pages, bytes,
+    articles parsed / new / updated, fetch errors and unchanged listings.
+    """
+    return list_runs(db, limit=limit, site=site, status=status)
+
+@app.get("/scrape/runs/{run_id}")
+def get_scrape_run(run_id: int, db: Session = Depends(database.get_db)):
+    runs = list_runs(db, limit=1, run_id=run_id)
+    if not runs:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return runs[0]
+
+@app.get("/sources/health")
+def get_source_health(db: Session = Depends(database.get_db)):
+    """
+    Circuit breaker state per source (utils/circuit.py): closed, open (skipped
+    until retry_at) or half_open (the next request is a single probe),
+    with consecutive failures and the last error.
+    """
+    from .services.scraper_engine import SCRAPERS
+    return list_health(db, SCRAPERS)
+
+class BackfillCreate(BaseModel):
+    site: str
+    keyword: str
+    since: Optional[datetime] = None # naive UTC, or with an offset (converted)
+    until: Optional[datetime] = None
+    max_pages: Optional[int] = None
+
+@app.post("/backfill/jobs")
+def create_backfill_job(
+    job: BackfillCreate,
+    db: Session = Depends(database.get_db),
+    api_key: Optional[str] = Header(None, alias="x-api-key"),
+    key: Optional[str] = Query(None)
+):
+    """
+    Queue a historical crawl of one site (see services/backfill.py); the
+    scheduler works through it in the background.
+    """
+    import os
+    expected_secret = os.getenv("API_SECRET", "papua-news-secret-2024")
+    if (api_key != expected_secret) and (key != expected_secret):
+        raise HTTPException(status_code=401, detail="Invalid API Key")
+
+    from .services.backfill import create_job, job_to_dict
+    try:
+        created = create_job(db, job.site, job.keyword, job.since, job.until, job.max_pages)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return job_to_dict(created)
+
+@app.get("/backfill/jobs")
+def get_backfill_jobs(
+    db: Session = Depends(database.get_db),
+    limit: int = Query(50, ge=1, le=500),
+    status: Optional[str] = Query(None, description="pending, running, done or failed")
+):
+    """Backfill jobs, newest first, with their checkpoint (next_page) and totals"""
+    from .services.backfill import SOURCES, list_jobs
+    return {"sites": sorted(SOURCES), "jobs": list_jobs(db, limit=limit, status=status)}
+
+@app.get("/metrics/latency")
+def latency_summary():
+    """p50/p95/p99 per route over the last LATENCY_WINDOW requests of this process"""
+    return route_latency.summary()
+
+@app.get("/metrics")
+def metrics():
+    """
+    Prometheus scrape endpoint: fetch latency, status codes, retries, parse time and
+    articles per page per site, ingest results, scheduler runs and DB time per endpoint.
+    """
+    body, content_type = render_latest()
+    if body is None:
+        return Response("prometheus_client is not installed\n", status_code=503, media_type="text/plain")
+    return Response(body, media_type=content_type)
+
 # --- Scheduler ---
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 import atexit
+import time
 
 scheduler = BackgroundScheduler()
 
-def scheduled_scraper_job():
+SCRAPE_INTERVAL_MINUTES = 30
+# A scheduled run stops scraping in time to ingest before the next one is due
+SCHEDULER_BUDGET_SECONDS = SCRAPE_INTERVAL_MINUTES * 60 * 0.8
+
+def scheduled_scraper_job(trigger="scheduler", budget_seconds=None):
     """
     Wrapper for running the scraper in scheduler.
     Since scheduler runs in a separate thread, we need a new DB session.
+    The run is recorded in scrape_runs under `trigger` (scheduler or cron) and
+    each site is ingested as it completes, so an interrupted run keeps what it
+    scraped and the next one resumes with the sites it did not finish
+    (services/scrape_runs.RunCheckpoint).
+    `budget_seconds` is the run deadline (default SCRAPE_BUDGET_SECONDS, see utils/budget.py).
     """
     print(f"[{datetime.now()}] Starting scheduled scraping...")
     db = database.SessionLocal()
+    started = time.perf_counter()
+    status = "error"
+    scrape_result = None
+    error = None
+    # Profiled only when SCRAPE_PROFILE is set
+    session = profile_session(label=trigger)
+    checkpoint = RunCheckpoint(db, trigger)
     try:
-        from .services.scraper_engine import run_all_scrapers
+        from .services.scraper_engine import SCRAPERS, run_all_scrapers
         
-        # Run scrapers
-        scrape_result = run_all_scrapers(return_json=True)
+        # Run scrapers, best-yielding sites first; sites with an open circuit are skipped
+        budget = ScrapeBudget.from_env(budget_seconds, yields=site_yields(db, SCRAPERS))
+        load_health(db, SCRAPERS)
+        scrape_result = run_all_scrapers(
+            return_json=False, profile=session, budget=budget, checkpoint=checkpoint,
+            last_scraped=last_scraped(db, SCRAPERS),
+        )
+        save_health(db, SCRAPERS)
         
         if scrape_result.get('status') == 'success':
-            articles_data = scrape_result.get('data', {}).get('articles', [])
-            saved_count = 0
-            
-            for article_data in articles_data:
-                # Validate source
-                from .utils.helpers import validate_source
-                if not validate_source(article_data.get('url')):
-                    continue
-
-                # Check for existing URL
-                existing = db.query(models.Article).filter(models.Article.source_url == article_data['url']).first()
-                if existing:
-                    # Update image if missing and we found one
-                    if not existing.image_url and article_data.get('image_url'):
-                        existing.image_url = article_data.get('image_url')
-                        db.add(existing) # Mark for update
-                        print(f"Updated image for existing article: {existing.title}")
-                    # Update category if it was "news" and we have better one
-                    if existing.category == "news" and article_data.get('category') != "news":
-                        existing.category = article_data.get('category')
-                        db.add(existing)
-                    # Update category
-                    if article_data.get('category'):
-                        normalized_cat = normalize_category(article_data.get('category'))
-                        if existing.category in ["news", "News"] and normalized_cat != "Nasional":
-                             existing.category = normalized_cat
-                             db.add(existing)
-                    continue
-                    
-                # Parse date
-                published_at = datetime.now()
-                try:
-                    if article_data.get('date'):
-                        published_at = datetime.strptime(article_data['date'], '%Y-%m-%d %H:%M:%S')
-                except ValueError:
-                    pass 
-                    
-                new_article = models.Article(
-                    title=article_data.get('title', 'No Title'),
-                    summary=article_data.get('description', ''),
-                    source_url=article_data.get('url', ''),
-                    source_name=article_data.get('source', 'Unknown'),
-                    category=normalize_category(article_data.get('category', 'news')),
-                    region=article_data.get('region', 'general'),
-                    image_url=article_data.get('image_url', None),
-                    published_at=published_at
-                )
-                
-                db.add(new_article)
-                saved_count += 1
-                
-            db.commit()
+            saved_count = checkpoint.ingest_result['saved']
             print(f"[{datetime.now()}] Scheduled scraping completed. Saved {saved_count} new articles.")
+            status = "success"
         else:
             print(f"[{datetime.now()}] Scheduled scraping failed: {scrape_result.get('message')}")
+            status = "failed"
             
     except Exception as e:
         print(f"[{datetime.now()}] Error in scheduled scraper: {str(e)}")
+        db.rollback()
+        error = str(e)
     finally:
+        checkpoint.finish(scrape_result, error)
         db.close()
+        SCHEDULER_RUN_SECONDS.labels(status).observe(time.perf_counter() - started)
+
+def scheduled_backfill_job():
+    """One time slice of the queued backfill jobs (services/backfill.py)"""
+    try:
+        from .services.backfill import run_backfill
+        worked = run_backfill()
+        if worked:
+            print(f"[{datetime.now()}] Backfill slice worked on jobs {[job['id'] for job in worked]}.")
+    except Exception as e:
+        print(f"[{datetime.now()}] Error in backfill job: {str(e)}")
 
 @app.get("/maintenance/cleanup-junk")
 def cleanup_junk_data(
@@ -283,22 +380,11 @@ def cleanup_junk_data(
     if key != "papua-news-secret-2024":
         raise HTTPException(status_code=401, detail="Unauthorized")
         
-    junk_keywords = [
-        "tentang kami", "about us", "contact", "hubungi kami", "redaksi",
-        "pedoman", "cyber media", "siber", "privacy", "kebijakan privasi",
-        "disclaimer", "karir", "lowongan", "galeri foto", "video story",
-        "term of use", "ketentuan", "indeks berita", "kabar daerah"
-    ]
-    
-    deleted_count = 0
+    from .services.cleanup import cleanup_junk
+
     try:
-        for keyword in junk_keywords:
-            # Delete by Title
-            deleted = db.query(models.Article).filter(models.Article.title.ilike(f"%{keyword}%")).delete(synchronize_session=False)
-            deleted_count += deleted
-            
-        db.commit()
-        return {"status": "success", "deleted_count": deleted_count, "message": "Junk data cleaned."}
+        result = cleanup_junk(db)
+        return {"status": "success", "deleted_count": result['deleted'], "message": "Junk data cleaned."}
     except Exception as e:
         db.rollback()
         return {"status": "error", "message": str(e)}
@@ -307,6 +393,10 @@ def cleanup_junk_data(
 def init_db():
     try:
         models.Base.metadata.create_all(bind=database.engine)
+        from .services.ingest import migrate_url_hash
+        from .services.scrape_runs import migrate_scrape_runs
+        migrate_url_hash()
+        migrate_scrape_runs()
         print("Database tables created/verified successfully.")
     except Exception as e:
         print(f"Error initializing database: {e}")
@@ -316,7 +406,8 @@ def start_scheduler():
     # Run every 30 minutes (Half-hourly) to accumulate data safely
     scheduler.add_job(
         scheduled_scraper_job,
-        trigger=IntervalTrigger(minutes=30),
+        trigger=IntervalTrigger(minutes=SCRAPE_INTERVAL_MINUTES),
+        kwargs={'budget_seconds': SCHEDULER_BUDGET_SECONDS},
         id='scraper_job',
         name='Scrape News Every 30 Minutes',
         replace_existing=True
@@ -329,21 +420,38 @@ def start_scheduler():
         scheduled_scraper_job,
         trigger='date',
         run_date=datetime.now(),
+        kwargs={'budget_seconds': SCHEDULER_BUDGET_SECONDS},
         id='startup_scraper',
         name='Startup Immediate Scrape'
     )
     print("Startup scrape scheduled to run immediately.")
 
+    from .services.backfill import BACKFILL_ENABLED, BACKFILL_INTERVAL_MINUTES
+    if BACKFILL_ENABLED:
+        # Background crawl of older pages; slices never overlap
+        scheduler.add_job(
+            scheduled_backfill_job,
+            trigger=IntervalTrigger(minutes=BACKFILL_INTERVAL_MINUTES),
+            id='backfill_job',
+            name='Backfill Slice',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+        print(f"Backfill job registered (every {BACKFILL_INTERVAL_MINUTES} mins).")
+
 @app.on_event("shutdown")
 def shutdown_scheduler():
     scheduler.shutdown()
+    shutdown_parse_pool()
 
 @app.get("/api/cron/scrape")
 def vercel_cron_scrape():
     """
-    Endpoint for Vercel Cron.
+    Endpoint for Vercel Cron. The run stops scraping before the function
+    limit (SCRAPE_BUDGET_SECONDS) and ingests what it found.
     """
     print(f"[{datetime.now()}] Vercel Cron triggered...")
     # Reuse the same job logic
-    scheduled_scraper_job()
+    scheduled_scraper_job(trigger="cron")
     return {"status": "success", "message": "Scraping job completed"}
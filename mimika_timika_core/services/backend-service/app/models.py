@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, func, Index
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Boolean, ForeignKey, func, Index
 from .database import Base
 
 class Article(Base):
@@ -10,12 +10,101 @@ class Article(Base):
     content = Column(Text, nullable=True)
     image_url = Column(String, nullable=True)
     source_url = Column(String, unique=True, index=True)
+    url_hash = Column(String(40), unique=True, index=True, nullable=True) # sha1 of canonical source_url
     source_name = Column(String, index=True) # detik, kompas, etc.
     category = Column(String, index=True)
-    region = Column(String, index=True, default="general") # mimika, timika, general
+    region = Column(String, index=True, default="general") # mimika, timika, both, general
     published_at = Column(DateTime)
     created_at = Column(DateTime, default=func.now())
 
     __table_args__ = (
         Index('idx_article_region_published', 'region', 'published_at'),
     )
+
+class IngestVersion(Base):
+    """Per-region counter bumped whenever ingest changes that region's articles (drives API ETags)"""
+    __tablename__ = "ingest_versions"
+
+    region = Column(String(32), primary_key=True) # mimika, timika, both, general
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False) # naive UTC
+
+class ScrapeRun(Base):
+    """One scrape + ingest run (scheduler, cron or /ingest/run) and its totals"""
+    __tablename__ = "scrape_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    trigger = Column(String(32), index=True) # scheduler, cron, api, manual
+    status = Column(String(16), index=True) # running, success, failed, error, interrupted (its process died)
+    started_at = Column(DateTime, index=True) # naive UTC
+    finished_at = Column(DateTime, nullable=True)
+    owner = Column(String(64), nullable=True) # host:pid:token of the process running it
+    heartbeat_at = Column(DateTime, nullable=True) # naive UTC, refreshed as its sites complete
+    duration_seconds = Column(Float, nullable=True)
+    articles_found = Column(Integer, default=0) # unique articles after dedup
+    articles_saved = Column(Integer, default=0)
+    articles_updated = Column(Integer, default=0)
+    error = Column(Text, nullable=True)
+
+class ScrapeRunSite(Base):
+    """Per-site telemetry of a ScrapeRun"""
+    __tablename__ = "scrape_run_sites"
+
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(Integer, ForeignKey("scrape_runs.id", ondelete="CASCADE"), nullable=False)
+    site = Column(String(32), nullable=False) # SCRAPERS key: detik, kompas, ...
+    status = Column(String(16)) # success, empty, error, skipped (run deadline or open circuit)
+    discovery = Column(String(16), nullable=True) # feed, search, feed+search
+    duration_seconds = Column(Float)
+    pages_fetched = Column(Integer, default=0)
+    bytes_fetched = Column(Integer, default=0)
+    pages_not_modified = Column(Integer, default=0) # 304 answers to conditional GETs
+    fetch_errors = Column(Integer, default=0) # HTTP error statuses, timeouts, connection errors
+    articles_parsed = Column(Integer, default=0)
+    articles_new = Column(Integer, default=0)
+    articles_updated = Column(Integer, default=0)
+    articles_digest = Column(String(40), nullable=True) # sha1 of the sorted url_hashes found
+    unchanged = Column(Boolean, default=False) # same articles as the site's previous run
+    error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        Index('idx_scrape_run_sites_run', 'run_id'),
+        Index('idx_scrape_run_sites_site_run', 'site', 'run_id'),
+    )
+
+class BackfillJob(Base):
+    """A historical crawl of one site and keyword over a date window; its progress is the checkpoint"""
+    __tablename__ = "backfill_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    site = Column(String(32), nullable=False) # SCRAPERS key with deep pagination: antara, kompas, detik
+    keyword = Column(String(128), nullable=False)
+    since = Column(DateTime, nullable=True) # window start, naive UTC; None = as deep as the site goes
+    until = Column(DateTime, nullable=True) # window end (exclusive), naive UTC; None = now
+    max_pages = Column(Integer, nullable=True)
+    status = Column(String(16), index=True, default="pending") # pending, running, done, failed, cancelled
+    next_page = Column(Integer, nullable=False, default=1) # first page not yet ingested
+    pages_fetched = Column(Integer, default=0)
+    articles_found = Column(Integer, default=0)
+    articles_saved = Column(Integer, default=0)
+    articles_updated = Column(Integer, default=0)
+    errors = Column(Integer, default=0) # consecutive failed pages
+    created_at = Column(DateTime, nullable=False) # naive UTC
+    updated_at = Column(DateTime, nullable=False) # last checkpoint; a stale running job is reclaimed
+    finished_at = Column(DateTime, nullable=True)
+    error = Column(Text, nullable=True)
+
+class SourceHealth(Base):
+    """Circuit breaker state of one source (utils/circuit.py), carried across runs and processes"""
+    __tablename__ = "source_health"
+
+    site = Column(String(32), primary_key=True) # SCRAPERS key: detik, kompas, ...
+    state = Column(String(16), nullable=False, default="closed") # closed, open, half_open
+    consecutive_failures = Column(Integer, nullable=False, default=0)
+    cooldown_seconds = Column(Float, nullable=True) # current cool-down; doubles after a failed probe
+    opened_at = Column(DateTime, nullable=True) # naive UTC
+    retry_at = Column(DateTime, nullable=True) # end of the cool-down: the next run probes once
+    last_success_at = Column(DateTime, nullable=True)
+    last_failure_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    updated_at = Column(DateTime, nullable=False)
@@ -2,9 +2,6 @@
 Detik.com News Scraper
 """
 
-import requests
-from bs4 import BeautifulSoup
-import time
 import random
 import logging
 import os
@@ -20,196 +17,185 @@ except ImportError:
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
-    from ..utils.helpers import clean_text, extract_date, log_site_status, remove_duplicates
+    from ..utils.helpers import (
+        clean_texts, log_site_status, remove_duplicates, parse_date, is_junk, keyword_list,
+        normalize_category,
+    )
+    from ..utils.records import ScrapedArticle
+    from ..utils.fetch import fetch_page, parse_html, class_strainer
+    from ..utils.metrics import record_page
+    from ..utils.parse_pool import PagePipeline
+    from ..utils.budget import ScrapeBudget, page_cap
 except ImportError:
-    # Fallback implementations for standalone testing
-    def clean_text(text):
-        if not text:
-            return ""
-        text = re.sub(r'\s+', ' ', text.strip())
-        text = re.sub(r'<[^>]+>', '', text)
-        return text
-    
-    def extract_date(date_text):
-        return datetime.now()
-    
-    def log_site_status(site, status, error=None):
-        if status == "OK":
-            logging.info(f"[{site}] Scraping completed successfully")
-        else:
-            logging.error(f"[{site}] Scraping failed: {error}")
-            
-    def remove_duplicates(articles):
-        seen = set()
-        unique = []
-        for a in articles:
-            if a['url'] not in seen:
-                seen.add(a['url'])
-                unique.append(a)
-        return unique
+    # Standalone run: the app/ directory is on sys.path, so import the same helpers directly
+    from utils.helpers import (
+        clean_texts, log_site_status, remove_duplicates, parse_date, is_junk, keyword_list,
+        normalize_category,
+    )
+    from utils.records import ScrapedArticle
+    from utils.fetch import fetch_page, parse_html, class_strainer
+    from utils.metrics import record_page
+    from utils.parse_pool import PagePipeline
+    from utils.budget import ScrapeBudget, page_cap
 
 import re
 
-def scrape_detik(keyword="mimika timika"):
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+def search_url(query: str, page: int, since=None, until=None) -> str:
     """
-    Scrape latest news from Detik.com with search keyword
-    Returns dict with response format consistent with API endpoints
+    Search result page `page`, newest first; `since` / `until` (dates)
+    restrict it to articles published in that inclusive range.
     """
-    articles = []
-    # keyword param used directly
-
-    max_pages = 100
+    url = f"https://www.detik.com/search/searchall?query={query.replace(' ', '%20')}&page={page}&sort=time"
+    if since is not None:
+        url += f"&fromdatex={since:%d/%m/%Y}"
+    if until is not None:
+        url += f"&todatex={until:%d/%m/%Y}"
+    return url
 
-    try:
-        # Check if running on Vercel to avoid timeouts
-        is_vercel = os.environ.get('VERCEL') == '1' or os.environ.get('VERCEL_ENV') is not None
-        
-        # Get custom limit from env or use defaults
-        custom_limit = os.environ.get('SCRAPE_PAGES_LIMIT')
-        if custom_limit:
-            try:
-                actual_max_pages = int(custom_limit)
-                logging.info(f"[Detik.com] Using custom page limit: {actual_max_pages}")
-            except ValueError:
-                actual_max_pages = 2 if is_vercel else 5
-                logging.warning(f"[Detik.com] Invalid SCRAPE_PAGES_LIMIT, using default: {actual_max_pages}")
-        else:
-            actual_max_pages = 2 if is_vercel else 5  # Always limit to prevent timeout
-
-        if is_vercel:
-            logging.info(f"[Detik.com] Vercel detected - limiting scrape to {actual_max_pages} pages to avoid timeout")
-        else:
-            logging.info(f"[Detik.com] Local environment - limiting scrape to {actual_max_pages} pages to prevent timeout")
-
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
+# Only the results column is read from a search page
+RESULTS_ONLY = class_strainer('div', 'column-6')
 
-        logging.info(f"[Detik.com] Starting search for keyword: '{keyword}'")
+def parse_search_page(content: bytes, page: int):
+    """
+    Articles of one search result page.
+    Runs in a parse worker (utils/parse_pool.py): takes the raw page and
+    returns ScrapedArticle records. `page` is the pipeline job (unused here).
+    """
+    # Build only the results column
+    soup = parse_html('detik', content, parse_only=RESULTS_ONLY)
 
-        # Collect HTML from all pages
-        html_pages = []
-        for page in range(1, actual_max_pages + 1):
-            search_url = f"https://www.detik.com/search/searchall?query={keyword.replace(' ', '%20')}&page={page}&sort=time"
+    articles_container = soup.find('div', class_="column-6")
+    article_list = articles_container.find_all('div', class_="list-content") if articles_container else []
 
+    berita = []
+    for links in article_list:
+        article_items = links.find_all('article', class_="list-content__item")
+        for link in article_items:
             try:
-                logging.info(f"[Detik.com] Scraping page {page}")
-                response = requests.get(search_url, headers=headers, timeout=10)
-                response.raise_for_status()
-                html_pages.append(response.text)
-                
-                # Shorter delay on Vercel to beat the clock
-                time.sleep(random.uniform(0.5, 1.5) if is_vercel else random.uniform(2, 4))
+                # Extract title
+                title_elem = link.find('h3', class_="media__title")
+                if not title_elem:
+                    continue
+
+                # Extract href
+                link_elem = link.find('a')
+                href = link_elem['href'] if link_elem else ""
+
+                # Drop menu/legal/gallery cards before any other per-card work
+                raw_title = title_elem.get_text()
+                if is_junk(raw_title, href):
+                    continue
+
+                # Extract and clean title + description in one batch
+                desc_elem = link.find('div', class_="media__desc")
+                title, description = clean_texts([
+                    raw_title,
+                    desc_elem.get_text() if desc_elem else "",
+                ])
+
+                # Extract timestamp
+                date_elem = link.find('div', class_="media__date")
+                date_span = date_elem.find('span') if date_elem else None
+                datetime_obj = None
+                if date_span:
+                    # Epoch in d-time, otherwise the visible text ("2 jam yang lalu")
+                    datetime_obj = parse_date(date_span.get('d-time') or date_span.get_text(), source='detik')
+                if datetime_obj is None:
+                    datetime_obj = datetime.now(ZoneInfo("Asia/Jakarta"))
+
+                # Image Extraction (User requested: class media__image -> img)
+                # Image Extraction
+                # User Rule: class media__image -> img
+                image_url = ""
+                img_div = link.find('div', class_="media__image")
+                if img_div:
+                    # Try finding img directly
+                    img_elem = img_div.find('img')
+                    if img_elem:
+                        image_url = img_elem.get('data-src') or img_elem.get('src', '')
+
+                    # Detail uses ratiobox often
+                    if not image_url:
+                        span_elem = img_div.find('span', class_="ratiobox")
+                        if span_elem:
+                             img_elem = span_elem.find('img')
+                             if img_elem:
+                                 image_url = img_elem.get('data-src') or img_elem.get('src', '')
+
+                # Fallback: Find any image in the article element if still empty
+                if not image_url:
+                    img_any = link.find('img')
+                    if img_any:
+                        image_url = img_any.get('data-src') or img_any.get('src', '')
+
+                # Detik search cards carry no category: deduce it from title/URL
+                berita.append(ScrapedArticle(
+                    title=title,
+                    url=href,
+                    description=description,
+                    published_at=datetime_obj,
+                    category=normalize_category("news", title, href),
+                    source="Detik.com",
+                    image_url=image_url
+                ))
+
             except Exception as e:
-                logging.warning(f"[Detik.com] Error scraping page {page}: {str(e)}")
+                logging.warning(f"[Detik.com] Error parsing article: {str(e)}")
                 continue
 
-        # Parse all HTML content
-        berita = []
-        for html_content in html_pages:
-            soup = BeautifulSoup(html_content, 'html.parser')
+    return berita
 
-            main = soup.find('div', class_="container-fluid")
-            if not main:
-                continue
+def scrape_detik(keyword="mimika timika", budget=None):
+    """
+    Scrape latest news from Detik.com with search keyword
+    `budget` is the run's ScrapeBudget (utils/budget.py): pages stop when the deadline nears
+    Returns dict with response format consistent with API endpoints
+    """
+    articles = []
+    budget = budget or ScrapeBudget.from_env()
+    # One search per keyword, as the baseline engine did: whether the site ORs
+    # space-separated terms is not established
+    terms = keyword_list(keyword)
 
-            articles_container = main.find('div', class_="column-6")
-            if not articles_container:
-                continue
+    try:
+        # Safety cap per keyword; the run budget may stop the scrape before it
+        max_pages = page_cap(5)
 
-            article_list = articles_container.find_all('div', class_="list-content")
-            if not article_list:
-                continue
+        berita = []
+        for term in terms:
+            logging.info(f"[Detik.com] Starting search for keyword: '{term}'")
 
-            for links in article_list:
-                article_items = links.find_all('article', class_="list-content__item")
-                for link in article_items:
-                    try:
-                        # Extract title
-                        title_elem = link.find('h3', class_="media__title")
-                        if not title_elem:
-                            continue
-                        title = clean_text(title_elem.text.strip())
-
-                        # Extract href
-                        link_elem = link.find('a')
-                        href = link_elem['href'] if link_elem else ""
-
-                        # Extract description
-                        desc_elem = link.find('div', class_="media__desc")
-                        description = clean_text(desc_elem.text.strip()) if desc_elem else ""
-
-                        # Extract timestamp
-                        date_elem = link.find('div', class_="media__date")
-                        if date_elem and date_elem.find('span') and date_elem.find('span').get('d-time'):
-                            try:
-                                time_timestamp = int(date_elem.find('span')['d-time'])
-                                time_datetime = datetime.fromtimestamp(time_timestamp, tz=ZoneInfo("Asia/Jakarta"))
-                                date_str = time_datetime.strftime('%Y-%m-%d %H:%M:%S')
-                                datetime_obj = time_datetime
-                            except Exception:
-                                date_str = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                                datetime_obj = datetime.now()
-                        else:
-                            date_str = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                            datetime_obj = datetime.now()
-
-                        # Categorization
-                        # Use helper with Title/URL fallback
-                        from ..utils.helpers import normalize_category
-                        category = normalize_category("news", title, href)
-                        
-                        # Image Extraction (User requested: class media__image -> img)
-                        # Image Extraction
-                        # User Rule: class media__image -> img
-                        image_url = ""
-                        img_div = link.find('div', class_="media__image")
-                        if img_div:
-                            # Try finding img directly
-                            img_elem = img_div.find('img')
-                            if img_elem:
-                                image_url = img_elem.get('data-src') or img_elem.get('src', '')
-                                
-                            # Detail uses ratiobox often
-                            if not image_url:
-                                span_elem = img_div.find('span', class_="ratiobox")
-                                if span_elem:
-                                     img_elem = span_elem.find('img')
-                                     if img_elem:
-                                         image_url = img_elem.get('data-src') or img_elem.get('src', '')
-                        
-                        # Fallback: Find any image in the article element if still empty
-                        if not image_url:
-                            img_any = link.find('img')
-                            if img_any:
-                                image_url = img_any.get('data-src') or img_any.get('src', '')
-
-                        data = {
-                            "title": title,
-                            "url": href,
-                            "description": description,
-                            "date": date_str,
-                            "category": category,
-                            "source": "Detik.com",
-                            "image_url": image_url,
-                            "datetime_obj": datetime_obj
-                        }
-                        berita.append(data)
-
-                    except Exception as e:
-                        logging.warning(f"[Detik.com] Error parsing article: {str(e)}")
+            def fetch(page, term=term):
+                logging.info(f"[Detik.com] Scraping page {page}")
+                return fetch_page('detik', search_url(term, page), headers=HEADERS, timeout=budget.timeout(10)).content
+
+            # Pages are fetched ahead in a thread and parsed in the parse pool, in page order
+            pipeline = PagePipeline(
+                'detik', range(1, max_pages + 1), fetch, parse_search_page,
+                # Shorter delay when the deadline is near
+                delay=lambda: random.uniform(0.5, 1.5) if budget.hurried else random.uniform(2, 4),
+                budget=budget,
+            )
+            with pipeline as pages:
+                for parsed in pages:
+                    if parsed.error is not None:
+                        logging.warning(f"[Detik.com] Error scraping page {parsed.job}: {str(parsed.error)}")
                         continue
+                    record_page('detik', len(parsed.result))
+                    for article in parsed.result:
+                        article.search_keyword = term
+                    berita.extend(parsed.result)
 
         # Sort by datetime (newest first)
-        berita.sort(key=lambda x: x["datetime_obj"], reverse=True)
-
-        # Remove datetime_obj from final data
-        for item in berita:
-            del item["datetime_obj"]
+        berita.sort(key=lambda x: x.published_at, reverse=True)
 
         articles = berita
         log_site_status("Detik.com", "OK")
-        logging.info(f"[Detik.com] Successfully scraped {len(articles)} articles with keyword '{keyword}'")
+        logging.info(f"[Detik.com] Successfully scraped {len(articles)} articles with keywords {', '.join(terms)}")
 
     except Exception as e:
         log_site_status("Detik.com", "ERROR", str(e))
@@ -237,7 +223,7 @@ def scrape_detik(keyword="mimika timika"):
             }
         }
 
-    categories = list(set(article.get('category', 'news') for article in unique_articles))
+    categories = list(set(article.category for article in unique_articles))
 
     response_data = {
         'status': 'success',
@@ -258,4 +244,4 @@ if __name__ == "__main__":
     import json
     logging.basicConfig(level=logging.INFO)
     result = scrape_detik()
-    print(json.dumps(result, indent=2))
+    print(json.dumps(result, indent=2, default=ScrapedArticle.to_dict))
@@ -0,0 +1,280 @@
+"""
+Feed discovery: RSS/Atom feeds and Google News sitemaps
+Used by scraper_engine before the HTML search scrapers of the same site.
+
+A feed is a few KB of structured XML against a 100+ KB search page, so
+sites that publish one are read from it: entries are matched against the
+region keywords locally, and feeds are fetched with conditional GET
+(ETag / Last-Modified remembered per URL for the life of the process).
+
+The search scraper is only needed when the feeds miss: every feed failed,
+or a feed's entries do not reach back to the site's last successful scrape
+(`since`, from scrape_run_sites), so articles published since then may have
+scrolled out of it. Without a successful scrape on record (first run, or
+no telemetry) the feeds always miss.
+"""
+
+import logging
+import os
+import re
+import sys
+import threading
+import json
+import xml.etree.ElementTree as ET
+from datetime import timezone
+from functools import lru_cache
+
+# Add parent directory to path for imports when running standalone
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from ..utils.helpers import clean_texts, log_site_status, parse_date, is_junk, keyword_list, normalize_category
+    from ..utils.records import ScrapedArticle
+    from ..utils.fetch import fetch_page
+    from ..utils.metrics import PARSE_SECONDS, record_page, timed
+    from ..utils.budget import ScrapeBudget
+except ImportError:
+    # Standalone run: the app/ directory is on sys.path, so import the same helpers directly
+    from utils.helpers import clean_texts, log_site_status, parse_date, is_junk, keyword_list, normalize_category
+    from utils.records import ScrapedArticle
+    from utils.fetch import fetch_page
+    from utils.metrics import PARSE_SECONDS, record_page, timed
+    from utils.budget import ScrapeBudget
+
+# site (SCRAPERS key) -> (source name used by its HTML scraper, feed URLs)
+# A URL that stops working only costs a fallback to the search scraper.
+FEEDS = {
+    'antara': ('Antara News', (
+        'https://www.antaranews.com/rss/terkini.xml',
+        'https://papua.antaranews.com/rss/terkini.xml',
+    )),
+    'detik': ('Detik.com', (
+        'https://news.detik.com/rss',
+    )),
+    'kompas': ('Kompas.com', (
+        'https://regional.kompas.com/sitemap-news.xml',
+    )),
+    'tempo': ('Tempo', (
+        'https://rss.tempo.co/nasional',
+        'https://rss.tempo.co/daerah',
+    )),
+    'cnn': ('CNN Indonesia', (
+        'https://www.cnnindonesia.com/nasional/rss',
+    )),
+}
+
+FEED_DISCOVERY = os.getenv("FEED_DISCOVERY", "1").lower() in ("1", "true", "yes", "on")
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "application/rss+xml, application/atom+xml, application/xml;q=0.9, text/xml;q=0.8",
+}
+
+# url -> {'etag': ..., 'last_modified': ...} from the last 200 response
+_validators = {}
+_validators_lock = threading.Lock()
+
+def _local(tag) -> str:
+    """Tag name without its XML namespace"""
+    return tag.rsplit('}', 1)[-1] if isinstance(tag, str) else ''
+
+def _child(elem, *names):
+    for child in elem:
+        if _local(child.tag) in names:
+            return child
+    return None
+
+def _child_text(elem, *names) -> str:
+    child = _child(elem, *names)
+    return (child.text or '').strip() if child is not None else ''
+
+def _rss_image(item) -> str:
+    for child in item:
+        name = _local(child.tag)
+        if name in ('enclosure', 'content', 'thumbnail') and child.get('url'):
+            if name != 'enclosure' or (child.get('type') or 'image').startswith('image'):
+                return child.get('url')
+    return ''
+
+def _atom_link(entry) -> str:
+    for child in entry:
+        if _local(child.tag) == 'link' and child.get('rel', 'alternate') == 'alternate':
+            return child.get('href', '')
+    return ''
+
+def parse_feed(content: bytes):
+    """
+    Entries of an RSS 2.0/RDF, Atom or news-sitemap document as
+    (title, url, description, date text, image url) tuples.
+    """
+    root = ET.fromstring(content)
+    kind = _local(root.tag)
+    entries = []
+    if kind in ('rss', 'RDF'):
+        for item in root.iter():
+            if _local(item.tag) != 'item':
+                continue
+            entries.append((
+                _child_text(item, 'title'),
+                _child_text(item, 'link'),
+                _child_text(item, 'description'),
+                _child_text(item, 'pubDate', 'date'),
+                _rss_image(item),
+            ))
+    elif kind == 'feed':
+        for entry in root:
+            if _local(entry.tag) != 'entry':
+                continue
+            entries.append((
+                _child_text(entry, 'title'),
+                _atom_link(entry),
+                _child_text(entry, 'summary', 'content'),
+                _child_text(entry, 'published', 'updated'),
+                '',
+            ))
+    elif kind == 'urlset':
+        for url in root:
+            news = _child(url, 'news')
+            if news is None:
+                continue
+            image = _child(url, 'image')
+            entries.append((
+                _child_text(news, 'title'),
+                _child_text(url, 'loc'),
+                _child_text(news, 'keywords'),
+                _child_text(news, 'publication_date'),
+                _child_text(image, 'loc') if image is not None else '',
+            ))
+    else:
+        raise ValueError(f"Not a feed: <{kind}>")
+    return entries
+
+@lru_cache(maxsize=8)
+def _keyword_re(keywords):
+    return re.compile(r'\b(' + '|'.join(re.escape(k) for k in keywords) + r')\b', re.IGNORECASE)
+
+def match_entries(site: str, entries, keyword="mimika", seen=None):
+    """
+    ScrapedArticles for the parse_feed() entries of `site` that mention any
+    keyword, and the parsed date of every entry. Links in `seen` are skipped
+    and the matched ones added to it.
+    """
+    source = FEEDS[site][0]
+    keyword_re = _keyword_re(tuple(keyword_list(keyword)))
+    if seen is None:
+        seen = set()
+    titles_and_descriptions = clean_texts([text for entry in entries for text in entry[:3:2]])
+    dates = [parse_date(entry[3], source=f"{site}-feed") for entry in entries]
+
+    articles = []
+    for i, (_, link, _, _, image_url) in enumerate(entries):
+        title, description = titles_and_descriptions[2 * i:2 * i + 2]
+        if not title or not link or link in seen:
+            continue
+        match = keyword_re.search(title) or keyword_re.search(description)
+        if match is None or is_junk(title, link):
+            continue
+        seen.add(link)
+        articles.append(ScrapedArticle(
+            title=title,
+            url=link,
+            description=description,
+            published_at=dates[i],
+            category=normalize_category("news", title, link),
+            source=source,
+            image_url=image_url,
+            search_keyword=match.group(1).lower(),
+        ))
+    return articles, dates
+
+def fetch_feed(site: str, url: str, timeout: float = 10):
+    """
+    Conditional GET of one feed. Returns the response body, or None when the
+    server answered 304 Not Modified.
+    """
+    headers = dict(HEADERS)
+    with _validators_lock:
+        validators = _validators.get(url, {})
+    if validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators.get('last_modified'):
+        headers['If-Modified-Since'] = validators['last_modified']
+
+    response = fetch_page(site, url, headers=headers, timeout=timeout)
+    if response.status_code == 304:
+        return None
+    with _validators_lock:
+        _validators[url] = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+        }
+    return response.content
+
+def scrape_feeds(site: str, keyword="mimika", since=None, budget=None):
+    """
+    Read `site`'s feeds and keep the entries mentioning any keyword.
+    `since` is when the site was last scraped successfully (naive UTC or
+    aware); each feed must reach back to it.
+    Returns the scrapers' result dict; status 'miss' (with the articles that
+    were found) tells the caller to run the search scraper as well.
+    With a run `budget` (utils/budget.py), feeds that no longer fit are skipped.
+    """
+    source, urls = FEEDS[site]
+    budget = budget or ScrapeBudget()
+    if since is not None and since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+
+    articles = []
+    seen = set()
+    misses = [] if since is not None else ["no successful scrape on record"]
+    not_modified = 0
+    for url in urls:
+        if not budget.allows(site):
+            misses.append(f"{url}: run deadline near")
+            continue
+        try:
+            with budget.timed(site):
+                content = fetch_feed(site, url, timeout=budget.timeout(10))
+            if content is None:
+                # Nothing new since this process last read it
+                not_modified += 1
+                continue
+            with timed(PARSE_SECONDS, site):
+                entries = parse_feed(content)
+        except Exception as e:
+            logging.warning(f"[{source} feed] {url} failed: {e}")
+            misses.append(f"{url}: {e}")
+            continue
+
+        matched, dates = match_entries(site, entries, keyword, seen)
+        dated = [d for d in dates if d is not None]
+        if since is not None and (not dated or min(dated) > since):
+            misses.append(f"{url}: does not reach back to {since:%Y-%m-%d %H:%M} UTC")
+
+        articles.extend(matched)
+        record_page(site, len(matched))
+        logging.info(f"[{source} feed] {len(entries)} entries, {len(matched)} matching in {url}")
+
+    if misses:
+        # Not an error: the engine falls back to the search scraper
+        logging.info(f"[{source} feed] Feeds missed, search needed: {'; '.join(misses)}")
+    else:
+        log_site_status(f"{source} feed", "OK")
+    return {
+        'status': 'miss' if misses else 'success',
+        'message': "; ".join(misses),
+        'data': {
+            'metadata': {
+                'total_articles': len(articles),
+                'source': source,
+                'discovery': 'feed',
+                'feeds_not_modified': not_modified,
+            },
+            'articles': articles
+        }
+    }
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    site = sys.argv[1] if len(sys.argv) > 1 else 'antara'
+    print(json.dumps(scrape_feeds(site, keyword=['timika', 'mimika']), indent=2, default=ScrapedArticle.to_dict))
@@ -3,9 +3,7 @@ Kompas.com News Scraper
 Scrapes Kompas search results for "mimika timika" keyword
 """
 
-import requests
-from bs4 import BeautifulSoup
-import time
+import itertools
 import random
 import logging
 import sys
@@ -18,208 +16,205 @@ import json
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
-    from ..utils.helpers import clean_text, extract_date, log_site_status, remove_duplicates
+    from ..utils.helpers import (
+        clean_texts, log_site_status, remove_duplicates, parse_date, is_junk, keyword_list,
+        normalize_category,
+    )
+    from ..utils.records import ScrapedArticle
+    from ..utils.fetch import fetch_page, parse_html, class_strainer
+    from ..utils.metrics import record_page
+    from ..utils.parse_pool import PagePipeline
+    from ..utils.budget import ScrapeBudget, page_cap
 except ImportError:
-    # Fallback implementations for standalone testing
-    def clean_text(text):
-        if not text:
-            return ""
-        text = re.sub(r'\s+', ' ', text.strip())
-        text = re.sub(r'<[^>]+>', '', text)
-        return text
-    
-    def extract_date(date_text):
-        return datetime.now()
-    
-    def log_site_status(site, status, error=None):
-        if status == "OK":
-            logging.info(f"[{site}] Scraping completed successfully")
-        else:
-            logging.error(f"[{site}] Scraping failed: {error}")
-            
-    def remove_duplicates(articles):
-        seen = set()
-        unique = []
-        for a in articles:
-            if a['url'] not in seen:
-                seen.add(a['url'])
-                unique.append(a)
-        return unique
-
-def scrape_kompas(keyword="mimika timika"):
+    # Standalone run: the app/ directory is on sys.path, so import the same helpers directly
+    from utils.helpers import (
+        clean_texts, log_site_status, remove_duplicates, parse_date, is_junk, keyword_list,
+        normalize_category,
+    )
+    from utils.records import ScrapedArticle
+    from utils.fetch import fetch_page, parse_html, class_strainer
+    from utils.metrics import record_page
+    from utils.parse_pool import PagePipeline
+    from utils.budget import ScrapeBudget, page_cap
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Referer": "https://www.kompas.com/",
+    "Connection": "keep-alive",
+}
+
+def search_url(query: str, page: int) -> str:
+    """Search result page `page`, newest first (Kompas has no date filter)"""
+    return f"https://search.kompas.com/search?q={query.replace(' ', '+')}&page={page}&sort=latest&site_id=all"
+
+# Only the results list (or its sectionBox fallback) is read from a search page
+RESULTS_ONLY = class_strainer(['div', 'section'], 'articleList', 'sectionBox')
+
+def parse_search_page(content: bytes, page: int):
+    """
+    Articles of one search result page, or None when it has no result list.
+    Runs in a parse worker (utils/parse_pool.py): takes the raw page and
+    returns ScrapedArticle records. `page` is the pipeline job (unused here).
+    """
+    soup = parse_html('kompas', content, parse_only=RESULTS_ONLY)
+
+    # Based on user's screenshot, the structure is:
+    # div class="articleList -list "
+    #   div class="articleItem"
+    #     a class="article-link"
+    #       div class="articleItem-box"
+    #         h2 class="articleTitle"
+    #       div class="articlePost"
+    #         div class="articlePost-date"
+    #       div class="articleLead"
+    #         p (description)
+
+    article_list_container = soup.find('div', class_='articleList')
+    if not article_list_container:
+        # Alternative selector if the first one fails
+        article_list_container = soup.find('section', class_='sectionBox')
+
+    if not article_list_container:
+        return None
+
+    article_items = article_list_container.find_all('div', class_='articleItem')
+
+    if not article_items:
+        # Try direct article find if div.articleItem is not used identically everywhere
+        article_items = article_list_container.find_all('article', class_='articleList')
+
+    if not article_items:
+        return []
+
+    articles = []
+    for item in article_items:
+        try:
+            # Find the link first to get the URL
+            link_elem = item.find('a', class_='article-link') or item.find('a')
+            if not link_elem:
+                continue
+
+            url = link_elem.get('href')
+            if not url:
+                continue
+
+            # Title
+            title_elem = item.find('h2', class_='articleTitle') or item.find('h2')
+            if not title_elem:
+                continue
+
+            # Drop menu/legal/gallery cards before any other per-card work
+            raw_title = title_elem.get_text()
+            if is_junk(raw_title, url):
+                continue
+
+            # Date and description
+            date_elem = item.find('div', class_='articlePost-date')
+            desc_elem = item.find('div', class_='articleLead')
+            if desc_elem:
+                desc_elem = desc_elem.find('p') or desc_elem
+
+            # Clean title, date and description in one batch
+            title, date_text, description = clean_texts([
+                raw_title,
+                date_elem.get_text() if date_elem else "",
+                desc_elem.get_text() if desc_elem else "",
+            ])
+            published_at = parse_date(date_text, source='kompas')
+
+            # Categorization
+            # Kompas URL usually contains category like /nasional/, /regional/, etc.
+            # We pass the raw segment from URL if possible, or just "news", and normalize
+            # it with Title/URL fallback
+            raw_category = "news"
+            if len(url.split('/')) > 3:
+                 raw_category = url.split('/')[3] # e.g. kompas.com/[read]/... NO, kompas.com/[regional]/...
+
+            # Image Extraction
+            # Structure: div.articleItem -> a.article-link -> div.articleItem-wrap -> div.articleItem-img -> img
+            image_url = ""
+            wrap_div = item.find('div', class_='articleItem-wrap')
+            if wrap_div:
+                img_div = wrap_div.find('div', class_='articleItem-img')
+                if img_div:
+                    img_elem = img_div.find('img')
+                    if img_elem:
+                        image_url = img_elem.get('src') or img_elem.get('data-src', '')
+                        # Fallback for lazy loading
+                        if 'placeholder' in image_url or not image_url:
+                            image_url = img_elem.get('data-src', '')
+
+            # Fallback if structure changes
+            if not image_url:
+                img_elem = item.find('img')
+                if img_elem:
+                    image_url = img_elem.get('src') or img_elem.get('data-src', '')
+
+            articles.append(ScrapedArticle(
+                title=title,
+                url=url,
+                description=description,
+                published_at=published_at,
+                category=normalize_category(raw_category, title, url),
+                source='Kompas.com',
+                image_url=image_url
+            ))
+
+        except Exception as e:
+            logging.debug(f"Error parsing item: {str(e)}")
+            continue
+
+    return articles
+
+def scrape_kompas(keyword="mimika timika", budget=None):
     """
     Scrape news from Kompas.com search with keyword
+    `budget` is the run's ScrapeBudget (utils/budget.py): pages stop when the deadline nears
     Returns dict with success status and article data
     """
     articles = []
-    # keyword param used directly
+    budget = budget or ScrapeBudget.from_env()
     
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-            "Referer": "https://www.kompas.com/",
-            "Connection": "keep-alive",
-        }
-        
-        # Check if running on Vercel to avoid timeouts
-        is_vercel = os.environ.get('VERCEL') == '1' or os.environ.get('VERCEL_ENV') is not None
-        
-        # Get custom limit from env or use defaults (Kompas default logic logic handled in loop)
-        custom_limit = os.environ.get('SCRAPE_PAGES_LIMIT')
-        actual_max_pages = 2 # Default for Vercel
-        
-        if custom_limit:
-            try:
-                actual_max_pages = int(custom_limit)
-                logging.info(f"[Kompas.com] Using custom page limit: {actual_max_pages}")
-            except ValueError:
-                logging.warning(f"[Kompas.com] Invalid SCRAPE_PAGES_LIMIT")
-        
-        if is_vercel:
-            logging.info(f"Vercel detected - limiting scrape to {actual_max_pages} pages to avoid 10s timeout")
-
-        logging.info(f"[Kompas.com] Starting search for keyword: '{keyword}'")
-        
-        page = 1
-        while True:
-            # Check for page limit if on Vercel
-            if is_vercel and page > actual_max_pages:
-                logging.info("[Kompas.com] Vercel page limit reached. Stopping scrape.")
-                break
-
-            search_url = f"https://search.kompas.com/search?q={keyword.replace(' ', '+')}&page={page}&sort=latest&site_id=all"
-            
-            try:
+        # No page cap but SCRAPE_PAGES_LIMIT, as before the run budget: the budget or an empty page ends the search
+        max_pages = page_cap(None)
+
+        # One search per keyword, as the baseline engine did: whether the site ORs
+        # space-separated terms is not established
+        for term in keyword_list(keyword):
+            logging.info(f"[Kompas.com] Starting search for keyword: '{term}'")
+
+            def fetch(page, term=term):
                 logging.info(f"[Kompas.com] Scraping page {page}")
-                response = requests.get(search_url, headers=headers, timeout=15)
-                response.raise_for_status()
-                
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Based on user's screenshot, the structure is:
-                # div class="articleList -list "
-                #   div class="articleItem"
-                #     a class="article-link"
-                #       div class="articleItem-box"
-                #         h2 class="articleTitle"
-                #       div class="articlePost"
-                #         div class="articlePost-date"
-                #       div class="articleLead"
-                #         p (description)
-
-                article_list_container = soup.find('div', class_='articleList')
-                if not article_list_container:
-                    # Alternative selector if the first one fails
-                    article_list_container = soup.find('section', class_='sectionBox')
-                
-                if not article_list_container:
-                    logging.info(f"[Kompas.com] No article list container found on page {page}")
-                    break
-                    
-                article_items = article_list_container.find_all('div', class_='articleItem')
-                
-                if not article_items:
-                    # Try direct article find if div.articleItem is not used identically everywhere
-                    article_items = article_list_container.find_all('article', class_='articleList')
-
-                if not article_items:
-                    logging.info(f"[Kompas.com] No more articles found on page {page}")
-                    break
-                
-                found_on_page = 0
-                for item in article_items:
-                    try:
-                        # Find the link first to get the URL
-                        link_elem = item.find('a', class_='article-link') or item.find('a')
-                        if not link_elem:
-                            continue
-                            
-                        url = link_elem.get('href')
-                        if not url:
-                            continue
-                            
-                        # Title
-                        title_elem = item.find('h2', class_='articleTitle') or item.find('h2')
-                        if not title_elem:
-                            continue
-                        title = clean_text(title_elem.get_text())
-                        
-                        # Date
-                        date_elem = item.find('div', class_='articlePost-date')
-                        date_str = clean_text(date_elem.get_text()) if date_elem else datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                        
-                        # Description
-                        desc_elem = item.find('div', class_='articleLead')
-                        description = ""
-                        if desc_elem:
-                            p_elem = desc_elem.find('p')
-                            description = clean_text(p_elem.get_text()) if p_elem else clean_text(desc_elem.get_text())
-                        
-                        # Categorization
-                        # Use helper with Title/URL fallback
-                        # Kompas URL usually contains category like /nasional/, /regional/, etc.
-                        # We pass the raw segment from URL if possible, or just "news" and let helper decide
-                        raw_category = "news"
-                        if len(url.split('/')) > 3:
-                             raw_category = url.split('/')[3] # e.g. kompas.com/[read]/... NO, kompas.com/[regional]/...
-                        
-                        from ..utils.helpers import normalize_category
-                        category = normalize_category(raw_category, title, url)
-
-                        # Image Extraction
-                        # Structure: div.articleItem -> a.article-link -> div.articleItem-wrap -> div.articleItem-img -> img
-                        image_url = ""
-                        wrap_div = item.find('div', class_='articleItem-wrap')
-                        if wrap_div:
-                            img_div = wrap_div.find('div', class_='articleItem-img')
-                            if img_div:
-                                img_elem = img_div.find('img')
-                                if img_elem:
-                                    image_url = img_elem.get('src') or img_elem.get('data-src', '')
-                                    # Fallback for lazy loading
-                                    if 'placeholder' in image_url or not image_url:
-                                        image_url = img_elem.get('data-src', '')
-                        
-                        # Fallback if structure changes
-                        if not image_url:
-                            img_elem = item.find('img')
-                            if img_elem:
-                                image_url = img_elem.get('src') or img_elem.get('data-src', '')
-                        
-                        articles.append({
-                            'title': title,
-                            'url': url,
-                            'description': description,
-                            'date': date_str,
-                            'category': category,
-                            'category': category,
-                            'source': 'Kompas.com',
-                            'image_url': image_url
-                        })
-                        found_on_page += 1
-                        
-                    except Exception as e:
-                        logging.debug(f"Error parsing item: {str(e)}")
-                        continue
-                
-                if found_on_page == 0:
-                    break
-                    
-                logging.info(f"[Kompas.com] Found {found_on_page} articles on page {page}")
-                
-                # Delay
-                time.sleep(random.uniform(0.5, 1.5) if is_vercel else random.uniform(2, 4))
-                page += 1
-                
-                # Safety break for non-Vercel
-                if not is_vercel and page > 50:
-                    break
-            
-            except Exception as e:
-                logging.warning(f"[Kompas.com] Error scraping page {page}: {str(e)}")
-                break
-        
+                return fetch_page('kompas', search_url(term, page), headers=HEADERS, timeout=budget.timeout(15)).content
+
+            # Pages are fetched ahead in a thread and parsed in the parse pool, in page order
+            pipeline = PagePipeline(
+                'kompas', range(1, max_pages + 1) if max_pages else itertools.count(1), fetch, parse_search_page,
+                delay=lambda: random.uniform(0.5, 1.5) if budget.hurried else random.uniform(2, 4),
+                budget=budget,
+            )
+            with pipeline as pages:
+                for parsed in pages:
+                    page = parsed.job
+                    if parsed.error is not None:
+                        logging.warning(f"[Kompas.com] Error scraping page {page}: {str(parsed.error)}")
+                        break
+                    if parsed.result is None:
+                        logging.info(f"[Kompas.com] No article list container found on page {page}")
+                        break
+
+                    record_page('kompas', len(parsed.result))
+                    if not parsed.result:
+                        logging.info(f"[Kompas.com] No more articles found on page {page}")
+                        break
+
+                    for article in parsed.result:
+                        article.search_keyword = term
+                    articles.extend(parsed.result)
+                    logging.info(f"[Kompas.com] Found {len(parsed.result)} articles on page {page}")
+
         log_site_status("Kompas.com", "OK")
     
     except Exception as e:
@@ -232,7 +227,7 @@ def scrape_kompas(keyword="mimika timika"):
     
     # Final cleanup
     unique_articles = remove_duplicates(articles)
-    categories = sorted(list(set(a.get('category', 'news') for a in unique_articles)))
+    categories = sorted(list(set(a.category for a in unique_articles)))
     
     return {
         'status': 'success',
@@ -250,4 +245,4 @@ def scrape_kompas(keyword="mimika timika"):
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
     result = scrape_kompas()
-    print(json.dumps(result, indent=2))
\ No newline at end of file
+    print(json.dumps(result, indent=2, default=ScrapedArticle.to_dict))
\ No newline at end of file
@@ -3,54 +3,52 @@ Kumparan.com News Scraper
 Simplified scraper for Kumparan.com news
 """
 
-import requests
-from bs4 import BeautifulSoup
 import time
 import logging
 import sys
 import os
 from datetime import datetime
-import re
 import json
 
 # Add parent directory to path for imports when running standalone
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
-    from ..utils.helpers import clean_text, extract_date, log_site_status, remove_duplicates
+    from ..utils.helpers import log_site_status, remove_duplicates, keyword_list
+    from ..utils.records import ScrapedArticle
+    from ..utils.link_harvest import LinkHarvester
+    from ..utils.fetch import fetch_page
+    from ..utils.metrics import record_page
+    from ..utils.budget import ScrapeBudget, SCRAPE_PAGES_LIMIT
 except ImportError:
-    # Fallback implementations for standalone testing
-    def clean_text(text):
-        if not text:
-            return ""
-        text = re.sub(r'\s+', ' ', text.strip())
-        text = re.sub(r'<[^>]+>', '', text)
-        return text
-
-    def extract_date(date_text):
-        return datetime.now()
-
-    def log_site_status(site, status, error=None):
-        if status == "OK":
-            logging.info(f"[{site}] Scraping completed successfully")
-        else:
-            logging.error(f"[{site}] Scraping failed: {error}")
-
-    def remove_duplicates(articles):
-        seen = set()
-        unique = []
-        for a in articles:
-            if a['url'] not in seen:
-                seen.add(a['url'])
-                unique.append(a)
-        return unique
-
-def scrape_kumparan(keyword="mimika"):
+    # Standalone run: the app/ directory is on sys.path, so import the same helpers directly
+    from utils.helpers import log_site_status, remove_duplicates, keyword_list
+    from utils.records import ScrapedArticle
+    from utils.link_harvest import LinkHarvester
+    from utils.fetch import fetch_page
+    from utils.metrics import record_page
+    from utils.budget import ScrapeBudget, SCRAPE_PAGES_LIMIT
+
+HARVESTER = LinkHarvester(
+    'kumparan', 'Kumparan', "https://kumparan.com",
+    # Articles live under /<channel or author>/<slug>
+    article_pattern=r'^https?://(?:www\.)?kumparan\.com/[^/?#]+/[^/?#]+',
+    reject_pattern=r'login|register|search|tag|#',
+    containers=('main',),
+    categories=(
+        ('/politik/', 'politik'), ('/bisnis/', 'ekonomi'), ('/ekonomi/', 'ekonomi'),
+        ('/olahraga/', 'olahraga'), ('/hiburan/', 'hiburan'),
+    ),
+)
+
+def scrape_kumparan(keyword="mimika", budget=None):
     """
     Simplified Kumparan scraper with keyword search
+    `budget` is the run's ScrapeBudget (utils/budget.py): pages stop when the deadline nears
     Returns dict with success status and minimal article data
     """
     articles = []
+    budget = budget or ScrapeBudget.from_env()
 
     try:
         # Simple headers
@@ -63,102 +61,41 @@ def scrape_kumparan(keyword="mimika"):
         }
 
         # Try to get latest news from Kumparan
+        # One search page per keyword (no OR syntax); overlapping hits are skipped by URL below
         urls_to_try = [
-            f"https://kumparan.com/search/{keyword}"
+            (search_keyword, f"https://kumparan.com/search/{search_keyword}")
+            for search_keyword in keyword_list(keyword)
         ]
 
         articles_found = 0
         articles_found = 0
         
-        # Determine max articles based on page limit env var (approx 10 articles per page)
-        custom_limit = os.environ.get('SCRAPE_PAGES_LIMIT')
-        if custom_limit:
-            try:
-                max_articles = int(custom_limit) * 10
-                logging.info(f"[Kumparan] Using custom limit: {max_articles} articles")
-            except ValueError:
-                max_articles = 10
-        else:
-            max_articles = 10  # Default limit
-
-        for url in urls_to_try:
+        # Article cap (approx 10 articles per page when SCRAPE_PAGES_LIMIT is set)
+        max_articles = SCRAPE_PAGES_LIMIT * 10 if SCRAPE_PAGES_LIMIT else 10
+
+        # The limit is per keyword, as when each keyword was a separate call
+        max_articles *= len(urls_to_try)
+
+        # URLs already collected, shared by all search pages
+        seen = set()
+        for search_keyword, url in urls_to_try:
             if articles_found >= max_articles:
                 break
+            # Room for the page and the delay after it
+            if not budget.allows('kumparan', extra=1):
+                logging.info(f"[Kumparan] Run deadline near, not fetching {url}")
+                break
 
             try:
                 logging.info(f"[Kumparan] Trying Kumparan URL: {url}")
-                response = requests.get(url, headers=headers, timeout=10)
-                response.raise_for_status()
-
-                soup = BeautifulSoup(response.text, 'html.parser')
-
-                # Look for article links
-                article_links = soup.find_all('a', href=True)
-
-                for link in article_links:
-                    if articles_found >= max_articles:
-                        break
-
-                    href = link.get('href', '')
-
-                    # Check if it's a Kumparan article
-                    if ('kumparan.com' in href or href.startswith('/')) and len(href) > 10:
-                        # Skip certain URLs
-                        if any(skip in href.lower() for skip in ['login', 'register', 'search', 'tag', '#', 'tentang-kami', 'redaksi', 'pedoman-media-siber', 'privacy']):
-                            continue
-                        
-                        # Skip if title contains non-news keywords
-                        if any(skip in href.lower() for skip in ['tentang kami', 'redaksi', 'pedoman media']):
-                             continue
-
-                        # Make URL absolute
-                        if href.startswith('/'):
-                            href = f"https://kumparan.com{href}"
-                        elif not href.startswith('http'):
-                            continue
-
-                        # Get title from link or nearby elements
-                        title = ""
-                        title_elem = link.find('h1') or link.find('h2') or link.find('h3') or link.find('h4')
-                        if title_elem:
-                            title = clean_text(title_elem.get_text())
-                        else:
-                            title = clean_text(link.get_text())
-
-                        # Skip if title is too short or empty
-                        if len(title) < 10:
-                            continue
-
-                        # Try to get description from nearby elements
-                        description = ""
-                        parent = link.parent
-                        if parent:
-                            desc_elem = parent.find('p') or parent.find('div', class_=re.compile(r'desc|summary|excerpt'))
-                            if desc_elem:
-                                description = clean_text(desc_elem.get_text())
-
-                        # Basic category detection from URL
-                        category = "news"
-                        if '/politik/' in href:
-                            category = "politik"
-                        elif '/bisnis/' in href or '/ekonomi/' in href:
-                            category = "ekonomi"
-                        elif '/olahraga/' in href:
-                            category = "olahraga"
-                        elif '/hiburan/' in href:
-                            category = "hiburan"
-
-                        articles.append({
-                            'title': title,
-                            'url': href,
-                            'description': description,
-                            'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                            'category': category,
-                            'source': 'Kumparan'
-                        })
-
-                        articles_found += 1
-                        logging.info(f"[Kumparan] Found article: {title[:50]}...")
+                with budget.timed('kumparan'):
+                    response = fetch_page('kumparan', url, headers=headers, timeout=budget.timeout(10))
+                page_articles = HARVESTER.harvest(
+                    response.text, seen, max_articles - articles_found, page_url=url, keyword=search_keyword)
+                articles.extend(page_articles)
+                articles_found += len(page_articles)
+                logging.info(f"[Kumparan] Found {len(page_articles)} articles in {url}")
+                record_page('kumparan', len(page_articles))
 
                 # Small delay between URLs
                 time.sleep(1)
@@ -180,7 +117,7 @@ def scrape_kumparan(keyword="mimika"):
 
     # Remove duplicates
     unique_articles = remove_duplicates(articles)
-    categories = sorted(list(set(a.get('category', 'news') for a in unique_articles)))
+    categories = sorted(list(set(a.category for a in unique_articles)))
 
     return {
         'status': 'success',
@@ -199,4 +136,4 @@ def scrape_kumparan(keyword="mimika"):
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
     result = scrape_kumparan()
-    print(json.dumps(result, indent=2))
+    print(json.dumps(result, indent=2, default=ScrapedArticle.to_dict))
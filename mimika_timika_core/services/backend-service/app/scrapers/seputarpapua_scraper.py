@@ -3,8 +3,6 @@ SeputarPapua News Scraper
 Scrapes news from seputarpapua.com
 """
 
-import requests
-from bs4 import BeautifulSoup
 import time
 import logging
 import sys
@@ -17,43 +15,68 @@ import json
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
-    from ..utils.helpers import clean_text, extract_date, log_site_status, remove_duplicates
+    from ..utils.helpers import (
+        clean_text, clean_texts, log_site_status, parse_date, is_junk, keyword_list
+    )
+    from ..utils.date_parser import format_date
+    from ..utils.records import ScrapedArticle
+    from ..utils.fetch import fetch_page, parse_html, class_strainer
+    from ..utils.structured_data import extract_structured
+    from ..utils.metrics import record_page
+    from ..utils.budget import ScrapeBudget, SCRAPE_PAGES_LIMIT
 except ImportError:
-    # Fallback implementations for standalone testing
-    def clean_text(text):
-        if not text:
-            return ""
-        text = re.sub(r'\s+', ' ', text.strip())
-        text = re.sub(r'<[^>]+>', '', text)
-        return text
+    # Standalone run: the app/ directory is on sys.path, so import the same helpers directly
+    from utils.helpers import (
+        clean_text, clean_texts, log_site_status, parse_date, is_junk, keyword_list
+    )
+    from utils.date_parser import format_date
+    from utils.records import ScrapedArticle
+    from utils.fetch import fetch_page, parse_html, class_strainer
+    from utils.structured_data import extract_structured
+    from utils.metrics import record_page
+    from utils.budget import ScrapeBudget, SCRAPE_PAGES_LIMIT
 
-    def extract_date(date_text):
-        # Basic fallback
-        try:
-             # Try to parse specific format if known, else return now
-             # Example: "Selasa, 21 Januari 2026 10:00"
-             return datetime.now()
-        except:
-            return datetime.now()
+# Only the results widget (or the bare article cards) is read from a search page
+RESULTS_ONLY = class_strainer('div', 'widget-content', 'article-item')
+
+def parse_article_details(markup, url):
+    """
+    Date and image of an article page. The page's JSON-LD / OpenGraph data is
+    read first; the HTML is only parsed for the date selectors when it
+    declares no date. 'date_obj' is None (and 'date' empty) when neither has one.
+    """
+    # Strategy 1: JSON-LD datePublished or the article:published_time meta tag
+    # (ISO format usually: 2024-01-21T10:00:00+07:00)
+    structured = extract_structured(markup, base_url=url)
+    date_obj = parse_date(structured.published, source='seputarpapua')
 
-    def log_site_status(site, status, error=None):
-        if status == "OK":
-            logging.info(f"[{site}] Scraping completed successfully")
-        else:
-            logging.error(f"[{site}] Scraping failed: {error}")
+    # Strategy 2: Look for visible date element
+    if date_obj is None:
+        soup = parse_html('seputarpapua', markup)
 
-    def remove_duplicates(articles):
-        seen = set()
-        unique = []
-        for a in articles:
-            if a['url'] not in seen:
-                seen.add(a['url'])
-                unique.append(a)
-        return unique
+        # Common class names in WP/News themes
+        date_selectors = [
+             'div.date', 'span.date', 'div.post-date', 'span.post-date',
+             'div.entry-date', 'span.entry-date', 'time', '.article-date'
+        ]
 
-def get_article_details(url):
+        for selector in date_selectors:
+            elem = soup.select_one(selector)
+            if elem:
+                date_obj = parse_date(elem.get('datetime') or clean_text(elem.get_text()), source='seputarpapua')
+                if date_obj:
+                    break
+
+    return {
+        'date': format_date(date_obj) if date_obj else "",
+        'date_obj': date_obj,
+        'image': structured.image
+    }
+
+def get_article_details(url, timeout=10):
     """
     Fetch article details to get the date and potentially better image/content
+    (see parse_article_details).
     """
     try:
         headers = {
@@ -63,70 +86,101 @@ def get_article_details(url):
         # Add delay
         time.sleep(1)
         
-        response = requests.get(url, headers=headers, timeout=10)
-        if response.status_code != 200:
-            return None
-            
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Try to find date
-        # Common selectors for SeputarPapua based on typical structure (inspector needs validation if available)
-        # Based on user description, it appears on detail page.
-        # Possible candidates: .date, .post-date, time, meta properties
-        
-        date_obj = datetime.now()
-        date_found = False
-        
-        # Strategy 1: Look for date metadata (often most reliable)
-        meta_date = soup.find('meta', property='article:published_time')
-        if meta_date:
-            try:
-                # ISO format usually: 2024-01-21T10:00:00+07:00
-                date_str = meta_date.get('content')
-                # Parse ISO
-                if date_str:
-                    date_obj = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-                    date_found = True
-            except:
-                pass
-                
-        # Strategy 2: Look for visible date element
-        if not date_found:
-            # Common class names in WP/News themes
-            date_selectors = [
-                 'div.date', 'span.date', 'div.post-date', 'span.post-date', 
-                 'div.entry-date', 'span.entry-date', 'time', '.article-date'
-            ]
-            
-            for selector in date_selectors:
-                elem = soup.select_one(selector)
-                if elem:
-                    try:
-                        extracted = extract_date(clean_text(elem.get_text()))
-                        if extracted:
-                            date_obj = extracted
-                            date_found = True
-                            break
-                    except:
-                        continue
-        
-        return {
-            'date': date_obj.strftime('%Y-%m-%d %H:%M:%S'),
-            'date_obj': date_obj
-        }
+        response = fetch_page('seputarpapua', url, headers=headers, timeout=timeout)
+        return parse_article_details(response.text, url)
 
     except Exception as e:
         logging.warning(f"Error fetching details for {url}: {e}")
         return None
 
-def scrape_seputarpapua(keyword="mimika"):
+def parse_search_card(item):
+    """
+    ScrapedArticle from one div.article-item of a search page, without its
+    date (the card has none); None for junk or incomplete cards.
+    """
+    # 1. Title & URL
+    text_div = item.find('div', class_='article-text')
+    if not text_div:
+        return None
+
+    h3 = text_div.find('h3')
+    if not h3:
+        return None
+
+    link = h3.find('a')
+    if not link:
+        return None
+
+    # Drop menu/legal/gallery cards before the snippet work and the detail-page fetch
+    raw_title = link.get_text()
+    if is_junk(raw_title, link.get('href', '')):
+        return None
+
+    snippet_div = text_div.find('div', class_='snippet')
+    title, description = clean_texts([
+        raw_title,
+        snippet_div.get_text() if snippet_div else "",
+    ])
+
+    # 2. Image
+    image_url = ""
+    img_div = item.find('div', class_='article-image')
+    if img_div:
+        img_tag = img_div.find('img')
+        if img_tag:
+            image_url = img_tag.get('src') or img_tag.get('data-src', '')
+
+    # 3. Category
+    # Can we deduce category from URL or classes?
+    # e.g. https://seputarpapua.com/view/category/title...
+    # Usually URLs might have category. URL structure in screenshot: /view/title-slug.html
+    # (No category in URL). We'll rely on text analysis or generic.
+    return ScrapedArticle(
+        title=title,
+        url=link.get('href', ''),
+        description=description,
+        category="News",
+        source='SeputarPapua',
+        image_url=image_url
+    )
+
+def parse_search_page(content):
+    """Undated ScrapedArticles of one search result page (see parse_search_card)"""
+    # Build only the results subtree
+    soup = parse_html('seputarpapua', content, parse_only=RESULTS_ONLY)
+
+    # Target container: div.widget-content
+    # Each item: div.article-item
+    content_div = soup.find('div', class_='widget-content')
+    if not content_div:
+        # Try finding main container first if structure is nested
+        # main-container -> main-wrapper -> main-content -> widget-content
+        # Just search for article-item directly as they are unique enough
+        page_items = soup.find_all('div', class_='article-item')
+    else:
+        page_items = content_div.find_all('div', class_='article-item')
+
+    cards = []
+    for item in page_items:
+        try:
+            card = parse_search_card(item)
+        except Exception as e:
+            logging.warning(f"[SeputarPapua] Error parsing item: {e}")
+            continue
+        if card is not None:
+            cards.append(card)
+    return cards
+
+def scrape_seputarpapua(keyword="mimika", budget=None):
     """
     Scrape SeputarPapua.com
     User specified URLs:
     - https://seputarpapua.com/?s=mimika&post_type=post
     - https://seputarpapua.com/?s=timika&post_type=post
+    `budget` is the run's ScrapeBudget (utils/budget.py): detail fetches stop when the deadline nears
     """
     articles = []
+    budget = budget or ScrapeBudget.from_env()
     
     try:
         headers = {
@@ -134,115 +188,67 @@ def scrape_seputarpapua(keyword="mimika"):
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
         }
         
-        # Construct URL
+        # One search page per keyword (WordPress ?s= has no OR); the URL check below
+        # keeps an article found by several keywords from being detail-fetched twice
         base_url = "https://seputarpapua.com/"
-        search_url = f"{base_url}?s={keyword}&post_type=post"
-        
-        logging.info(f"[SeputarPapua] Scraping: {search_url}")
-        
-        response = requests.get(search_url, headers=headers, timeout=15)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Target container: div.widget-content
-        # Each item: div.article-item
-        
-        content_div = soup.find('div', class_='widget-content')
-        if not content_div:
-            # Try finding main container first if structure is nested
-            # main-container -> main-wrapper -> main-content -> widget-content
-            # Just search for article-item directly as they are unique enough
-            items = soup.find_all('div', class_='article-item')
-        else:
-            items = content_div.find_all('div', class_='article-item')
+        keywords = keyword_list(keyword)
+        cards = []
+        for search_keyword in keywords:
+            if not budget.allows('seputarpapua'):
+                logging.info(f"[SeputarPapua] Run deadline near, skipping keyword '{search_keyword}'")
+                break
+            search_url = f"{base_url}?s={search_keyword}&post_type=post"
+            
+            logging.info(f"[SeputarPapua] Scraping: {search_url}")
             
-        logging.info(f"[SeputarPapua] Found {len(items)} items")
+            # Parse in the same expression, so the raw page is dropped right after
+            with budget.timed('seputarpapua'):
+                page_cards = parse_search_page(
+                    fetch_page('seputarpapua', search_url, headers=headers, timeout=budget.timeout(15)).text
+                )
+            record_page('seputarpapua', len(page_cards))
+            for card in page_cards:
+                card.search_keyword = search_keyword
+            cards.extend(page_cards)
+            
+        logging.info(f"[SeputarPapua] Found {len(cards)} items")
         
-        count = 0
         count = 0
         
-        # Determine max items based on page limit env var (approx 10 articles per page)
-        custom_limit = os.environ.get('SCRAPE_PAGES_LIMIT')
-        if custom_limit:
-            try:
-                max_items = int(custom_limit) * 10
-                logging.info(f"[SeputarPapua] Using custom limit: {max_items} articles")
-            except ValueError:
-                 max_items = 10
-        else:
-             max_items = 10 # Default limit
+        # Item cap (approx 10 articles per page when SCRAPE_PAGES_LIMIT is set)
+        max_items = SCRAPE_PAGES_LIMIT * 10 if SCRAPE_PAGES_LIMIT else 10
+        # The limit is per keyword, as when each keyword was a separate call
+        max_items *= len(keywords)
         
-        for item in items:
+        seen_urls = set()
+        for card in cards:
             if count >= max_items:
                 break
-                
-            try:
-                # 1. Title & URL
-                text_div = item.find('div', class_='article-text')
-                if not text_div:
-                    continue
-                    
-                h3 = text_div.find('h3')
-                if not h3:
-                    continue
-                    
-                link = h3.find('a')
-                if not link:
-                    continue
-                    
-                title = clean_text(link.get_text())
-                url = link.get('href', '')
-                
-                # Deduplication check in loop (optional but good)
-                if any(a['url'] == url for a in articles):
-                    continue
-                
-                # 2. Image
-                image_url = ""
-                img_div = item.find('div', class_='article-image')
-                if img_div:
-                    img_tag = img_div.find('img')
-                    if img_tag:
-                        image_url = img_tag.get('src') or img_tag.get('data-src', '')
-                
-                # 3. Description
-                description = ""
-                snippet_div = text_div.find('div', class_='snippet')
-                if snippet_div:
-                    description = clean_text(snippet_div.get_text())
-                
-                # 4. Date (Fetch Details)
-                # User Requirement: Date is not in list, must click.
-                logging.info(f"[SeputarPapua] Fetching details for date: {url}")
-                details = get_article_details(url)
-                
-                date_str = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                if details and details.get('date'):
-                    date_str = details['date']
-                
-                # 5. Category
-                # Can we deduce category from URL or classes? 
-                # e.g. https://seputarpapua.com/view/category/title...
-                # Usually URLs might have category. URL structure in screenshot: /view/title-slug.html 
-                # (No category in URL). We'll rely on text analysis or generic.
-                category = "News"
-                
-                articles.append({
-                    'title': title,
-                    'url': url,
-                    'description': description,
-                    'date': date_str,
-                    'category': category,
-                    'source': 'SeputarPapua',
-                    'image_url': image_url
-                })
-                
-                count += 1
-                
-            except Exception as e:
-                logging.warning(f"[SeputarPapua] Error parsing item: {e}")
+
+            # Skip articles already found by another keyword (before the detail fetch)
+            if card.url in seen_urls:
                 continue
+            seen_urls.add(card.url)
+
+            # Date (Fetch Details)
+            # User Requirement: Date is not in list, must click.
+            # Cards left without a date (no time for the detail page, fetch
+            # failed, page declares none) are skipped: they would be stored as published now
+            if not budget.allows('seputarpapua'):
+                logging.info(f"[SeputarPapua] Run deadline near, stopping after {count} articles")
+                break
+            logging.info(f"[SeputarPapua] Fetching details for date: {card.url}")
+            with budget.timed('seputarpapua'):
+                details = get_article_details(card.url, timeout=budget.timeout(10))
+            if not details or details['date_obj'] is None:
+                logging.info(f"[SeputarPapua] No date for {card.url}, skipping")
+                continue
+            card.published_at = details['date_obj']
+            if not card.image_url:
+                card.image_url = details['image'] or None
+
+            articles.append(card)
+            count += 1
                 
         log_site_status("SeputarPapua", "OK")
         
@@ -267,4 +273,4 @@ def scrape_seputarpapua(keyword="mimika"):
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
     # Test
-    print(json.dumps(scrape_seputarpapua(), indent=2))
+    print(json.dumps(scrape_seputarpapua(), indent=2, default=ScrapedArticle.to_dict))
@@ -3,55 +3,52 @@ Tempo.co News Scraper
 Simplified scraper for Tempo.co news
 """
 
-import requests
-from bs4 import BeautifulSoup
 import time
 import random
 import logging
 import sys
 import os
 from datetime import datetime
-import re
 import json
 
 # Add parent directory to path for imports when running standalone
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
-    from ..utils.helpers import clean_text, extract_date, log_site_status, remove_duplicates
+    from ..utils.helpers import log_site_status, remove_duplicates, keyword_list
+    from ..utils.records import ScrapedArticle
+    from ..utils.link_harvest import LinkHarvester
+    from ..utils.fetch import fetch_page
+    from ..utils.metrics import record_page
+    from ..utils.budget import ScrapeBudget, SCRAPE_PAGES_LIMIT
 except ImportError:
-    # Fallback implementations for standalone testing
-    def clean_text(text):
-        if not text:
-            return ""
-        text = re.sub(r'\s+', ' ', text.strip())
-        text = re.sub(r'<[^>]+>', '', text)
-        return text
-
-    def extract_date(date_text):
-        return datetime.now()
-
-    def log_site_status(site, status, error=None):
-        if status == "OK":
-            logging.info(f"[{site}] Scraping completed successfully")
-        else:
-            logging.error(f"[{site}] Scraping failed: {error}")
-
-    def remove_duplicates(articles):
-        seen = set()
-        unique = []
-        for a in articles:
-            if a['url'] not in seen:
-                seen.add(a['url'])
-                unique.append(a)
-        return unique
-
-def scrape_tempo(keyword="mimika"):
+    # Standalone run: the app/ directory is on sys.path, so import the same helpers directly
+    from utils.helpers import log_site_status, remove_duplicates, keyword_list
+    from utils.records import ScrapedArticle
+    from utils.link_harvest import LinkHarvester
+    from utils.fetch import fetch_page
+    from utils.metrics import record_page
+    from utils.budget import ScrapeBudget, SCRAPE_PAGES_LIMIT
+
+HARVESTER = LinkHarvester(
+    'tempo', 'Tempo', "https://www.tempo.co",
+    article_pattern=r'tempo\.co/(?:.*/)?(?:berita|read|view)/',
+    containers=('main',),
+    categories=(
+        ('/nasional/', 'nasional'), ('/bisnis/', 'ekonomi'), ('/ekonomi/', 'ekonomi'),
+        ('/olahraga/', 'olahraga'), ('/sport/', 'olahraga'), ('/metropolitan/', 'metropolitan'),
+    ),
+    description_class=r'desc|summary|excerpt|teaser',
+)
+
+def scrape_tempo(keyword="mimika", budget=None):
     """
     Simplified Tempo.co scraper with keyword search
+    `budget` is the run's ScrapeBudget (utils/budget.py): pages stop when the deadline nears
     Returns dict with success status and minimal article data
     """
     articles = []
+    budget = budget or ScrapeBudget.from_env()
 
     try:
         # Simple headers
@@ -64,98 +61,41 @@ def scrape_tempo(keyword="mimika"):
         }
 
         # Try to get latest news from Tempo
+        # One search page per keyword (no OR syntax); overlapping hits are skipped by URL below
         urls_to_try = [
-            f"https://www.tempo.co/search?q={keyword}"
+            (search_keyword, f"https://www.tempo.co/search?q={search_keyword}")
+            for search_keyword in keyword_list(keyword)
         ]
 
         articles_found = 0
         articles_found = 0
         
-        # Determine max articles based on page limit env var (approx 10 articles per page)
-        custom_limit = os.environ.get('SCRAPE_PAGES_LIMIT')
-        if custom_limit:
-            try:
-                max_articles = int(custom_limit) * 10
-                logging.info(f"[Tempo] Using custom limit: {max_articles} articles")
-            except ValueError:
-                max_articles = 5
-        else:
-            max_articles = 5  # Default limit
-
-        for url in urls_to_try:
+        # Article cap (approx 10 articles per page when SCRAPE_PAGES_LIMIT is set)
+        max_articles = SCRAPE_PAGES_LIMIT * 10 if SCRAPE_PAGES_LIMIT else 5
+
+        # The limit is per keyword, as when each keyword was a separate call
+        max_articles *= len(urls_to_try)
+
+        # URLs already collected, shared by all search pages
+        seen = set()
+        for search_keyword, url in urls_to_try:
             if articles_found >= max_articles:
                 break
+            # Room for the page and the delay after it
+            if not budget.allows('tempo', extra=1):
+                logging.info(f"[Tempo] Run deadline near, not fetching {url}")
+                break
 
             try:
                 logging.info(f"[Tempo] Trying Tempo URL: {url}")
-                response = requests.get(url, headers=headers, timeout=10)
-                response.raise_for_status()
-
-                soup = BeautifulSoup(response.text, 'html.parser')
-
-                # Look for article links
-                article_links = soup.find_all('a', href=True)
-
-                for link in article_links:
-                    if articles_found >= max_articles:
-                        break
-
-                    href = link.get('href', '')
-
-                    # Check if it's a Tempo article
-                    if 'tempo.co' in href and ('/berita/' in href or '/read/' in href or '/view/' in href):
-                        # Skip if already processed
-                        if any(article['url'] == href for article in articles):
-                            continue
-
-                        # Make URL absolute
-                        if href.startswith('/'):
-                            href = f"https://www.tempo.co{href}"
-                        elif not href.startswith('http'):
-                            continue
-
-                        # Get title from link or nearby elements
-                        title = ""
-                        title_elem = link.find('h1') or link.find('h2') or link.find('h3') or link.find('h4')
-                        if title_elem:
-                            title = clean_text(title_elem.get_text())
-                        else:
-                            title = clean_text(link.get_text())
-
-                        # Skip if title is too short or empty
-                        if len(title) < 10:
-                            continue
-
-                        # Try to get description from nearby elements
-                        description = ""
-                        parent = link.parent
-                        if parent:
-                            desc_elem = parent.find('p') or parent.find('div', class_=re.compile(r'desc|summary|excerpt|teaser'))
-                            if desc_elem:
-                                description = clean_text(desc_elem.get_text())
-
-                        # Basic category detection from URL
-                        category = "news"
-                        if '/nasional/' in href:
-                            category = "nasional"
-                        elif '/bisnis/' in href or '/ekonomi/' in href:
-                            category = "ekonomi"
-                        elif '/olahraga/' in href or '/sport/' in href:
-                            category = "olahraga"
-                        elif '/metropolitan/' in href:
-                            category = "metropolitan"
-
-                        articles.append({
-                            'title': title,
-                            'url': href,
-                            'description': description,
-                            'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                            'category': category,
-                            'source': 'Tempo'
-                        })
-
-                        articles_found += 1
-                        logging.info(f"[Tempo] Found article: {title[:50]}...")
+                with budget.timed('tempo'):
+                    response = fetch_page('tempo', url, headers=headers, timeout=budget.timeout(10))
+                page_articles = HARVESTER.harvest(
+                    response.text, seen, max_articles - articles_found, page_url=url, keyword=search_keyword)
+                articles.extend(page_articles)
+                articles_found += len(page_articles)
+                logging.info(f"[Tempo] Found {len(page_articles)} articles in {url}")
+                record_page('tempo', len(page_articles))
 
                 # Small delay between URLs
                 time.sleep(1)
@@ -177,7 +117,7 @@ def scrape_tempo(keyword="mimika"):
 
     # Remove duplicates
     unique_articles = remove_duplicates(articles)
-    categories = sorted(list(set(a.get('category', 'news') for a in unique_articles)))
+    categories = sorted(list(set(a.category for a in unique_articles)))
 
     return {
         'status': 'success',
@@ -196,4 +136,4 @@ def scrape_tempo(keyword="mimika"):
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
     result = scrape_tempo()
-    print(json.dumps(result, indent=2))
\ No newline at end of file
+    print(json.dumps(result, indent=2, default=ScrapedArticle.to_dict))
\ No newline at end of file
@@ -0,0 +1,326 @@
+"""
+Resumable historical backfill.
+
+The regular runs read the first few result pages of each site, so older
+coverage never reaches the database. A BackfillJob (models.py) walks one
+site's search pagination for one keyword as deep as its date window goes:
+
+- pages are fetched under the per-host rate limit (utils/fetch.py), spaced
+  BACKFILL_HOST_INTERVAL seconds apart, and the crawler waits while a live
+  scrape runs in this process (scraper_engine.live_run_active)
+- articles are ingested every BACKFILL_BATCH_SIZE articles, and the job's
+  next_page is committed in the same transaction; after a crash the job
+  resumes after its last ingested page, re-fetching at most one batch
+  (ingest upserts, so that is harmless)
+- run_backfill() works for a bounded slice of time and hands unfinished
+  jobs back as pending, which keeps the scheduler job (main.py) a
+  low-priority background task; scripts/backfill.py creates jobs and can
+  run them to completion
+- a running job whose checkpoint is older than BACKFILL_STALE_MINUTES
+  belonged to a process that died and is claimed again
+- a site whose circuit breaker is open (utils/circuit.py) ends the job's
+  slice without counting an error; the job waits for the cool-down
+
+Results are newest first, so a page whose dated articles all predate the
+window ends the job. Detik also filters by date on its side. Articles
+without a date are dropped: they would be stored as published now.
+Only the sites with deep pagination are supported (SOURCES); the others
+return a single search page.
+
+Settings (environment):
+  BACKFILL_ENABLED           run the scheduler job (default 1; 0 on Vercel)
+  BACKFILL_INTERVAL_MINUTES  minutes between scheduler slices (default 10)
+  BACKFILL_SLICE_SECONDS     work per slice (default 300)
+  BACKFILL_HOST_INTERVAL     seconds between backfill requests to one host (default 5)
+  BACKFILL_BATCH_SIZE        articles per ingest batch (default 50)
+  BACKFILL_MAX_PAGES         page cap of jobs created without one (default 500)
+  BACKFILL_MAX_ERRORS        consecutive failed pages before a job fails (default 5)
+  BACKFILL_STALE_MINUTES     age of a running job's checkpoint before it is reclaimed (default 30)
+"""
+
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import and_, or_
+
+from .. import models, database
+from ..scrapers import antara_scraper, kompas_scraper, detik_scraper
+from ..utils.fetch import fetch_page
+from ..utils.circuit import CircuitOpenError
+from ..utils.helpers import remove_duplicates, is_junk
+from ..utils.regions import assign_regions
+from .ingest import ingest_articles
+from .scraper_engine import live_run_active
+from .source_health import load_health, save_health
+
+logger = logging.getLogger(__name__)
+
+_IS_VERCEL = os.environ.get('VERCEL') == '1' or os.environ.get('VERCEL_ENV') is not None
+BACKFILL_ENABLED = os.getenv("BACKFILL_ENABLED", "0" if _IS_VERCEL else "1").lower() in ('1', 'true', 'yes', 'on')
+BACKFILL_INTERVAL_MINUTES = int(os.getenv("BACKFILL_INTERVAL_MINUTES", "10"))
+BACKFILL_SLICE_SECONDS = float(os.getenv("BACKFILL_SLICE_SECONDS", "300"))
+BACKFILL_HOST_INTERVAL = float(os.getenv("BACKFILL_HOST_INTERVAL", "5"))
+BACKFILL_BATCH_SIZE = int(os.getenv("BACKFILL_BATCH_SIZE", "50"))
+BACKFILL_MAX_PAGES = int(os.getenv("BACKFILL_MAX_PAGES", "500"))
+BACKFILL_MAX_ERRORS = int(os.getenv("BACKFILL_MAX_ERRORS", "5"))
+BACKFILL_STALE_MINUTES = int(os.getenv("BACKFILL_STALE_MINUTES", "30"))
+
+# How long to wait between checks while a live scrape runs
+LIVE_RUN_POLL_SECONDS = 5
+
+class BackfillSource:
+    """
+    How to page through one site's search: url(job, page) and
+    parse(content, keyword, page) -> (articles, has_more).
+    """
+
+    __slots__ = ('url', 'parse', 'headers')
+
+    def __init__(self, url: Callable, parse: Callable, headers: dict):
+        self.url = url
+        self.parse = parse
+        self.headers = headers
+
+def _antara_page(content, keyword, page):
+    result = antara_scraper.parse_search_page(content, (keyword, page))
+    return result if result is not None else ([], False)
+
+def _kompas_page(content, keyword, page):
+    articles = kompas_scraper.parse_search_page(content, page) or []
+    return articles, bool(articles)
+
+def _detik_page(content, keyword, page):
+    articles = detik_scraper.parse_search_page(content, page)
+    return articles, bool(articles)
+
+def _detik_url(job, page):
+    # Detik's range is inclusive days; the window end is exclusive
+    until = (job.until - timedelta(microseconds=1)).date() if job.until else None
+    return detik_scraper.search_url(job.keyword, page, job.since.date() if job.since else None, until)
+
+SOURCES = {
+    'antara': BackfillSource(
+        lambda job, page: antara_scraper.search_url(job.keyword, page), _antara_page, antara_scraper.HEADERS),
+    'kompas': BackfillSource(
+        lambda job, page: kompas_scraper.search_url(job.keyword, page), _kompas_page, kompas_scraper.HEADERS),
+    'detik': BackfillSource(_detik_url, _detik_page, detik_scraper.HEADERS),
+}
+
+def _naive_utc(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def create_job(db, site: str, keyword: str, since: Optional[datetime] = None,
+               until: Optional[datetime] = None, max_pages: Optional[int] = None):
+    """
+    Queue a backfill of `site` for `keyword` over [since, until). Naive values
+    are UTC; aware ones are converted, so the job stores naive UTC either way.
+    """
+    if site not in SOURCES:
+        raise ValueError(f"Backfill is not supported for {site!r} (supported: {', '.join(SOURCES)})")
+    if since is not None and since.tzinfo is not None:
+        since = _naive_utc(since)
+    if until is not None and until.tzinfo is not None:
+        until = _naive_utc(until)
+    if since is not None and until is not None and since >= until:
+        raise ValueError("since must be before until")
+    now = datetime.utcnow()
+    job = models.BackfillJob(
+        site=site,
+        keyword=keyword,
+        since=since,
+        until=until,
+        max_pages=max_pages or BACKFILL_MAX_PAGES,
+        status='pending',
+        next_page=1,
+        pages_fetched=0,
+        articles_found=0,
+        articles_saved=0,
+        articles_updated=0,
+        errors=0,
+        created_at=now,
+        updated_at=now,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+def claim_job(db, job_id: Optional[int] = None, exclude=()):
+    """
+    Take the oldest pending job (or a running one whose process died) and mark
+    it running. The conditional UPDATE makes the claim safe across processes.
+    """
+    now = datetime.utcnow()
+    stale = now - timedelta(minutes=BACKFILL_STALE_MINUTES)
+    Job = models.BackfillJob
+    query = db.query(Job).filter(or_(
+        Job.status == 'pending',
+        and_(Job.status == 'running', Job.updated_at < stale),
+    ))
+    if job_id is not None:
+        query = query.filter(Job.id == job_id)
+    if exclude:
+        query = query.filter(Job.id.notin_(list(exclude)))
+    for job in query.order_by(Job.id).limit(10).all():
+        claimed = (
+            db.query(Job)
+            .filter(Job.id == job.id, Job.status == job.status, Job.updated_at == job.updated_at)
+            .update({'status': 'running', 'updated_at': now}, synchronize_session=False)
+        )
+        db.commit()
+        if claimed:
+            db.refresh(job)
+            return job
+    return None
+
+def _wait_for_live_runs(deadline: float) -> bool:
+    """Wait while a live scrape runs; False when the slice ran out meanwhile"""
+    while live_run_active():
+        if time.monotonic() + LIVE_RUN_POLL_SECONDS >= deadline:
+            return False
+        time.sleep(LIVE_RUN_POLL_SECONDS)
+    return True
+
+def _checkpoint(db, job, batch: List, next_page: int):
+    """Ingest `batch` and move the job to `next_page` in one commit"""
+    job.next_page = next_page
+    job.updated_at = datetime.utcnow()
+    if not batch:
+        db.commit()
+        return
+    articles = remove_duplicates(batch)
+    assign_regions(articles)
+    # ingest_articles commits, taking the job's checkpoint along
+    result = ingest_articles(db, articles)
+    job.articles_found += len(articles)
+    job.articles_saved += result['saved']
+    job.articles_updated += result['updated']
+    db.commit()
+
+def run_job_slice(db, job, deadline: float):
+    """
+    Crawl `job` from its checkpoint until it is done, fails or `deadline`
+    (time.monotonic()) passes; an unfinished job goes back to pending.
+    """
+    source = SOURCES[job.site]
+    max_pages = job.max_pages or BACKFILL_MAX_PAGES
+    batch = []
+    page = job.next_page
+    status = 'pending'
+    logger.info(f"[backfill {job.id}] {job.site} '{job.keyword}' from page {page}")
+
+    while True:
+        if page > max_pages:
+            status = 'done'
+            break
+        if time.monotonic() >= deadline or not _wait_for_live_runs(deadline):
+            break
+        try:
+            response = fetch_page(
+                job.site, source.url(job, page), headers=source.headers, timeout=20, retries=2,
+                min_interval=BACKFILL_HOST_INTERVAL,
+            )
+            articles, has_more = source.parse(response.content, job.keyword, page)
+        except CircuitOpenError as e:
+            job.error = str(e)
+            logger.info(f"[backfill {job.id}] {e}, pausing the job")
+            break
+        except Exception as e:
+            job.errors += 1
+            job.error = f"page {page}: {e}"
+            logger.warning(f"[backfill {job.id}] {job.site} page {page} failed ({job.errors}/{BACKFILL_MAX_ERRORS}): {e}")
+            if job.errors >= BACKFILL_MAX_ERRORS:
+                status = 'failed'
+            # Otherwise the page is retried in the next slice
+            break
+
+        job.errors = 0
+        job.pages_fetched += 1
+        page += 1
+        dated = [_naive_utc(a.published_at) for a in articles if a.published_at is not None]
+        for article in articles:
+            # Undated pages would be stored as published now (ScrapedArticle.to_row)
+            if article.published_at is None or is_junk(article.title, article.url):
+                continue
+            published = _naive_utc(article.published_at)
+            if (job.since is not None and published < job.since) or (job.until is not None and published >= job.until):
+                continue
+            batch.append(article)
+
+        if not has_more or (job.since is not None and dated and max(dated) < job.since):
+            status = 'done'
+            break
+        if len(batch) >= BACKFILL_BATCH_SIZE:
+            _checkpoint(db, job, batch, page)
+            batch = []
+
+    job.status = status
+    if status == 'done':
+        job.finished_at = datetime.utcnow()
+        job.error = None
+    _checkpoint(db, job, batch, page)
+    logger.info(
+        f"[backfill {job.id}] {job.site} {status} at page {page}: "
+        f"{job.articles_saved} saved, {job.articles_updated} updated"
+    )
+
+def run_backfill(max_seconds: Optional[float] = BACKFILL_SLICE_SECONDS, job_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Work through queued jobs (or only `job_id`) for up to `max_seconds`
+    (None: until none is left). A job that stopped on a failed page is not
+    retried in the same call. Returns the jobs worked on.
+    """
+    deadline = time.monotonic() + max_seconds if max_seconds is not None else float('inf')
+    db = database.SessionLocal()
+    worked = {}
+    load_health(db, SOURCES)
+    try:
+        while time.monotonic() < deadline:
+            job = claim_job(db, job_id, exclude=[id for id, job in worked.items() if job['status'] != 'done'])
+            if job is None:
+                break
+            try:
+                run_job_slice(db, job, deadline)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"[backfill {job.id}] Slice failed: {e}")
+                job.status = 'pending'
+                job.error = str(e)
+                job.updated_at = datetime.utcnow()
+                db.commit()
+            worked[job.id] = job_to_dict(job)
+        save_health(db, SOURCES)
+    finally:
+        db.close()
+    return list(worked.values())
+
+def job_to_dict(job) -> Dict[str, Any]:
+    return {
+        'id': job.id,
+        'site': job.site,
+        'keyword': job.keyword,
+        'since': job.since,
+        'until': job.until,
+        'max_pages': job.max_pages,
+        'status': job.status,
+        'next_page': job.next_page,
+        'pages_fetched': job.pages_fetched,
+        'articles_found': job.articles_found,
+        'articles_saved': job.articles_saved,
+        'articles_updated': job.articles_updated,
+        'errors': job.errors,
+        'created_at': job.created_at,
+        'updated_at': job.updated_at,
+        'finished_at': job.finished_at,
+        'error': job.error,
+    }
+
+def list_jobs(db, limit: int = 50, status: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Newest jobs first"""
+    query = db.query(models.BackfillJob)
+    if status:
+        query = query.filter(models.BackfillJob.status == status)
+    return [job_to_dict(job) for job in query.order_by(models.BackfillJob.id.desc()).limit(limit)]
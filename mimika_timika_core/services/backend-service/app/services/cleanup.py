@@ -0,0 +1,71 @@
+"""
+Junk article cleanup shared by /maintenance/cleanup-junk and scripts/cleanup_junk.py.
+
+One keyset-paginated pass over (id, title, source_url) matched against
+CLEANUP_RE, instead of a leading-wildcard ILIKE scan per keyword. Junk ids
+are deleted per page and committed right away, so no single transaction
+holds locks on a large part of the table.
+
+What is deleted is what the ILIKE scans deleted: a JUNK_KEYWORDS entry as
+a case-insensitive substring of the title, and of the URL only when asked
+(the script did, the endpoint did not). This is deliberately narrower than
+helpers.is_junk(), whose URL slug matching only guards new articles.
+"""
+
+import logging
+import re
+
+from .. import models
+from ..utils.helpers import JUNK_KEYWORDS
+from .ingest_versions import bump_versions
+
+# Rows read per keyset page; also bounds the size of each DELETE ... WHERE id IN (...)
+CLEANUP_BATCH_SIZE = 500
+
+# Each keyword as a literal substring, as ILIKE '%keyword%' matched it
+CLEANUP_RE = re.compile('|'.join(re.escape(keyword) for keyword in JUNK_KEYWORDS), re.IGNORECASE)
+
+logger = logging.getLogger(__name__)
+
+def _is_junk_row(row, match_urls: bool) -> bool:
+    return bool(CLEANUP_RE.search(row.title or "") or (match_urls and CLEANUP_RE.search(row.source_url or "")))
+
+def find_junk(db, batch_size=CLEANUP_BATCH_SIZE, match_urls=False):
+    """Yield lists of (id, region) for junk rows, one list per keyset page"""
+    Article = models.Article
+    last_id = 0
+    while True:
+        rows = (
+            db.query(Article.id, Article.title, Article.source_url, Article.region)
+            .filter(Article.id > last_id)
+            .order_by(Article.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        last_id = rows[-1].id
+        yield [(row.id, row.region) for row in rows if _is_junk_row(row, match_urls)]
+
+def cleanup_junk(db, batch_size=CLEANUP_BATCH_SIZE, dry_run=False, match_urls=False):
+    """
+    Delete articles whose title (or, with match_urls, URL) contains a JUNK_KEYWORDS entry.
+    Returns {'scanned_batches': int, 'deleted': int} ('deleted' counts matches when dry_run).
+    """
+    Article = models.Article
+    deleted = 0
+    batches = 0
+    for junk in find_junk(db, batch_size, match_urls):
+        batches += 1
+        if not junk:
+            continue
+        if dry_run:
+            deleted += len(junk)
+            continue
+        ids = [article_id for article_id, _ in junk]
+        deleted += db.query(Article).filter(Article.id.in_(ids)).delete(synchronize_session=False)
+        bump_versions(db, {region or "general" for _, region in junk})
+        db.commit()
+    if deleted:
+        logger.info(f"Junk cleanup {'matched' if dry_run else 'deleted'} {deleted} articles")
+    return {'scanned_batches': batches, 'deleted': deleted}
@@ -0,0 +1,135 @@
+"""
+Ingest scraped articles into the database.
+Shared by /ingest/run, the scheduler job and scripts/manual_ingest.py.
+"""
+
+import logging
+
+from .. import models, database
+from ..utils.helpers import url_hash, validate_source, is_junk
+from ..utils.records import ScrapedArticle
+from ..utils.metrics import INGEST_ARTICLES
+from .ingest_versions import bump_versions
+
+# Keep IN (...) lists below SQLite's bound-parameter limit
+LOOKUP_BATCH_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+def find_existing_by_hash(db, hashes):
+    """Return {url_hash: Article} for the hashes already stored"""
+    hashes = list(hashes)
+    found = {}
+    for i in range(0, len(hashes), LOOKUP_BATCH_SIZE):
+        batch = hashes[i:i + LOOKUP_BATCH_SIZE]
+        for row in db.query(models.Article).filter(models.Article.url_hash.in_(batch)):
+            found[row.url_hash] = row
+    return found
+
+def ingest_articles(db, articles):
+    """
+    Upsert ScrapedArticle records (legacy dicts are converted) keyed on the URL hash.
+    Junk pages (helpers.is_junk) are skipped.
+    New articles are inserted; existing ones get a missing image or a generic category filled in.
+    Bumps the ingest version of every region that changed.
+    Returns {'saved': int, 'updated': int, 'by_source': {source: {'saved', 'updated'}}}.
+    """
+    records = []
+    rejected_count = 0
+    for article in articles:
+        if isinstance(article, dict):
+            article = ScrapedArticle.from_dict(article)
+        # Validate source and drop non-article pages (same JUNK_KEYWORDS as the cleanup)
+        if validate_source(article.url) and not is_junk(article.title, article.url):
+            records.append(article)
+        else:
+            rejected_count += 1
+
+    existing_by_hash = find_existing_by_hash(db, {article.url_hash for article in records})
+    saved_count = 0
+    updated_count = 0
+    changed_regions = set()
+    by_source = {}
+
+    for article in records:
+        existing = existing_by_hash.get(article.url_hash)
+        if existing is not None:
+            updated = False
+            # Update image if missing and we found one
+            if not existing.image_url and article.image_url:
+                existing.image_url = article.image_url
+                updated = True
+            # Update category if it was generic and we have a better one
+            if existing.category in ["news", "News"] and article.category != "Nasional":
+                existing.category = article.category
+                updated = True
+            if updated:
+                db.add(existing)
+                changed_regions.add(existing.region or "general")
+                updated_count += 1
+                by_source.setdefault(article.source, {'saved': 0, 'updated': 0})['updated'] += 1
+            continue
+
+        new_article = models.Article(**article.to_row())
+        db.add(new_article)
+        # Guard against the same article appearing twice in one batch
+        existing_by_hash[article.url_hash] = new_article
+        changed_regions.add(new_article.region)
+        saved_count += 1
+        by_source.setdefault(article.source, {'saved': 0, 'updated': 0})['saved'] += 1
+
+    if changed_regions:
+        bump_versions(db, changed_regions)
+    db.commit()
+
+    INGEST_ARTICLES.labels('inserted').inc(saved_count)
+    INGEST_ARTICLES.labels('updated').inc(updated_count)
+    INGEST_ARTICLES.labels('unchanged').inc(len(records) - saved_count - updated_count)
+    INGEST_ARTICLES.labels('rejected').inc(rejected_count)
+    return {'saved': saved_count, 'updated': updated_count, 'by_source': by_source}
+
+def backfill_url_hashes(db, batch_size=1000):
+    """
+    Fill url_hash for rows stored before the column existed.
+    Rows whose canonical URL collides with an already-hashed row are left NULL
+    (they are duplicates; the unique index still allows multiple NULLs).
+    Returns the number of rows updated.
+    """
+    seen = {
+        key for (key,) in db.query(models.Article.url_hash).filter(models.Article.url_hash.isnot(None))
+    }
+    updated = 0
+    last_id = 0
+    while True:
+        rows = (
+            db.query(models.Article)
+            .filter(models.Article.url_hash.is_(None), models.Article.id > last_id)
+            .order_by(models.Article.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        for row in rows:
+            last_id = row.id
+            key = url_hash(row.source_url or '')
+            if key in seen:
+                continue
+            seen.add(key)
+            row.url_hash = key
+            updated += 1
+        db.commit()
+    return updated
+
+def migrate_url_hash():
+    """Add, backfill and index articles.url_hash on databases created before it existed"""
+    table = models.Article.__table__
+    database.ensure_columns(table, {"url_hash": "VARCHAR(40)"})
+    db = database.SessionLocal()
+    try:
+        updated = backfill_url_hashes(db)
+        if updated:
+            logger.info(f"Backfilled url_hash for {updated} articles")
+    finally:
+        db.close()
+    database.ensure_indexes(table)
@@ -0,0 +1,59 @@
+"""
+Per-region "last ingest" versions.
+
+Every write that changes which articles a region serves (ingest, POST /articles,
+junk cleanup) bumps the version of the regions it touched in the same transaction.
+The article endpoints turn those versions into ETag / Last-Modified, so a poll
+with a matching If-None-Match is answered with one primary-key lookup instead of
+the article query.
+"""
+
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+
+from .. import models
+
+# Stored regions each API region reads (main.get_articles filters on these)
+READ_REGIONS = {
+    "mimika": ("mimika", "both", "general"),
+    "timika": ("timika", "both", "general"),
+    None: ("general",),
+}
+ALL_REGIONS = ("mimika", "timika", "both", "general")
+
+def regions_for(effective_region: Optional[str]) -> Tuple[str, ...]:
+    """Stored regions behind /articles?region=... (any other region reads itself and 'general')"""
+    return READ_REGIONS.get(effective_region, (effective_region, "general"))
+
+def bump_versions(db, regions: Iterable[str]):
+    """
+    Increment the version of each region. Does not commit: call it before the
+    commit of the write it describes so both land together.
+    """
+    now = datetime.utcnow()
+    for region in set(regions):
+        updated = (
+            db.query(models.IngestVersion)
+            .filter(models.IngestVersion.region == region)
+            .update(
+                {models.IngestVersion.version: models.IngestVersion.version + 1,
+                 models.IngestVersion.updated_at: now},
+                synchronize_session=False,
+            )
+        )
+        if not updated:
+            db.add(models.IngestVersion(region=region, version=1, updated_at=now))
+
+def get_versions(db, regions: Iterable[str]) -> Tuple[Tuple[int, ...], Optional[datetime]]:
+    """
+    Return (versions in `regions` order, latest updated_at as naive UTC).
+    Regions that were never ingested count as version 0.
+    """
+    regions = tuple(regions)
+    rows = {
+        row.region: row
+        for row in db.query(models.IngestVersion).filter(models.IngestVersion.region.in_(regions))
+    }
+    versions = tuple(rows[r].version if r in rows else 0 for r in regions)
+    last_modified = max((row.updated_at for row in rows.values()), default=None)
+    return versions, last_modified
@@ -0,0 +1,135 @@
+"""
+Offline re-parse of the page archive (utils/page_archive.py).
+
+reparse_archive() runs the current parsers over archived search pages and
+feeds, without network: each page is matched by URL to its site's parser
+(PAGE_PARSERS / FEEDS); other pages are article pages, used only to date
+SeputarPapua's search cards the way its scraper's detail fetch does.
+scripts/reparse.py ingests the result; the per-site page counts and parse
+times make it a parse benchmark over real pages as well.
+"""
+
+import logging
+import re
+import sys
+import time
+from typing import Dict, Iterable, Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from ..scrapers import antara_scraper, kompas_scraper, detik_scraper, seputarpapua_scraper
+from ..scrapers.cnn_scraper import HARVESTER as CNN_HARVESTER
+from ..scrapers.tempo_scraper import HARVESTER as TEMPO_HARVESTER
+from ..scrapers.kumparan_scraper import HARVESTER as KUMPARAN_HARVESTER
+from ..scrapers.feed_scraper import FEEDS, parse_feed, match_entries
+from ..utils.helpers import remove_duplicates, is_junk
+from ..utils.page_archive import iter_pages
+from ..utils.regions import SEARCH_KEYWORDS, assign_regions
+
+logger = logging.getLogger(__name__)
+
+def _query(url: str) -> dict:
+    return {name: values[0] for name, values in parse_qs(urlsplit(url).query).items()}
+
+def _antara(page, details):
+    query = _query(page.url)
+    page_number = int(query.get('page', '1')) if query.get('page', '1').isdigit() else 1
+    result = antara_scraper.parse_search_page(page.content, (query.get('q', ''), page_number))
+    return result[0] if result else []
+
+def _kompas(page, details):
+    return kompas_scraper.parse_search_page(page.content, None) or []
+
+def _detik(page, details):
+    return detik_scraper.parse_search_page(page.content, None)
+
+def _query_term(name):
+    """Search term of a results URL from its query parameter `name`"""
+    return lambda url: _query(url).get(name)
+
+def _path_term(url):
+    """Search term of a /search/<term> results URL"""
+    return unquote(urlsplit(url).path.rstrip('/').rsplit('/', 1)[-1])
+
+def _harvester(harvester, search_term):
+    """Parser of a LinkHarvester site; `search_term(url)` is the page's keyword"""
+    def parse(page, details):
+        # No per-run limit offline: every article on the page
+        return harvester.harvest(page.text, set(), sys.maxsize, page_url=page.url, keyword=search_term(page.url))
+    return parse
+
+def _seputarpapua(page, details):
+    # Like the scraper, keep only the cards whose article page gives a date
+    dated = []
+    for card in seputarpapua_scraper.parse_search_page(page.content):
+        article_page = details.get(card.url)
+        if article_page is None:
+            continue
+        found = seputarpapua_scraper.parse_article_details(article_page.text, card.url)
+        if found['date_obj'] is None:
+            continue
+        card.published_at = found['date_obj']
+        if not card.image_url:
+            card.image_url = found['image'] or None
+        dated.append(card)
+    return dated
+
+# site -> (search page URL pattern, parser(page, article pages by URL) -> ScrapedArticles)
+PAGE_PARSERS = {
+    'antara': (re.compile(r'antaranews\.com/search\?'), _antara),
+    'kompas': (re.compile(r'search\.kompas\.com/search\?'), _kompas),
+    'detik': (re.compile(r'detik\.com/search/'), _detik),
+    'cnn': (re.compile(r'cnnindonesia\.com/search/'), _harvester(CNN_HARVESTER, _query_term('query'))),
+    'tempo': (re.compile(r'tempo\.co/search\?'), _harvester(TEMPO_HARVESTER, _query_term('q'))),
+    'kumparan': (re.compile(r'kumparan\.com/search/'), _harvester(KUMPARAN_HARVESTER, _path_term)),
+    'seputarpapua': (re.compile(r'seputarpapua\.com/\?s='), _seputarpapua),
+}
+# Sites whose parser reads archived article pages
+NEEDS_ARTICLE_PAGES = {'seputarpapua'}
+
+FEED_URLS = {url: site for site, (_, urls) in FEEDS.items() for url in urls}
+
+def reparse_archive(sites: Optional[Iterable[str]] = None, since=None, until=None,
+                    directory: Optional[str] = None, keyword=SEARCH_KEYWORDS) -> Dict:
+    """
+    Re-parse archived pages fetched in [since, until) (aware datetimes).
+    Returns {'articles': deduplicated ScrapedArticles with regions assigned,
+    'sites': {site: {'pages', 'articles', 'errors', 'parse_seconds'}}}.
+    When a URL was archived several times, only its latest copy is parsed.
+    """
+    sites = set(sites) if sites else set(PAGE_PARSERS)
+    latest = {}
+    article_pages = {}
+    for page in iter_pages(directory, sites=sites, since=since, until=until):
+        if page.site not in PAGE_PARSERS:
+            continue
+        if page.url in FEED_URLS or PAGE_PARSERS[page.site][0].search(page.url):
+            latest[page.url] = page
+        elif page.site in NEEDS_ARTICLE_PAGES:
+            article_pages[page.url] = page
+
+    all_articles = []
+    stats = {}
+    for url, page in latest.items():
+        site_stats = stats.setdefault(page.site, {'pages': 0, 'articles': 0, 'errors': 0, 'parse_seconds': 0.0})
+        start = time.perf_counter()
+        try:
+            if url in FEED_URLS:
+                articles, _ = match_entries(FEED_URLS[url], parse_feed(page.content), keyword)
+            else:
+                articles = PAGE_PARSERS[page.site][1](page, article_pages)
+        except Exception as e:
+            logger.warning(f"[{page.site}] Could not re-parse {url}: {e}")
+            site_stats['errors'] += 1
+            continue
+        finally:
+            site_stats['parse_seconds'] += time.perf_counter() - start
+        site_stats['pages'] += 1
+        articles = [article for article in articles if not is_junk(article.title, article.url)]
+        site_stats['articles'] += len(articles)
+        all_articles.extend(articles)
+
+    for site_stats in stats.values():
+        site_stats['parse_seconds'] = round(site_stats['parse_seconds'], 3)
+    unique_articles = remove_duplicates(all_articles)
+    assign_regions(unique_articles)
+    return {'articles': unique_articles, 'sites': stats}
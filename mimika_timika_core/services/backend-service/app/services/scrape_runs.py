@@ -0,0 +1,420 @@
+"""
+Persisted scrape telemetry and run checkpoints.
+
+A RunCheckpoint records one ScrapeRun per scheduler/cron/API/manual run,
+site by site: run_all_scrapers calls site_done() after each site, which
+ingests that site's articles and stores its ScrapeRunSite row in one
+commit. A crash or restart midway loses at most the site in progress.
+The next run skips the sites that dead runs of the last
+SCRAPE_RESUME_MINUTES had completed, and scrapes the rest. Sites are the
+unit because each one is searched once for every region keyword
+(utils/regions.py).
+A run still marked running is dead when its process is gone (see
+run_is_dead); runs in progress elsewhere are neither resumed nor touched.
+GET /scrape/runs reads the runs back, so slow or dead sources show up
+over time instead of in one run's logs.
+
+Settings (environment):
+  SCRAPE_RESUME_MINUTES          age of a dead run whose completed sites the next run skips (default 30, the scrape interval)
+  SCRAPE_RUN_HEARTBEAT_MINUTES   silence after which a run of another host is taken for dead (default 15)
+"""
+
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, or_
+
+from .. import database, models
+from ..utils.helpers import remove_duplicates
+from ..utils.regions import assign_regions
+from .ingest import ingest_articles
+
+logger = logging.getLogger(__name__)
+
+SCRAPE_RESUME_MINUTES = float(os.getenv("SCRAPE_RESUME_MINUTES", "30"))
+SCRAPE_RUN_HEARTBEAT_MINUTES = float(os.getenv("SCRAPE_RUN_HEARTBEAT_MINUTES", "15"))
+
+SITE_COUNTERS = ('pages_fetched', 'bytes_fetched', 'pages_not_modified', 'fetch_errors')
+# Recent runs per site that site_yields() averages over
+YIELD_RUNS = 10
+
+# Identifies this process in ScrapeRun.owner; the token tells it apart from an
+# earlier process with the same pid (a restarted container is pid 1 again)
+HOST = socket.gethostname()[:40]
+OWNER = f"{HOST}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+# Ids of the runs this process has in progress
+_active_runs = set()
+_active_lock = threading.Lock()
+
+def migrate_scrape_runs():
+    """Add the telemetry columns that databases created before them lack"""
+    database.ensure_columns(models.ScrapeRun.__table__, {"owner": "VARCHAR(64)", "heartbeat_at": "TIMESTAMP"})
+    database.ensure_columns(models.ScrapeRunSite.__table__, {"discovery": "VARCHAR(16)"})
+
+def previous_digests(db, sites: Iterable[str]) -> Dict[str, str]:
+    """Latest recorded articles_digest per site"""
+    digests = {}
+    for site in sites:
+        row = (
+            db.query(models.ScrapeRunSite.articles_digest)
+            .filter(models.ScrapeRunSite.site == site, models.ScrapeRunSite.articles_digest.isnot(None))
+            .order_by(models.ScrapeRunSite.run_id.desc())
+            .first()
+        )
+        if row is not None:
+            digests[site] = row.articles_digest
+    return digests
+
+def site_yields(db, sites: Iterable[str], runs: int = YIELD_RUNS) -> Dict[str, tuple]:
+    """
+    Expected yield per site from its last `runs` recorded runs, as the sort
+    key of ScrapeBudget.order(): (new articles per second, articles parsed per
+    second). Sites without a timed run are left out.
+    """
+    yields = {}
+    for site in sites:
+        rows = (
+            db.query(models.ScrapeRunSite)
+            .filter(models.ScrapeRunSite.site == site, models.ScrapeRunSite.duration_seconds > 0)
+            .order_by(models.ScrapeRunSite.run_id.desc())
+            .limit(runs)
+            .all()
+        )
+        seconds = sum(row.duration_seconds for row in rows)
+        if seconds:
+            yields[site] = (
+                sum(row.articles_new or 0 for row in rows) / seconds,
+                sum(row.articles_parsed or 0 for row in rows) / seconds,
+            )
+    return yields
+
+def _scraped():
+    """
+    Site rows whose site was scraped: it yielded articles, or came back empty
+    from pages that were all fetched (an empty site whose fetches failed was not)
+    """
+    site = models.ScrapeRunSite
+    return or_(
+        site.status == 'success',
+        and_(site.status == 'empty', site.pages_fetched > 0, site.fetch_errors == 0),
+    )
+
+def last_scraped(db, sites: Iterable[str]) -> Dict[str, datetime]:
+    """Start (naive UTC) of the latest run that scraped each site; sites never scraped are left out"""
+    scraped = {}
+    for site in sites:
+        row = (
+            db.query(models.ScrapeRun.started_at)
+            .join(models.ScrapeRunSite, models.ScrapeRunSite.run_id == models.ScrapeRun.id)
+            .filter(models.ScrapeRunSite.site == site, _scraped())
+            .order_by(models.ScrapeRun.id.desc())
+            .first()
+        )
+        if row is not None:
+            scraped[site] = row.started_at
+    return scraped
+
+def _pid_alive(pid: int) -> Optional[bool]:
+    """Whether process `pid` of this host exists; None where that cannot be told"""
+    if os.name != 'posix':
+        # os.kill(pid, 0) sends CTRL_C_EVENT on Windows
+        return None
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return None
+    return True
+
+def run_is_dead(run, now: Optional[datetime] = None) -> bool:
+    """
+    Whether a run still marked running lost its process. A run of this
+    process is dead once it is no longer in progress here, a run of an
+    earlier process on this host once its pid is gone (or reused by this
+    process). Other runs (other hosts, serverless invocations, rows from
+    before owners were recorded) are dead after SCRAPE_RUN_HEARTBEAT_MINUTES
+    without a completed site.
+    """
+    if run.owner == OWNER:
+        with _active_lock:
+            return run.id not in _active_runs
+    host, _, rest = (run.owner or '').partition(':')
+    pid, _, _ = rest.partition(':')
+    if host == HOST and pid.isdigit():
+        if int(pid) == os.getpid():
+            return True
+        alive = _pid_alive(int(pid))
+        if alive is not None:
+            return not alive
+    now = now or datetime.utcnow()
+    heartbeat = run.heartbeat_at or run.started_at
+    return heartbeat is None or heartbeat < now - timedelta(minutes=SCRAPE_RUN_HEARTBEAT_MINUTES)
+
+def dead_runs(db, now: Optional[datetime] = None) -> List:
+    """Runs still marked running whose process is gone"""
+    now = now or datetime.utcnow()
+    running = db.query(models.ScrapeRun).filter(models.ScrapeRun.status == 'running').all()
+    return [run for run in running if run_is_dead(run, now)]
+
+def completed_sites(db, run_ids: Iterable[int]) -> Dict[str, int]:
+    """site -> id of the run that scraped it (see _scraped), among `run_ids`"""
+    run_ids = list(run_ids)
+    if not run_ids:
+        return {}
+    site = models.ScrapeRunSite
+    query = (
+        db.query(site.site, site.run_id)
+        .filter(site.run_id.in_(run_ids), _scraped())
+        .order_by(site.run_id)
+    )
+    return {row.site: row.run_id for row in query}
+
+class RunCheckpoint:
+    """
+    One run, committed as its sites complete. `done` maps the sites that
+    run_all_scrapers skips (see completed_sites) to the dead run that
+    completed them; `ingest_result` adds up the per-site ingests like ingest_articles'
+    result. Telemetry must never fail the run it describes: recording errors
+    are logged and rolled back. Articles whose ingest failed are retried at
+    the next site and in finish().
+    """
+
+    __slots__ = ('db', 'trigger', 'started_at', 'run', 'done', 'ingest_result', '_pending', '_stored', '_resumed')
+
+    def __init__(self, db, trigger: str, started_at: Optional[datetime] = None):
+        self.db = db
+        self.trigger = trigger
+        self.started_at = started_at or datetime.utcnow()
+        self.run = None
+        self.done: Dict[str, int] = {}
+        self.ingest_result = {'saved': 0, 'updated': 0, 'by_source': {}}
+        self._pending: List = []
+        self._stored = set()
+        self._resumed: List[int] = []
+        try:
+            # Dead runs of the last SCRAPE_RESUME_MINUTES are resumed (and marked
+            # interrupted by finish()), older ones are marked interrupted now
+            since = self.started_at - timedelta(minutes=SCRAPE_RESUME_MINUTES)
+            for run in dead_runs(db, self.started_at):
+                if run.started_at is not None and run.started_at >= since:
+                    self._resumed.append(run.id)
+                else:
+                    run.status = 'interrupted'
+            self.done = completed_sites(db, self._resumed)
+            self.run = models.ScrapeRun(
+                trigger=trigger, status='running', started_at=self.started_at,
+                owner=OWNER, heartbeat_at=self.started_at,
+                articles_found=0, articles_saved=0, articles_updated=0,
+            )
+            db.add(self.run)
+            db.flush()
+            # In progress before other sessions can see it running
+            with _active_lock:
+                _active_runs.add(self.run.id)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            if self.run is not None:
+                with _active_lock:
+                    _active_runs.discard(self.run.id)
+            self.run = None
+            self.done = {}
+            self._resumed = []
+            logger.warning(f"Could not record scrape run start: {e}")
+        if self.done:
+            logger.info(f"Resuming: skipping {', '.join(f'{site} (run {run_id})' for site, run_id in sorted(self.done.items()))}")
+
+    def _ingest(self, articles: List) -> Optional[Dict]:
+        """Ingest `articles` plus any left over from a failed ingest; commits whatever is in the session"""
+        batch = remove_duplicates(self._pending + articles)
+        try:
+            result = ingest_articles(self.db, batch)
+        except Exception as e:
+            self.db.rollback()
+            self._pending = batch
+            logger.warning(f"Ingest of {len(batch)} articles failed, retrying with the next site: {e}")
+            return None
+        self._pending = []
+        self.ingest_result['saved'] += result['saved']
+        self.ingest_result['updated'] += result['updated']
+        for source, counts in result['by_source'].items():
+            totals = self.ingest_result['by_source'].setdefault(source, {'saved': 0, 'updated': 0})
+            totals['saved'] += counts['saved']
+            totals['updated'] += counts['updated']
+        return result
+
+    def _site_row(self, site: str, result: Dict, by_source: Dict):
+        counts = by_source.get(result.get('source'), {})
+        return models.ScrapeRunSite(
+            run_id=self.run.id,
+            site=site,
+            status=result.get('status'),
+            discovery=result.get('discovery'),
+            duration_seconds=result.get('duration_seconds'),
+            articles_parsed=result.get('count', 0),
+            articles_new=counts.get('saved', 0),
+            articles_updated=counts.get('updated', 0),
+            articles_digest=result.get('digest'),
+            error=result.get('error'),
+            **{name: result.get(name, 0) for name in SITE_COUNTERS},
+        )
+
+    def site_done(self, site: str, result: Dict, articles: List):
+        """
+        Checkpoint one scraped site: its articles (junk already dropped) are
+        ingested and its row stored in the same commit, so a site is only
+        ever marked completed together with its articles.
+        """
+        articles = remove_duplicates(articles)
+        assign_regions(articles)
+        row = None
+        if self.run is not None:
+            try:
+                previous = previous_digests(self.db, [site]).get(site)
+                row = self._site_row(site, result, {})
+                row.unchanged = row.articles_digest is not None and previous == row.articles_digest
+                self.db.add(row)
+            except Exception as e:
+                self.db.rollback()
+                row = None
+                logger.warning(f"Could not record {site} in the scrape run: {e}")
+        # ingest_articles commits, taking the site's row along
+        ingested = self._ingest(articles)
+        if ingested is None or row is None:
+            return
+        self._stored.add(site)
+        try:
+            counts = ingested['by_source'].get(result.get('source'), {})
+            row.articles_new = counts.get('saved', 0)
+            row.articles_updated = counts.get('updated', 0)
+            self.run.articles_saved = self.ingest_result['saved']
+            self.run.articles_updated = self.ingest_result['updated']
+            self.run.heartbeat_at = datetime.utcnow()
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.warning(f"Could not update {site} in the scrape run: {e}")
+
+    def finish(self, scrape_result: Optional[dict] = None, error: Optional[str] = None):
+        """
+        Ingest what is left, store the run's totals and the sites not
+        checkpointed (skipped ones), and mark the dead runs it resumed as
+        interrupted. Returns the ScrapeRun, or None when it could not be recorded.
+        """
+        if self.run is not None:
+            with _active_lock:
+                _active_runs.discard(self.run.id)
+        scrape_result = scrape_result or {}
+        if self._pending and self._ingest([]) is None:
+            error = error or "Ingest failed"
+        if error:
+            status = 'error'
+        elif scrape_result.get('status') == 'success':
+            status = 'success'
+        else:
+            status = 'failed'
+            error = scrape_result.get('message')
+
+        finished_at = datetime.utcnow()
+        site_results = scrape_result.get('site_results', {})
+        try:
+            run = self.run
+            if run is None:
+                run = models.ScrapeRun(trigger=self.trigger, started_at=self.started_at)
+                self.db.add(run)
+            run.status = status
+            run.finished_at = finished_at
+            run.duration_seconds = round((finished_at - self.started_at).total_seconds(), 3)
+            run.articles_found = scrape_result.get('data', {}).get('metadata', {}).get('total_articles', 0)
+            run.articles_saved = self.ingest_result['saved']
+            run.articles_updated = self.ingest_result['updated']
+            run.error = error
+            self.db.flush()
+            self.run = run
+
+            remaining = {site: result for site, result in site_results.items() if site not in self._stored}
+            previous = previous_digests(self.db, remaining)
+            for site, result in remaining.items():
+                row = self._site_row(site, result, self.ingest_result['by_source'])
+                row.unchanged = row.articles_digest is not None and previous.get(site) == row.articles_digest
+                self.db.add(row)
+
+            if self._resumed:
+                self.db.query(models.ScrapeRun).filter(
+                    models.ScrapeRun.id.in_(self._resumed), models.ScrapeRun.status == 'running',
+                ).update({'status': 'interrupted'}, synchronize_session=False)
+            self.db.commit()
+            return run
+        except Exception as e:
+            self.db.rollback()
+            logger.warning(f"Could not record scrape run: {e}")
+            return None
+
+def run_to_dict(run) -> Dict[str, Any]:
+    return {
+        'id': run.id,
+        'trigger': run.trigger,
+        'status': run.status,
+        'started_at': run.started_at,
+        'finished_at': run.finished_at,
+        'duration_seconds': run.duration_seconds,
+        'articles_found': run.articles_found,
+        'articles_saved': run.articles_saved,
+        'articles_updated': run.articles_updated,
+        'error': run.error,
+    }
+
+def site_to_dict(row) -> Dict[str, Any]:
+    return {
+        'site': row.site,
+        'status': row.status,
+        'discovery': row.discovery,
+        'duration_seconds': row.duration_seconds,
+        'articles_parsed': row.articles_parsed,
+        'articles_new': row.articles_new,
+        'articles_updated': row.articles_updated,
+        'unchanged': row.unchanged,
+        'error': row.error,
+        **{name: getattr(row, name) for name in SITE_COUNTERS},
+    }
+
+def list_runs(db, limit: int = 20, site: Optional[str] = None, status: Optional[str] = None,
+              run_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Newest runs first, each with its sites. With `site`, only runs that
+    scraped it are returned and only that site's row is included.
+    """
+    query = db.query(models.ScrapeRun)
+    if run_id is not None:
+        query = query.filter(models.ScrapeRun.id == run_id)
+    if status:
+        query = query.filter(models.ScrapeRun.status == status)
+    if site:
+        query = query.filter(
+            models.ScrapeRun.id.in_(
+                db.query(models.ScrapeRunSite.run_id).filter(models.ScrapeRunSite.site == site)
+            )
+        )
+    runs = query.order_by(models.ScrapeRun.id.desc()).limit(limit).all()
+    if not runs:
+        return []
+
+    # One query for the sites of every listed run
+    site_query = db.query(models.ScrapeRunSite).filter(
+        models.ScrapeRunSite.run_id.in_([run.id for run in runs])
+    )
+    if site:
+        site_query = site_query.filter(models.ScrapeRunSite.site == site)
+    sites_by_run = {}
+    for row in site_query.order_by(models.ScrapeRunSite.id):
+        sites_by_run.setdefault(row.run_id, []).append(site_to_dict(row))
+
+    return [{**run_to_dict(run), 'sites': sites_by_run.get(run.id, [])} for run in runs]
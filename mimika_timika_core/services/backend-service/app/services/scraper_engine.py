@@ -3,12 +3,14 @@ Main News Scraper Application - Refactored for JSON-only responses
 """
 
 import argparse
-import logging
+import hashlib
 import os
 import sys
 import json
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from dotenv import load_dotenv
 
 # Add current directory to path for imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -22,8 +24,15 @@ from ..scrapers.tempo_scraper import scrape_tempo
 from ..scrapers.kumparan_scraper import scrape_kumparan
 from ..scrapers.detik_scraper import scrape_detik
 from ..scrapers.seputarpapua_scraper import scrape_seputarpapua
+from ..scrapers.feed_scraper import FEEDS, FEED_DISCOVERY, scrape_feeds
 
-from ..utils.helpers import setup_logging, remove_duplicates
+from ..utils.helpers import setup_logging, remove_duplicates, is_junk
+from ..utils.regions import SEARCH_KEYWORDS, assign_regions
+from ..utils.metrics import SITE_SCRAPE_SECONDS, timed
+from ..utils.fetch import collect_fetch_stats
+from ..utils.profiling import profiled
+from ..utils.budget import ScrapeBudget
+from ..utils.circuit import breakers
 
 # Configuration
 SCRAPERS = {
@@ -36,8 +45,81 @@ SCRAPERS = {
     'seputarpapua': scrape_seputarpapua
 }
 
-def run_all_scrapers(return_json=True):
-    """Run all available scrapers and combine results"""
+# Live runs in progress in this process; the backfill crawler (services/backfill.py) yields to them
+_live_runs = 0
+_live_runs_lock = threading.Lock()
+
+@contextmanager
+def live_run():
+    global _live_runs
+    with _live_runs_lock:
+        _live_runs += 1
+    try:
+        yield
+    finally:
+        with _live_runs_lock:
+            _live_runs -= 1
+
+def live_run_active() -> bool:
+    return _live_runs > 0
+
+def articles_digest(articles):
+    """sha1 of the sorted url_hashes: equal digests mean a site returned the same articles"""
+    return hashlib.sha1('\n'.join(sorted(a.url_hash for a in articles)).encode()).hexdigest()
+
+def scrape_site(site_name, scraper_func, keyword=SEARCH_KEYWORDS, budget=None, since=None):
+    """
+    Scrape one site, from its feeds (feed_scraper.FEEDS) when they cover the
+    period since `since`, its last successful scrape, otherwise with its search
+    scraper plus whatever the feeds found. Returns (result, discovery): 'feed',
+    'search' or 'feed+search'.
+    `budget` is the run's ScrapeBudget, passed on to the feeds and the scraper.
+    """
+    feed_articles = []
+    if FEED_DISCOVERY and site_name in FEEDS:
+        feed_result = scrape_feeds(site_name, keyword=keyword, since=since, budget=budget)
+        if feed_result['status'] == 'success':
+            return feed_result, 'feed'
+        feed_articles = feed_result['data']['articles']
+
+    # Pass the keyword set and the run budget to the scraper
+    try:
+        result = scraper_func(keyword=keyword, budget=budget)
+    except TypeError:
+        # Fallback for scrapers that don't accept keyword yet
+        result = scraper_func()
+
+    if not feed_articles:
+        return result, 'search'
+    if isinstance(result, dict) and result.get('status') == 'success' and result.get('data'):
+        result['data']['articles'] = feed_articles + list(result['data'].get('articles', []))
+        return result, 'feed+search'
+    # The search failed, but what the feeds did find is still good
+    return {'status': 'success', 'data': {'articles': feed_articles}}, 'feed'
+
+@live_run()
+def run_all_scrapers(return_json=True, profile=None, budget=None, checkpoint=None, last_scraped=None):
+    """
+    Run all available scrapers and combine results.
+    With return_json=True the articles are JSON-ready dicts; with False they are
+    the ScrapedArticle records themselves (what ingest consumes).
+    site_results has an entry per site: status (success/empty/error/skipped), article
+    count, discovery path, duration, the fetch counters of services/scrape_runs.py
+    and the state of the site's circuit breaker (utils/circuit.py). A site whose
+    breaker is cooling down is skipped without a request.
+    `profile` is an optional utils.profiling.ProfileSession: each site and the
+    dedup/region pass are then profiled as separate sections.
+    `budget` is the run's ScrapeBudget (utils/budget.py; SCRAPE_BUDGET_SECONDS
+    when None): sites run in its yield order, and those that no longer fit
+    before the deadline are skipped, so the run returns what it has in time.
+    `checkpoint` is an optional services.scrape_runs.RunCheckpoint: each site's
+    articles are handed to its site_done() as soon as the site completes, and
+    the sites in its `done` (completed by an interrupted run) are skipped.
+    `last_scraped` maps sites to their last successful scrape
+    (services/scrape_runs.last_scraped); a site's feeds must reach back to it,
+    and sites missing from it are searched.
+    """
+    budget = budget or ScrapeBudget.from_env()
     logger = setup_logging()
     logger.info("=" * 60)
     logger.info("Starting news scraping from all sources")
@@ -48,77 +130,92 @@ def run_all_scrapers(return_json=True):
     categories_found = set()
     site_results = {}
 
-    regions_config = {
-        'timika': 'timika',
-        'mimika': 'mimika'
-    }
-    
-    # We will track processed URLs to prevent duplicates if they appear in both searches
-    processed_urls = set()
-
-    for region_name, search_keyword in regions_config.items():
-        logger.info(f"--- Scraping Region: {region_name.upper()} (Keyword: {search_keyword}) ---")
-        
-        for site_name, scraper_func in SCRAPERS.items():
-            logger.info(f"Scraping {site_name} for {region_name}...")
+    # Each site is searched once per cycle, for every region keyword; regions are
+    # read from the article text after dedup
+    logger.info(f"Search keywords: {', '.join(SEARCH_KEYWORDS)}")
+
+    for site_name in budget.order(SCRAPERS):
+        scraper_func = SCRAPERS[site_name]
+        breaker = breakers.get(site_name)
+        if checkpoint is not None and site_name in checkpoint.done:
+            run_id = checkpoint.done[site_name]
+            logger.info(f"Skipping {site_name}: completed by run {run_id}")
+            site_results[site_name] = {'status': 'skipped', 'count': 0, 'circuit': breaker.state, 'error': f"completed by run {run_id}"}
+            continue
+        if breaker.cooling_down():
+            logger.info(f"Skipping {site_name}: circuit open until {breaker.retry_at:%H:%M:%S} UTC")
+            site_results[site_name] = {
+                'status': 'skipped', 'count': 0, 'circuit': breaker.state,
+                'error': f"circuit open: {breaker.last_error}",
+            }
+            continue
+        if not budget.allows(site_name):
+            logger.info(f"Skipping {site_name}: run deadline near ({budget.remaining():.1f}s left)")
+            site_results[site_name] = {'status': 'skipped', 'count': 0, 'circuit': breaker.state, 'error': 'run deadline'}
+            continue
+        logger.info(f"Scraping {site_name}...")
+        site_result = {'status': 'empty', 'count': 0}
+        site_articles = []
+        started = time.perf_counter()
+        with collect_fetch_stats() as fetch_stats:
             try:
-                # Pass the keyword to the scraper
-                # Note: Some scrapers might not support arg yet, need to ensuring all do or handle TypeError
-                try:
-                    result = scraper_func(keyword=search_keyword)
-                except TypeError:
-                    # Fallback for scrapers that don't accept keyword yet
-                    result = scraper_func()
-                
+                with profiled(profile, site_name):
+                    result, discovery = scrape_site(
+                        site_name, scraper_func, budget=budget, since=(last_scraped or {}).get(site_name))
+                site_result['discovery'] = discovery
+
                 articles = []
-                
+
                 # All scrapers now return dicts
                 if isinstance(result, dict):
                     if result.get('status') == 'success' and result.get('data'):
                         articles = result['data'].get('articles', [])
-                
+                    elif result.get('status') == 'error':
+                        site_result.update(status='error', error=result.get('message'))
+
                 if articles:
-                    # Enrich with region tag
                     for article in articles:
-                        # Global Filter for Junk Content
-                        title_lower = article.get('title', '').lower()
-                        url_lower = article.get('url', '').lower()
-                        
-                        junk_keywords = [
-                            "tentang kami", "about us", "contact", "hubungi kami", "redaksi",
-                            "pedoman", "cyber media", "siber", "privacy", "kebijakan privasi",
-                            "disclaimer", "karir", "lowongan", "galeri foto", "video story",
-                            "term of use", "ketentuan", "indeks berita"
-                        ]
-                        
-                        if any(k in title_lower for k in junk_keywords) or any(k in url_lower for k in junk_keywords):
-                            logger.info(f"Skipping junk content: {article.get('title')} ({article.get('url')})")
+                        # Safety net: scrapers drop junk cards while parsing, this catches any that slip through
+                        if is_junk(article.title, article.url):
+                            logger.info(f"Skipping junk content: {article.title} ({article.url})")
                             continue
-                            
-                        # Enrich with region tag
-                        article['region'] = region_name
-                        all_articles.append(article)
 
-                    sources_found.append(f"{site_name} ({region_name})")
+                        site_articles.append(article)
+
+                    sources_found.append(site_name)
 
                     # Collect categories
                     for article in articles:
-                        category = article.get('category', 'news')
-                        categories_found.add(category)
-
-                    logger.info(f"Successfully scraped {len(articles)} articles from {site_name} for {region_name}")
-                    
-                    # Update site results (cumulative count)
-                    current_count = site_results.get(site_name, {}).get('count', 0)
-                    site_results[site_name] = {'status': 'success', 'count': current_count + len(articles)}
+                        categories_found.add(article.category)
+
+                    logger.info(f"Successfully scraped {len(articles)} articles from {site_name}")
+                    site_result.update(
+                        status='success',
+                        count=len(articles),
+                        source=articles[0].source,
+                        digest=articles_digest(articles),
+                    )
                 else:
-                    logger.warning(f"No articles found from {site_name} for {region_name}")
+                    logger.warning(f"No articles found from {site_name}")
             except Exception as e:
-                logger.error(f"Error scraping {site_name} for {region_name}: {str(e)}")
-                continue
+                logger.error(f"Error scraping {site_name}: {str(e)}")
+                site_result.update(status='error', error=str(e))
+
+        duration = time.perf_counter() - started
+        SITE_SCRAPE_SECONDS.labels(site_name).observe(duration)
+        site_result['duration_seconds'] = round(duration, 3)
+        site_result.update(fetch_stats.to_dict())
+        site_result['circuit'] = breaker.state
+        site_results[site_name] = site_result
+        all_articles.extend(site_articles)
+        if checkpoint is not None:
+            with profiled(profile, f"ingest-{site_name}"):
+                checkpoint.site_done(site_name, site_result, site_articles)
 
     # Remove duplicates
-    unique_articles = remove_duplicates(all_articles)
+    with profiled(profile, 'dedup'):
+        unique_articles = remove_duplicates(all_articles)
+        assign_regions(unique_articles)
     logger.info(f"Total unique articles: {len(unique_articles)}")
 
     return {
@@ -130,9 +227,10 @@ def run_all_scrapers(return_json=True):
                 'sources': sources_found,
                 'categories': sorted(list(categories_found))
             },
-            'articles': unique_articles
+            'articles': [article.to_dict() for article in unique_articles] if return_json else unique_articles
         },
-        'site_results': site_results
+        'site_results': site_results,
+        'budget': budget.to_dict()
     }
 
 def run_specific_scraper(site_name, return_json=True):
@@ -150,7 +248,10 @@ def run_specific_scraper(site_name, return_json=True):
 
     logger.info(f"Scraping {site_name}...")
     try:
-        result = SCRAPERS[site_name]()
+        with timed(SITE_SCRAPE_SECONDS, site_name):
+            result = SCRAPERS[site_name]()
+        if return_json and isinstance(result, dict) and result.get('data'):
+            result['data']['articles'] = [article.to_dict() for article in result['data'].get('articles', [])]
         return result
     except Exception as e:
         error_msg = f"Error scraping {site_name}: {str(e)}"
@@ -0,0 +1,82 @@
+"""
+Persisted circuit breaker state per source.
+
+The breakers of utils/circuit.py live in one process. load_health() copies
+the source_health rows into them before a run and save_health() writes them
+back after it, so a site whose breaker opened stays skipped across runs,
+restarts and serverless invocations until its cool-down ends.
+GET /sources/health reads the rows back.
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List
+
+from .. import models
+from ..utils.circuit import CircuitBreaker, breakers
+
+logger = logging.getLogger(__name__)
+
+def _breaker_from_row(row) -> CircuitBreaker:
+    return CircuitBreaker(
+        row.site,
+        state=row.state,
+        failures=row.consecutive_failures or 0,
+        cooldown=row.cooldown_seconds,
+        opened_at=row.opened_at,
+        retry_at=row.retry_at,
+        last_success_at=row.last_success_at,
+        last_failure_at=row.last_failure_at,
+        last_error=row.last_error,
+    )
+
+def load_health(db, sites: Iterable[str]):
+    """Replace the process's breakers of `sites` with their stored state; on errors they stay as they are"""
+    try:
+        for row in db.query(models.SourceHealth).filter(models.SourceHealth.site.in_(list(sites))):
+            breakers.replace(_breaker_from_row(row))
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"Could not load source health: {e}")
+
+def save_health(db, sites: Iterable[str]):
+    """
+    Store the breakers of `sites` and commit. Like the run telemetry, this
+    must never fail a run: errors are logged and rolled back.
+    """
+    now = datetime.utcnow()
+    try:
+        for site in sites:
+            breaker = breakers.get(site)
+            row = db.get(models.SourceHealth, site)
+            if row is None:
+                row = models.SourceHealth(site=site)
+                db.add(row)
+            row.state = breaker.state
+            row.consecutive_failures = breaker.failures
+            row.cooldown_seconds = breaker.cooldown
+            row.opened_at = breaker.opened_at
+            row.retry_at = breaker.retry_at
+            row.last_success_at = breaker.last_success_at
+            row.last_failure_at = breaker.last_failure_at
+            row.last_error = breaker.last_error
+            row.updated_at = now
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"Could not save source health: {e}")
+
+def list_health(db, sites: Iterable[str]) -> List[Dict[str, Any]]:
+    """Stored state of every site in `sites`; a site never stored is closed"""
+    rows = {row.site: row for row in db.query(models.SourceHealth)}
+    now = datetime.utcnow()
+    health = []
+    for site in sites:
+        row = rows.get(site)
+        breaker = _breaker_from_row(row) if row is not None else CircuitBreaker(site)
+        health.append({
+            **breaker.to_dict(),
+            'retry_in_seconds': round((breaker.retry_at - now).total_seconds()) if breaker.cooling_down(now) else None,
+            'updated_at': row.updated_at if row is not None else None,
+        })
+    return health
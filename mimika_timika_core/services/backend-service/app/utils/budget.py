@@ -0,0 +1,148 @@
+"""
+Run-level time budget for the scrapers.
+
+Each entry point gives its run a deadline: the Vercel cron and /ingest/run
+the function limit, the scheduler most of its interval. run_all_scrapers
+passes one ScrapeBudget to every scraper, which asks it before each page
+instead of checking VERCEL and hardcoding page caps:
+
+- allows(site): is there time left for one more page of `site`, at the
+  page cost measured so far in this run (PAGE_SECONDS_ESTIMATE before the
+  first one)
+- timeout(seconds): a fetch timeout that does not run past the deadline
+- hurried: little time left, so use the short politeness delays and skip retries
+
+The deadline keeps SCRAPE_BUDGET_RESERVE seconds back for dedup and
+ingest, so whatever was scraped by then is still committed. Sites run in
+order of expected yield (`yields`, see services/scrape_runs.site_yields),
+so the sites that stop fitting are the least productive ones.
+
+Settings (environment):
+  SCRAPE_BUDGET_SECONDS  run budget when the entry point gives none (default 8 on Vercel, unbounded elsewhere)
+  SCRAPE_BUDGET_RESERVE  seconds kept for dedup and ingest (default 1.5 on Vercel, 10 elsewhere)
+  SCRAPE_PAGES_LIMIT     page cap for every scraper, replacing their own safety caps (optional)
+  PAGE_SECONDS_ESTIMATE  cost of a page before one was measured (default 1.5)
+"""
+
+import logging
+import math
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_IS_VERCEL = os.environ.get('VERCEL') == '1' or os.environ.get('VERCEL_ENV') is not None
+
+def _env_float(name: str, default: Optional[str]) -> Optional[float]:
+    value = os.getenv(name, default)
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        logging.warning(f"Invalid {name}={value!r}, ignoring it")
+        return float(default) if default else None
+
+SCRAPE_BUDGET_SECONDS = _env_float("SCRAPE_BUDGET_SECONDS", "8" if _IS_VERCEL else None)
+SCRAPE_BUDGET_RESERVE = _env_float("SCRAPE_BUDGET_RESERVE", "1.5" if _IS_VERCEL else "10")
+PAGE_SECONDS_ESTIMATE = _env_float("PAGE_SECONDS_ESTIMATE", "1.5")
+_pages_limit = _env_float("SCRAPE_PAGES_LIMIT", None)
+SCRAPE_PAGES_LIMIT = int(_pages_limit) if _pages_limit else None
+
+# Below this many seconds left a run is hurried
+HURRY_SECONDS = 60
+# Shortest fetch timeout worth trying
+MIN_TIMEOUT = 1.0
+# Weight of the newest page in a site's page cost
+PAGE_COST_WEIGHT = 0.5
+
+def page_cap(default: Optional[int]) -> Optional[int]:
+    """A scraper's page (or article batch) cap: SCRAPE_PAGES_LIMIT when set, else `default` (None: uncapped)"""
+    return SCRAPE_PAGES_LIMIT or default
+
+class ScrapeBudget:
+    """
+    Deadline of one run (time.monotonic()); unbounded when `seconds` is None.
+    `yields` maps site -> sort key of its expected yield, higher first.
+    """
+
+    __slots__ = ('seconds', 'deadline', 'yields', '_page_seconds')
+
+    def __init__(self, seconds: Optional[float] = None, reserve: Optional[float] = None,
+                 yields: Optional[Dict[str, Tuple]] = None):
+        self.seconds = seconds
+        if seconds is None:
+            self.deadline = math.inf
+        else:
+            reserve = SCRAPE_BUDGET_RESERVE if reserve is None else reserve
+            # A budget smaller than the reserve still gets a little scraping time
+            self.deadline = time.monotonic() + max(seconds - (reserve or 0), seconds / 2)
+        self.yields = yields or {}
+        self._page_seconds: Dict[str, float] = {}
+
+    @classmethod
+    def from_env(cls, seconds: Optional[float] = None, yields=None) -> "ScrapeBudget":
+        """Budget of `seconds`, or SCRAPE_BUDGET_SECONDS when the entry point gives none"""
+        return cls(SCRAPE_BUDGET_SECONDS if seconds is None else seconds, yields=yields)
+
+    def __repr__(self):
+        return f"ScrapeBudget({self.remaining():.1f}s left)"
+
+    @property
+    def bounded(self) -> bool:
+        return self.deadline != math.inf
+
+    def remaining(self) -> float:
+        return self.deadline - time.monotonic()
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    @property
+    def hurried(self) -> bool:
+        return self.remaining() < HURRY_SECONDS
+
+    def page_seconds(self, site: str) -> float:
+        return self._page_seconds.get(site, PAGE_SECONDS_ESTIMATE)
+
+    def record_page(self, site: str, seconds: float):
+        """Fold one page's cost (fetch, delay, parse) into the site's estimate"""
+        previous = self._page_seconds.get(site)
+        if previous is None:
+            self._page_seconds[site] = seconds
+        else:
+            self._page_seconds[site] = PAGE_COST_WEIGHT * seconds + (1 - PAGE_COST_WEIGHT) * previous
+
+    @contextmanager
+    def timed(self, site: str):
+        """Record the with-block as one page of `site`"""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record_page(site, time.monotonic() - start)
+
+    def allows(self, site: str, extra: float = 0.0) -> bool:
+        """Whether one more page of `site` (plus `extra` seconds) fits before the deadline"""
+        return self.remaining() >= self.page_seconds(site) + extra
+
+    def timeout(self, seconds: float) -> float:
+        """`seconds`, shortened so the request cannot outlast the deadline"""
+        return min(seconds, max(MIN_TIMEOUT, self.remaining()))
+
+    def order(self, sites: Iterable[str]) -> List[str]:
+        """
+        `sites` by expected yield, best first. Sites without history come
+        first, so they get measured; ties keep the given order.
+        """
+        sites = list(sites)
+        unknown = [site for site in sites if site not in self.yields]
+        known = sorted((site for site in sites if site in self.yields), key=lambda site: self.yields[site], reverse=True)
+        return unknown + known
+
+    def to_dict(self) -> Dict:
+        return {
+            'seconds': self.seconds,
+            'remaining_seconds': round(self.remaining(), 3) if self.bounded else None,
+            'page_seconds': {site: round(cost, 3) for site, cost in self._page_seconds.items()},
+        }
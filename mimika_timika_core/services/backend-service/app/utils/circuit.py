@@ -0,0 +1,184 @@
+"""
+Per-site circuit breakers.
+
+A site that is down or blocks us used to cost its whole retry ladder (Antara:
+20 s timeouts, 5 s and 10 s backoff) on every page and keyword pass of every
+run, delaying the sites after it. fetch_page() reports each request to the
+site's CircuitBreaker:
+
+- closed: requests go out; CIRCUIT_FAILURE_THRESHOLD consecutive failed
+  requests (connection errors, timeouts, 403/429/5xx answers) open it
+- open: fetch_page raises CircuitOpenError without a request, retry or
+  backoff sleep, and run_all_scrapers skips the site, until the cool-down ends
+- half_open: the cool-down ended and a single probe request goes out, without
+  retries. Success closes the breaker; failure opens it again for twice the
+  previous cool-down, up to CIRCUIT_MAX_COOLDOWN_MINUTES
+
+The breakers live in this process (`breakers`); services/source_health.py
+loads them from the source_health table before a run and saves them after
+it, so a cool-down holds across runs, restarts and serverless invocations.
+
+Settings (environment):
+  CIRCUIT_FAILURE_THRESHOLD     consecutive failed requests that open a site's breaker (default 3)
+  CIRCUIT_COOLDOWN_MINUTES      first cool-down of an opened breaker (default 20)
+  CIRCUIT_MAX_COOLDOWN_MINUTES  longest cool-down after repeated failed probes (default 360)
+  CIRCUIT_PROBE_TIMEOUT         timeout of the half-open probe in seconds (default 10)
+"""
+
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from .metrics import CIRCUIT_TRANSITIONS
+
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))
+CIRCUIT_COOLDOWN_MINUTES = float(os.getenv("CIRCUIT_COOLDOWN_MINUTES", "20"))
+CIRCUIT_MAX_COOLDOWN_MINUTES = float(os.getenv("CIRCUIT_MAX_COOLDOWN_MINUTES", "360"))
+CIRCUIT_PROBE_TIMEOUT = float(os.getenv("CIRCUIT_PROBE_TIMEOUT", "10"))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Answers that mean the site is down or blocking us; other 4xx are about the page
+FAILURE_STATUSES = (403, 429)
+
+def is_failure_status(status_code: int) -> bool:
+    return status_code in FAILURE_STATUSES or status_code >= 500
+
+class CircuitOpenError(Exception):
+    """Raised by fetch_page instead of requesting a site whose breaker is open"""
+
+    def __init__(self, site: str, retry_at: Optional[datetime] = None):
+        self.site = site
+        self.retry_at = retry_at
+        if retry_at is None:
+            message = f"{site} circuit half-open, probe in flight"
+        else:
+            message = f"{site} circuit open until {retry_at:%Y-%m-%d %H:%M:%S} UTC"
+        super().__init__(message)
+
+class CircuitBreaker:
+    """
+    Breaker of one site. Times are naive UTC, so they can be stored as they are;
+    `cooldown` is the current cool-down in seconds. `clock` returns the
+    current time (datetime.utcnow unless a test injects one).
+    """
+
+    __slots__ = (
+        'site', 'state', 'failures', 'cooldown', 'opened_at', 'retry_at',
+        'last_success_at', 'last_failure_at', 'last_error', '_clock', '_probing', '_lock',
+    )
+
+    def __init__(self, site: str, state: str = CLOSED, failures: int = 0, cooldown: Optional[float] = None,
+                 opened_at: Optional[datetime] = None, retry_at: Optional[datetime] = None,
+                 last_success_at: Optional[datetime] = None, last_failure_at: Optional[datetime] = None,
+                 last_error: Optional[str] = None, clock: Optional[Callable[[], datetime]] = None):
+        self.site = site
+        self.state = state
+        self.failures = failures
+        self.cooldown = cooldown
+        self.opened_at = opened_at
+        self.retry_at = retry_at
+        self.last_success_at = last_success_at
+        self.last_failure_at = last_failure_at
+        self.last_error = last_error
+        self._clock = clock or datetime.utcnow
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"CircuitBreaker({self.site!r}, {self.state}, failures={self.failures})"
+
+    def cooling_down(self, now: Optional[datetime] = None) -> bool:
+        """Open and inside its cool-down: the site is skipped"""
+        now = now or self._clock()
+        return self.state == OPEN and self.retry_at is not None and now < self.retry_at
+
+    def acquire(self) -> bool:
+        """
+        Admit one request, or raise CircuitOpenError. Returns True when the
+        request is the half-open probe, which the caller makes without retries.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return False
+            if self.cooling_down():
+                raise CircuitOpenError(self.site, self.retry_at)
+            if self._probing:
+                raise CircuitOpenError(self.site)
+            self._transition(HALF_OPEN)
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.cooldown = None
+            self.opened_at = self.retry_at = None
+            self.last_success_at = self._clock()
+            self._probing = False
+            if self.state != CLOSED:
+                logging.info(f"[{self.site}] Circuit closed")
+                self._transition(CLOSED)
+
+    def record_failure(self, error):
+        with self._lock:
+            now = self._clock()
+            self.failures += 1
+            self.last_failure_at = now
+            self.last_error = str(error)[:500]
+            if self.state == HALF_OPEN:
+                # The probe failed: wait longer before the next one
+                cooldown = min(
+                    (self.cooldown or CIRCUIT_COOLDOWN_MINUTES * 60) * 2, CIRCUIT_MAX_COOLDOWN_MINUTES * 60)
+            elif self.state == CLOSED and self.failures >= CIRCUIT_FAILURE_THRESHOLD:
+                cooldown = CIRCUIT_COOLDOWN_MINUTES * 60
+            else:
+                return
+            self.cooldown = cooldown
+            self.opened_at = now
+            self.retry_at = now + timedelta(seconds=cooldown)
+            self._probing = False
+            logging.warning(
+                f"[{self.site}] Circuit open for {cooldown / 60:.0f} min after {self.failures} failures: {self.last_error}")
+            self._transition(OPEN)
+
+    def _transition(self, state: str):
+        self.state = state
+        CIRCUIT_TRANSITIONS.labels(self.site, state).inc()
+
+    def to_dict(self) -> Dict:
+        return {
+            'site': self.site,
+            'state': self.state,
+            'consecutive_failures': self.failures,
+            'cooldown_seconds': self.cooldown,
+            'opened_at': self.opened_at,
+            'retry_at': self.retry_at,
+            'last_success_at': self.last_success_at,
+            'last_failure_at': self.last_failure_at,
+            'last_error': self.last_error,
+        }
+
+class CircuitRegistry:
+    """The process's breakers by site, created closed on first use"""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, site: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(site)
+            if breaker is None:
+                breaker = self._breakers[site] = CircuitBreaker(site)
+            return breaker
+
+    def replace(self, breaker: CircuitBreaker):
+        with self._lock:
+            self._breakers[breaker.site] = breaker
+
+breakers = CircuitRegistry()
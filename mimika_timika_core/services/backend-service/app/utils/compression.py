@@ -0,0 +1,182 @@
+"""
+Response compression.
+
+CompressionMiddleware gzip/brotli-encodes any response body over COMPRESS_MIN_SIZE
+bytes for clients that accept it. Hot responses that already have a version
+ETag (the /articles list) go through `response_cache` instead: it keeps the
+compressed bytes per (ETag, encoding), so a repeat request for unchanged data
+skips the query, the JSON encoding and the compression.
+
+Brotli is used when the `brotli` package is installed; gzip otherwise.
+Settings (environment):
+  COMPRESS_MIN_SIZE           smallest body worth compressing (default 1024 bytes)
+  RESPONSE_CACHE_MAX_BYTES    memory budget of response_cache (default 64 MB)
+"""
+
+import gzip
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from fastapi import Response
+from starlette.datastructures import Headers, MutableHeaders
+
+from .timing import add_timing
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml")
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick 'br' or 'gzip' from an Accept-Encoding header (q=0 means refused)"""
+    if not accept_encoding:
+        return None
+    accepted = set()
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.partition(";")
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+def compress(body: bytes, encoding: str) -> bytes:
+    start = time.perf_counter()
+    if encoding == "br":
+        body = brotli.compress(body, quality=BROTLI_QUALITY)
+    else:
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+    add_timing("compress", time.perf_counter() - start)
+    return body
+
+def encode_body(body: bytes, encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """Compress when worthwhile; returns (bytes, Content-Encoding or None)"""
+    if encoding is None or len(body) < COMPRESS_MIN_SIZE:
+        return body, None
+    return compress(body, encoding), encoding
+
+class ResponseCache:
+    """
+    Thread-safe LRU of encoded response bodies keyed on (ETag, encoding),
+    bounded by total size. Only use it with ETags that change whenever the
+    body does (see services/ingest_versions.py).
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, etag: str, encoding: Optional[str]) -> Optional[Tuple[bytes, Optional[str]]]:
+        with self._lock:
+            entry = self._entries.get((etag, encoding))
+            if entry is not None:
+                self._entries.move_to_end((etag, encoding))
+            return entry
+
+    def store(self, etag: str, encoding: Optional[str], body: bytes) -> Tuple[bytes, Optional[str]]:
+        """Encode `body` for `encoding`, cache the result and return it"""
+        entry = encode_body(body, encoding)
+        size = len(entry[0])
+        if size > self.max_bytes:
+            return entry
+        with self._lock:
+            old = self._entries.pop((etag, encoding), None)
+            if old is not None:
+                self.size -= len(old[0])
+            self._entries[(etag, encoding)] = entry
+            self.size += size
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted[0])
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_BYTES)
+
+def encoded_response(body: bytes, content_encoding: Optional[str], headers: dict,
+                     media_type: str = "application/json") -> Response:
+    """Response for bytes that are already encoded (the middleware leaves it alone)"""
+    response = Response(content=body, media_type=media_type, headers=headers)
+    if content_encoding:
+        response.headers["Content-Encoding"] = content_encoding
+    return response
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing single-chunk responses over `minimum_size`.
+    Streaming responses and bodies that already carry a Content-Encoding pass through.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start_message["headers"])
+            content_type = headers.get("content-type", "")
+            if (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or len(body) < self.minimum_size
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            ):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            body = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
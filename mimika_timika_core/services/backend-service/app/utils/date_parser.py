@@ -0,0 +1,240 @@
+"""
+Indonesian date parsing for scraped articles.
+
+Handles the formats the news sites actually serve:
+  - "Senin, 10 Desember 2024 20:15 WIB", "10 Des 2024", "10 Desember 2024 | 20.15 WITA"
+  - "10/12/2024, 20:15 WIB", "10-12-2024"
+  - "2 jam lalu", "5 menit yang lalu", "kemarin", "baru saja"
+  - ISO 8601 ("2024-12-10T20:15:00+07:00", "2024-12-10 20:15:00")
+  - RFC 822 feed dates ("Tue, 10 Dec 2024 20:15:00 +0700")
+  - Unix epoch in seconds or milliseconds (Detik's `d-time` attribute)
+
+All results are timezone-aware. Text without a zone is taken as WIB (Asia/Jakarta).
+The parser that matched last is remembered per source and tried first next time,
+so bulk parsing of one site's dates costs a few regex matches per string. Only
+the whole-string formats (epoch, RFC 822) stay ahead of it: one anchored match
+rules them out, and the cached parser could otherwise misread them (a cached
+'long' would take "10 Dec 2024 13:15:00 GMT" as WIB). Numeric dates are always
+day/month/year, cached or not.
+"""
+
+import re
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, List, Optional
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:
+    # Fallback for older Python versions
+    from backports.zoneinfo import ZoneInfo
+
+JAKARTA = ZoneInfo("Asia/Jakarta")
+
+# Format of the 'date' string in scraped article dicts
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+MONTHS = {
+    'januari': 1, 'jan': 1, 'january': 1,
+    'februari': 2, 'pebruari': 2, 'feb': 2, 'february': 2,
+    'maret': 3, 'mar': 3, 'march': 3,
+    'april': 4, 'apr': 4,
+    'mei': 5, 'may': 5,
+    'juni': 6, 'jun': 6, 'june': 6,
+    'juli': 7, 'jul': 7, 'july': 7,
+    'agustus': 8, 'agu': 8, 'agt': 8, 'ags': 8, 'aug': 8, 'august': 8,
+    'september': 9, 'sep': 9, 'sept': 9,
+    'oktober': 10, 'okt': 10, 'oct': 10, 'october': 10,
+    'november': 11, 'nopember': 11, 'nov': 11, 'nop': 11,
+    'desember': 12, 'des': 12, 'dec': 12, 'december': 12,
+}
+
+# Indonesian time zones
+ZONES = {
+    'wib': timezone(timedelta(hours=7)),
+    'wita': timezone(timedelta(hours=8)),
+    'wit': timezone(timedelta(hours=9)),
+}
+
+RELATIVE_UNITS = {
+    'detik': timedelta(seconds=1),
+    'menit': timedelta(minutes=1),
+    'jam': timedelta(hours=1),
+    'hari': timedelta(days=1),
+    'minggu': timedelta(weeks=1),
+    'pekan': timedelta(weeks=1),
+    'bulan': timedelta(days=30),
+    'tahun': timedelta(days=365),
+}
+
+_EPOCH_RE = re.compile(r'^\s*(\d{10}|\d{13})\s*$')
+_ISO_RE = re.compile(
+    r'(\d{4})-(\d{2})-(\d{2})'
+    r'(?:[T ](\d{2}):(\d{2})(?::(\d{2}))?(?:\.\d+)?)?'
+    r'\s*(Z|[+-]\d{2}:?\d{2})?'
+)
+# RSS pubDate: "Mon, 19 Oct 2026 10:00:00 +0700" (English month, explicit zone)
+_RFC822_RE = re.compile(
+    r'^\s*(?:[A-Za-z]{3},\s*)?\d{1,2}\s+[A-Za-z]{3}\s+\d{4}\s+\d{1,2}:\d{2}(?::\d{2})?\s+(?:[+-]\d{4}|[A-Z]{1,3})\s*$'
+)
+_LONG_RE = re.compile(
+    r'(\d{1,2})\s+([a-z]{3,9})\.?\s+(\d{4})'
+    r'(?:[\s,|\-]+(?:pukul\s+)?(\d{1,2})[:.](\d{2})(?:[:.](\d{2}))?)?'
+    r'\s*(wib|wita|wit)?\b',
+    re.IGNORECASE
+)
+_NUMERIC_RE = re.compile(
+    r'(\d{1,2})[/-](\d{1,2})[/-](\d{4})'
+    r'(?:[\s,|\-]+(?:pukul\s+)?(\d{1,2})[:.](\d{2})(?:[:.](\d{2}))?)?'
+    r'\s*(wib|wita|wit)?\b',
+    re.IGNORECASE
+)
+_RELATIVE_RE = re.compile(
+    r'(\d+)\s+(detik|menit|jam|hari|minggu|pekan|bulan|tahun)\s+(?:yang\s+)?lalu',
+    re.IGNORECASE
+)
+_WORD_RE = re.compile(r'\b(baru saja|kemarin|hari ini)\b', re.IGNORECASE)
+
+# source -> name of the parser that last succeeded for it
+_source_formats: Dict[str, str] = {}
+
+def _zone(name: Optional[str]):
+    return ZONES[name.lower()] if name else JAKARTA
+
+def _build(year, month, day, hour, minute, second, zone_name):
+    return datetime(
+        int(year), int(month), int(day),
+        int(hour or 0), int(minute or 0), int(second or 0),
+        tzinfo=_zone(zone_name)
+    )
+
+def _parse_epoch(text, now):
+    match = _EPOCH_RE.match(text)
+    if not match:
+        return None
+    value = int(match.group(1))
+    if len(match.group(1)) == 13:
+        value //= 1000
+    return datetime.fromtimestamp(value, tz=JAKARTA)
+
+def _parse_iso(text, now):
+    match = _ISO_RE.search(text)
+    if not match:
+        return None
+    year, month, day, hour, minute, second, offset = match.groups()
+    if not offset:
+        return _build(year, month, day, hour, minute, second, None)
+    if offset == 'Z':
+        tz = timezone.utc
+    else:
+        sign = -1 if offset[0] == '-' else 1
+        digits = offset[1:].replace(':', '')
+        tz = timezone(sign * timedelta(hours=int(digits[:2]), minutes=int(digits[2:])))
+    return datetime(int(year), int(month), int(day), int(hour or 0), int(minute or 0), int(second or 0), tzinfo=tz)
+
+def _parse_rfc822(text, now):
+    if not _RFC822_RE.match(text):
+        return None
+    try:
+        value = parsedate_to_datetime(text)
+    except (TypeError, IndexError):
+        # Not an English month name: leave it to _parse_long
+        return None
+    if value.tzinfo is None:
+        # "-0000" means UTC with unknown local zone
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+def _parse_long(text, now):
+    match = _LONG_RE.search(text)
+    if not match:
+        return None
+    day, month_name, year, hour, minute, second, zone_name = match.groups()
+    month = MONTHS.get(month_name.lower())
+    if not month:
+        return None
+    return _build(year, month, day, hour, minute, second, zone_name)
+
+def _parse_numeric(text, now):
+    match = _NUMERIC_RE.search(text)
+    if not match:
+        return None
+    day, month, year, hour, minute, second, zone_name = match.groups()
+    return _build(year, month, day, hour, minute, second, zone_name)
+
+def _parse_relative(text, now):
+    match = _RELATIVE_RE.search(text)
+    if match:
+        return now - int(match.group(1)) * RELATIVE_UNITS[match.group(2).lower()]
+    match = _WORD_RE.search(text)
+    if match:
+        word = match.group(1).lower()
+        return now - timedelta(days=1) if word == 'kemarin' else now
+    return None
+
+# Tried in this order when the source has no cached parser
+PARSERS = (
+    ('epoch', _parse_epoch),
+    ('iso', _parse_iso),
+    ('rfc822', _parse_rfc822),
+    ('long', _parse_long),
+    ('numeric', _parse_numeric),
+    ('relative', _parse_relative),
+)
+# Formats that must match the whole string; tried before any cached parser
+ANCHORED = ('epoch', 'rfc822')
+
+def _order(cached: Optional[str]):
+    """PARSERS with `cached` moved up to right after the anchored formats"""
+    if cached is None:
+        return PARSERS
+    return (
+        tuple(parser for parser in PARSERS if parser[0] in ANCHORED and parser[0] != cached)
+        + tuple(parser for parser in PARSERS if parser[0] == cached)
+        + tuple(parser for parser in PARSERS if parser[0] not in ANCHORED and parser[0] != cached)
+    )
+
+# cached parser name (None: nothing cached) -> order to try the parsers in
+_ORDERS = {name: _order(name) for name in [None, *dict(PARSERS)]}
+
+def parse_date(text, source: Optional[str] = None, now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    Parse an Indonesian date string (or epoch int) into an aware datetime.
+    Returns None when nothing recognizable is found.
+    """
+    if text is None or text == '':
+        return None
+    if isinstance(text, (int, float)):
+        text = str(int(text))
+    if now is None:
+        now = datetime.now(JAKARTA)
+
+    cached = _source_formats.get(source) if source else None
+    for name, parser in _ORDERS[cached]:
+        try:
+            result = parser(text, now)
+        except (ValueError, OverflowError, OSError):
+            # e.g. 31/02/2024 - try the next format
+            continue
+        if result is not None:
+            if source and name != cached:
+                _source_formats[source] = name
+            return result
+    return None
+
+def parse_dates(texts: Iterable, source: Optional[str] = None) -> List[Optional[datetime]]:
+    """Bulk parse_date() sharing one `now` so relative dates are consistent"""
+    now = datetime.now(JAKARTA)
+    return [parse_date(text, source, now) for text in texts]
+
+def format_date(value: datetime) -> str:
+    """Render as a WIB wall-clock DATE_FORMAT string"""
+    if value.tzinfo is not None:
+        value = value.astimezone(JAKARTA)
+    return value.strftime(DATE_FORMAT)
+
+def to_jakarta_naive(value: datetime) -> datetime:
+    """Convert to Jakarta wall-clock time without tzinfo (how the articles table stores dates)"""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(JAKARTA).replace(tzinfo=None)
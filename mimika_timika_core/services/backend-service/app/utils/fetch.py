@@ -0,0 +1,197 @@
+"""
+Shared fetch/parse layer for the scrapers.
+
+fetch_page() wraps requests.get with the retry policy the scrapers used inline
+and records latency, status codes and retries per site; parse_html() builds
+the BeautifulSoup tree (or only the subtrees a scraper reads, with parse_only)
+and records parse time.
+Inside collect_fetch_stats() the fetches of the current thread are also
+tallied per block, which is how scraper_engine attributes pages and bytes
+to each site of a run. Successful responses are also appended to the page
+archive (utils/page_archive.py).
+
+Requests to one host are spaced at least FETCH_HOST_INTERVAL seconds apart
+across every thread of the process (host_limiter), so the pipeline fetch
+threads and the backfill crawler (services/backfill.py) share one budget
+per site. A caller can ask for a longer spacing for its own requests.
+
+Every request is admitted by its site's circuit breaker (utils/circuit.py):
+a site that keeps failing raises CircuitOpenError at once, without
+requests, retries or backoff sleeps, until its cool-down ends.
+
+Settings (environment):
+  FETCH_HOST_INTERVAL  seconds between requests to one host (default 1; 0 on Vercel)
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+
+from .metrics import FETCH_SECONDS, HTTP_RESPONSES, FETCH_RETRIES, PARSE_SECONDS
+from .page_archive import archive_response
+from .circuit import breakers, is_failure_status, CLOSED, CIRCUIT_PROBE_TIMEOUT
+
+_IS_VERCEL = os.environ.get('VERCEL') == '1' or os.environ.get('VERCEL_ENV') is not None
+FETCH_HOST_INTERVAL = float(os.getenv("FETCH_HOST_INTERVAL", "0" if _IS_VERCEL else "1"))
+
+# Errors worth retrying: the connection failed or timed out, not an HTTP error status
+RETRYABLE_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    ConnectionError,
+    TimeoutError,
+)
+
+class FetchStats:
+    """Pages, bytes, 304s and failed fetches counted by collect_fetch_stats()"""
+
+    __slots__ = ('pages', 'bytes', 'not_modified', 'errors')
+
+    def __init__(self):
+        self.pages = 0
+        self.bytes = 0
+        self.not_modified = 0
+        self.errors = 0
+
+    def to_dict(self):
+        return {
+            'pages_fetched': self.pages,
+            'bytes_fetched': self.bytes,
+            'pages_not_modified': self.not_modified,
+            'fetch_errors': self.errors,
+        }
+
+class HostRateLimiter:
+    """
+    Minimum spacing between the starts of requests to one host, shared by
+    all threads. Each caller waits its own interval after the host's last
+    request, so a slow background crawler does not slow the live scrapers.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._last = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str, interval: Optional[float] = None) -> float:
+        """Sleep until `url`'s host may be requested again; returns the seconds slept"""
+        interval = self.interval if interval is None else interval
+        host = urlsplit(url).hostname or ''
+        with self._lock:
+            now = time.monotonic()
+            # Reserve the slot before sleeping, so concurrent callers queue up behind it
+            start = max(now, self._last.get(host, float('-inf')) + interval)
+            self._last[host] = start
+        if start > now:
+            time.sleep(start - now)
+        return max(0.0, start - now)
+
+host_limiter = HostRateLimiter(FETCH_HOST_INTERVAL)
+
+_active = threading.local()
+
+def current_fetch_stats():
+    """The FetchStats this thread is collecting into, or None"""
+    return getattr(_active, 'stats', None)
+
+@contextmanager
+def collect_fetch_stats(stats=None):
+    """
+    Count the fetches made by this thread inside the with-block into a
+    FetchStats. Pass the caller's current_fetch_stats() to keep counting into
+    it from a helper thread (utils/parse_pool.py's fetch stage).
+    """
+    if stats is None:
+        stats = FetchStats()
+    previous = getattr(_active, 'stats', None)
+    _active.stats = stats
+    try:
+        yield stats
+    finally:
+        _active.stats = previous
+
+def fetch_page(site: str, url: str, headers=None, timeout: float = 15, retries: int = 0,
+               backoff: float = 5.0, min_interval: Optional[float] = None) -> requests.Response:
+    """
+    GET `url` for `site` and raise for HTTP error statuses.
+    Connection errors and timeouts are retried `retries` times, sleeping
+    backoff * attempt seconds in between. Each attempt first waits for the
+    host's rate limit (`min_interval` seconds instead of FETCH_HOST_INTERVAL).
+    Raises CircuitOpenError while `site`'s breaker is open; the half-open
+    probe is a single attempt with a CIRCUIT_PROBE_TIMEOUT timeout.
+    """
+    stats = getattr(_active, 'stats', None)
+    breaker = breakers.get(site)
+    for attempt in range(retries + 1):
+        probe = breaker.acquire()
+        host_limiter.wait(url, min_interval)
+        start = time.perf_counter()
+        try:
+            response = requests.get(url, headers=headers,
+                                    timeout=min(timeout, CIRCUIT_PROBE_TIMEOUT) if probe else timeout)
+        except RETRYABLE_ERRORS as e:
+            FETCH_SECONDS.labels(site).observe(time.perf_counter() - start)
+            HTTP_RESPONSES.labels(site, type(e).__name__).inc()
+            if stats is not None:
+                stats.errors += 1
+            breaker.record_failure(e)
+            # No retry ladder once the breaker is not closed
+            if attempt == retries or breaker.state != CLOSED:
+                raise
+            FETCH_RETRIES.labels(site).inc()
+            logging.warning(f"[{site}] Connection error on attempt {attempt + 1}/{retries + 1}, retrying...")
+            time.sleep(backoff * (attempt + 1))
+            continue
+        except Exception as e:
+            breaker.record_failure(e)
+            raise
+
+        FETCH_SECONDS.labels(site).observe(time.perf_counter() - start)
+        HTTP_RESPONSES.labels(site, str(response.status_code)).inc()
+        if stats is not None:
+            stats.pages += 1
+            stats.bytes += len(response.content)
+            if response.status_code == 304:
+                stats.not_modified += 1
+            elif response.status_code >= 400:
+                stats.errors += 1
+        if is_failure_status(response.status_code):
+            breaker.record_failure(f"HTTP {response.status_code}")
+        else:
+            breaker.record_success()
+        if response.status_code == 200:
+            archive_response(site, url, response)
+        response.raise_for_status()
+        return response
+
+def class_strainer(names, *classes: str) -> SoupStrainer:
+    """
+    parse_only spec keeping the `names` elements that carry any of `classes`.
+    While parsing, the strainer sees the raw class attribute ("articleList -list "),
+    so a plain class_='articleList' would miss it: match each class as a word.
+    """
+    pattern = re.compile(r'(?:^|\s)(?:' + '|'.join(re.escape(c) for c in classes) + r')(?:\s|$)')
+    return SoupStrainer(names, class_=pattern)
+
+def parse_html(site: str, markup, features: str = 'html.parser', parse_only=None, **kwargs) -> BeautifulSoup:
+    """
+    BeautifulSoup(markup) with the parse time recorded for `site`.
+    With `parse_only` (a SoupStrainer, see class_strainer) only the matching elements and their
+    subtrees are built; if nothing matches (layout change) the whole page is
+    parsed instead, so the scraper's own fallbacks still see everything.
+    """
+    start = time.perf_counter()
+    soup = BeautifulSoup(markup, features, parse_only=parse_only, **kwargs)
+    if parse_only is not None and soup.find() is None:
+        logging.debug(f"[{site}] Parse-only spec matched nothing, parsing the whole page")
+        soup = BeautifulSoup(markup, features, **kwargs)
+    PARSE_SECONDS.labels(site).observe(time.perf_counter() - start)
+    return soup
@@ -3,12 +3,25 @@ Helper functions for news scraping - Optimized for JSON-only responses
 """
 
 import re
+import html
 import logging
-import json
+import hashlib
+import unicodedata
 from datetime import datetime
 from typing import List, Dict, Any
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 import os
 
+from .date_parser import parse_date, JAKARTA
+
+# Query parameters that never change which article a URL points to
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', '_ga', '_gl', 'ref', 'ref_src',
+    'source', 'src', 'from', 'via', 'share', 'amp', 'outputtype', 'page', 'single',
+    'tag_from', 'medium', 'campaign', 'mc_cid', 'mc_eid', 'igshid',
+}
+TRACKING_PREFIXES = ('utm_', 'utm-', 'mtm_', 'pk_')
+
 def setup_logging():
     """Setup logging configuration"""
     handlers = [logging.StreamHandler()]
@@ -29,54 +42,112 @@ def setup_logging():
     )
     return logging.getLogger(__name__)
 
+# Precompiled pattern for clean_texts(); NUL is reserved as the batch separator
+_TAG_RE = re.compile(r'<[^>\x00]+>')
+_BATCH_SEP = '\x00'
+# Zero-width characters and soft hyphens are dropped (str.split() already treats NBSP etc. as whitespace)
+_INVISIBLE_CHARS = ('\u00ad', '\u200b', '\u200c', '\u200d', '\u2060', '\ufeff')
+
+def clean_texts(texts: List[str]) -> List[str]:
+    """
+    Clean a batch of strings: strip HTML tags, decode HTML entities, drop
+    zero-width characters, collapse whitespace and apply Unicode NFC.
+    The batch is joined so each regex/unescape/normalize runs once per batch
+    instead of once per string.
+    """
+    if not texts:
+        return []
+
+    joined = _BATCH_SEP.join(text.replace(_BATCH_SEP, '') if text else '' for text in texts)
+
+    if '<' in joined:
+        joined = _TAG_RE.sub('', joined)
+    if '&' in joined:
+        joined = html.unescape(joined)
+    if not joined.isascii():
+        for char in _INVISIBLE_CHARS:
+            if char in joined:
+                joined = joined.replace(char, '')
+        joined = unicodedata.normalize('NFC', joined)
+
+    return [' '.join(part.split()) for part in joined.split(_BATCH_SEP)]
+
 def clean_text(text: str) -> str:
     """Clean text by removing extra whitespace and special characters"""
     if not text:
         return ""
+    return clean_texts((text,))[0]
 
-    # Remove extra whitespace
-    text = re.sub(r'\s+', ' ', text.strip())
+def extract_date(date_text: str, source: str = None) -> datetime:
+    """
+    Extract and standardize date from text (Indonesian formats, see utils.date_parser).
+    Returns a timezone-aware datetime, or the current WIB time if nothing is recognized.
+    """
+    return parse_date(date_text, source) or datetime.now(JAKARTA)
 
-    # Remove HTML tags
-    text = re.sub(r'<[^>]+>', '', text)
+def canonicalize_url(url: str) -> str:
+    """
+    Normalize an article URL so that variants of the same page compare equal.
+    Forces https, lowercases the host, drops default ports, fragments, tracking
+    params, pagination/AMP variants and trailing slashes, and sorts the query.
+    """
+    if not url:
+        return ""
 
-    return text
+    url = url.strip()
+    if url.startswith('//'):
+        url = f"https:{url}"
 
-def extract_date(date_text: str) -> datetime:
-    """Extract and standardize date from text"""
-    if not date_text:
-        return datetime.now()
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+
+    scheme = parts.scheme.lower()
+    if scheme not in ('http', 'https'):
+        return url
+
+    host = (parts.hostname or '').lower()
+    if host.startswith('amp.'):
+        host = host[len('amp.'):]
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host if port in (None, 80, 443) else f"{host}:{port}"
 
-    # Common Indonesian date formats
-    date_patterns = [
-        r'(\d{1,2})/(\d{1,2})/(\d{4})',  # DD/MM/YYYY
-        r'(\d{1,2})-(\d{1,2})-(\d{4})',  # DD-MM-YYYY
-        r'(\d{4})-(\d{1,2})-(\d{1,2})',  # YYYY-MM-DD
+    path = re.sub(r'/{2,}', '/', parts.path or '/')
+    # AMP variants: /amp/<path>, <path>/amp, <path>.amp
+    if path.startswith('/amp/'):
+        path = path[len('/amp'):]
+    path = re.sub(r'(/amp|\.amp)/?$', '', path)
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=False)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
     ]
+    query.sort()
+
+    return urlunsplit(('https', netloc, path or '/', urlencode(query), ''))
+
+def url_hash(url: str) -> str:
+    """Fixed-width (40 char) key of the canonical form of a URL"""
+    return hash_canonical_url(canonicalize_url(url))
 
-    for pattern in date_patterns:
-        match = re.search(pattern, date_text)
-        if match:
-            try:
-                if pattern == date_patterns[0] or pattern == date_patterns[1]:
-                    day, month, year = map(int, match.groups())
-                else:
-                    year, month, day = map(int, match.groups())
-                return datetime(year, month, day)
-            except ValueError:
-                continue
-
-    return datetime.now()
-
-def remove_duplicates(articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Remove duplicate articles based on URL"""
-    seen_urls = set()
+def hash_canonical_url(canonical_url: str) -> str:
+    """url_hash() for a URL that has already been through canonicalize_url()"""
+    return hashlib.sha1(canonical_url.encode('utf-8')).hexdigest()
+
+def remove_duplicates(articles: List[Any]) -> List[Any]:
+    """Remove duplicate ScrapedArticle records based on the canonical URL hash"""
+    seen_keys = set()
     unique_articles = []
 
     for article in articles:
-        url = article.get('url', '')
-        if url and url not in seen_urls:
-            seen_urls.add(url)
+        if article.url and article.url_hash not in seen_keys:
+            seen_keys.add(article.url_hash)
             unique_articles.append(article)
 
     return unique_articles
@@ -163,4 +234,29 @@ def validate_source(url: str) -> bool:
         if term in url.lower():
             return False
             
-    return True
\ No newline at end of file
+    return True
+
+def keyword_list(keyword) -> List[str]:
+    """A scraper's `keyword` argument (one string or a collection of strings) as an ordered, de-duplicated list"""
+    if isinstance(keyword, str):
+        return [keyword]
+    return list(dict.fromkeys(keyword))
+
+# Title/URL fragments of pages that are not news articles (site menus, legal pages,
+# galleries, index pages). One list shared by the scrapers, ingest and the junk cleanup.
+JUNK_KEYWORDS = (
+    "tentang kami", "about us", "contact", "hubungi kami", "redaksi",
+    "pedoman", "cyber media", "siber", "privacy", "kebijakan privasi",
+    "disclaimer", "karir", "lowongan", "galeri foto", "video story",
+    "term of use", "ketentuan", "indeks berita", "kabar daerah",
+)
+
+# All keywords in one alternation; a space also matches '-' or '_' so URL slugs hit too
+JUNK_RE = re.compile(
+    '|'.join(re.escape(keyword).replace(r'\ ', r'[\s_-]+') for keyword in JUNK_KEYWORDS),
+    re.IGNORECASE
+)
+
+def is_junk(title: str, url: str = "") -> bool:
+    """True when the title or URL marks a non-article page"""
+    return bool(JUNK_RE.search(title or "") or JUNK_RE.search(url or ""))
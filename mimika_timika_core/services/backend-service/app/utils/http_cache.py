@@ -0,0 +1,75 @@
+"""
+Conditional GET helpers: ETag / Last-Modified / Cache-Control for API responses.
+
+ETags are weak (W/"...") because the same version may be served gzip'd or not.
+Cache lifetimes come from the environment so the edge (nginx, the Node gateway)
+and the API agree:
+  API_CACHE_MAX_AGE  seconds a response is fresh (default 60)
+  API_CACHE_SWR      seconds a stale response may be served while revalidating (default 600)
+"""
+
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Iterable, Optional
+
+from fastapi import Request, Response
+
+CACHE_MAX_AGE = int(os.getenv("API_CACHE_MAX_AGE", "60"))
+CACHE_SWR = int(os.getenv("API_CACHE_SWR", "600"))
+CACHE_CONTROL = f"public, max-age={CACHE_MAX_AGE}, stale-while-revalidate={CACHE_SWR}"
+
+# Request headers that change the article responses
+VARY = "x-region, Accept-Encoding"
+
+def make_etag(*parts) -> str:
+    """Weak ETag from version numbers and query parameters"""
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+def http_date(value: Optional[datetime]) -> Optional[str]:
+    """Format a naive-UTC or aware datetime as an HTTP date"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc).replace(microsecond=0), usegmt=True)
+
+def _etag_values(header: str) -> Iterable[str]:
+    for value in header.split(","):
+        value = value.strip()
+        if value.startswith("W/"):
+            value = value[2:]
+        if value:
+            yield value
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """
+    True when the client's cached copy is current. If-None-Match wins over
+    If-Modified-Since (RFC 9110 13.2.2); ETags compare weakly.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        opaque = etag[2:] if etag.startswith("W/") else etag
+        return any(value in ("*", opaque) for value in _etag_values(if_none_match))
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+    return False
+
+def cache_headers(etag: str, last_modified: Optional[datetime]) -> Dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": VARY}
+    modified = http_date(last_modified)
+    if modified:
+        headers["Last-Modified"] = modified
+    return headers
+
+def not_modified(etag: str, last_modified: Optional[datetime]) -> Response:
+    """Empty 304 carrying the same validators and Cache-Control as the 200 would"""
+    return Response(status_code=304, headers=cache_headers(etag, last_modified))
@@ -0,0 +1,94 @@
+"""
+Prometheus metrics for the scrapers, ingest and the API hot paths, served on /metrics.
+
+prometheus_client is optional: without it every metric below is a no-op and
+/metrics answers 503, so scrapers and scripts run unchanged.
+Site labels are the SCRAPERS keys in services/scraper_engine.py.
+"""
+
+import time
+from contextlib import contextmanager
+
+try:
+    from prometheus_client import Counter, Histogram, CONTENT_TYPE_LATEST, generate_latest
+except ImportError:
+    Counter = Histogram = None
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+    generate_latest = None
+
+class _NoopMetric:
+    """Stands in for a Counter/Histogram when prometheus_client is not installed"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount=1):
+        pass
+
+    def observe(self, amount):
+        pass
+
+def _counter(name, documentation, labelnames=()):
+    if Counter is None:
+        return _NoopMetric()
+    return Counter(name, documentation, labelnames)
+
+def _histogram(name, documentation, labelnames=(), buckets=None):
+    if Histogram is None:
+        return _NoopMetric()
+    if buckets is None:
+        return Histogram(name, documentation, labelnames)
+    return Histogram(name, documentation, labelnames, buckets=buckets)
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 30, 50, 100)
+RUN_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1200)
+
+# Fetch layer (utils/fetch.py)
+FETCH_SECONDS = _histogram(
+    "scraper_fetch_seconds", "HTTP fetch latency per site", ["site"], SECONDS_BUCKETS)
+HTTP_RESPONSES = _counter(
+    "scraper_http_responses_total", "Fetch outcomes per site: HTTP status code or exception name",
+    ["site", "status"])
+FETCH_RETRIES = _counter(
+    "scraper_fetch_retries_total", "Fetches retried after a connection error or timeout", ["site"])
+CIRCUIT_TRANSITIONS = _counter(
+    "scraper_circuit_transitions_total", "Circuit breaker state changes per site (utils/circuit.py)",
+    ["site", "state"])
+PARSE_SECONDS = _histogram(
+    "scraper_parse_seconds", "HTML parse time per page", ["site"], SECONDS_BUCKETS)
+ARTICLES_PER_PAGE = _histogram(
+    "scraper_articles_per_page", "Articles extracted per fetched listing page", ["site"], COUNT_BUCKETS)
+
+# Orchestration and ingest
+SITE_SCRAPE_SECONDS = _histogram(
+    "scraper_site_seconds", "Wall time of one site's scrape inside run_all_scrapers", ["site"], RUN_BUCKETS)
+INGEST_ARTICLES = _counter(
+    "ingest_articles_total", "Articles handled by ingest_articles", ["result"])
+SCHEDULER_RUN_SECONDS = _histogram(
+    "scheduler_run_seconds", "Duration of scheduled/cron scrape + ingest runs", ["status"], RUN_BUCKETS)
+
+# API
+DB_QUERY_SECONDS = _histogram(
+    "api_db_query_seconds", "Database time per endpoint", ["endpoint"], SECONDS_BUCKETS)
+API_REQUEST_SECONDS = _histogram(
+    "api_request_seconds", "Request duration per route template", ["method", "route"], SECONDS_BUCKETS)
+
+@contextmanager
+def timed(histogram, *labels):
+    """Observe the wall time of the with-block on `histogram.labels(*labels)`"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.labels(*labels).observe(time.perf_counter() - start)
+
+def record_page(site: str, articles: int):
+    """Called by scrapers once per listing page with the number of articles it yielded"""
+    ARTICLES_PER_PAGE.labels(site).observe(articles)
+
+def render_latest():
+    """(body, content type) for /metrics, or (None, None) without prometheus_client"""
+    if generate_latest is None:
+        return None, None
+    return generate_latest(), CONTENT_TYPE_LATEST
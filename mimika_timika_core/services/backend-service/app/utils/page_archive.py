@@ -0,0 +1,254 @@
+"""
+Append-only archive of fetched pages, WARC-style.
+
+fetch_page() stores every 200 response here, so the pages behind a run
+outlive it: when a site changes its markup and a scraper silently finds
+nothing, the fixed parser can be re-run over the archived pages
+(scripts/reparse.py) instead of re-crawling, and the archive doubles as a
+parse benchmark corpus.
+
+Layout: <PAGE_ARCHIVE_DIR>/<YYYY-MM-DD>/<site>.warc.gz (UTC day). Each page
+is one gzip member holding a WARC/1.0 `response` record: WARC headers
+(target URI, date, X-Scrape-Site), then the HTTP status line, Content-Type
+and the body. The body is stored decoded (as requests returns it), so
+Content-Encoding is not recorded. Concatenated members are what WARC
+readers expect, and a record is appended with a single write.
+
+Retention runs when a process starts writing a new day: day directories
+older than PAGE_ARCHIVE_MAX_DAYS are removed, then the oldest remaining
+ones until the archive fits in PAGE_ARCHIVE_MAX_MB.
+
+Settings (environment):
+  PAGE_ARCHIVE           archive fetched pages (default 1; 0 on Vercel)
+  PAGE_ARCHIVE_DIR       archive root (default "archive")
+  PAGE_ARCHIVE_MAX_MB    size cap (default 1024)
+  PAGE_ARCHIVE_MAX_DAYS  age cap (default 30)
+"""
+
+import gzip
+import logging
+import os
+import shutil
+import threading
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+_IS_VERCEL = os.environ.get('VERCEL') == '1' or os.environ.get('VERCEL_ENV') is not None
+_TRUE_VALUES = ('1', 'true', 'yes', 'on')
+ARCHIVE_ENABLED = os.getenv("PAGE_ARCHIVE", "0" if _IS_VERCEL else "1").lower() in _TRUE_VALUES
+ARCHIVE_DIR = os.getenv("PAGE_ARCHIVE_DIR", "archive")
+ARCHIVE_MAX_BYTES = int(float(os.getenv("PAGE_ARCHIVE_MAX_MB", "1024")) * 1024 * 1024)
+ARCHIVE_MAX_DAYS = int(os.getenv("PAGE_ARCHIVE_MAX_DAYS", "30"))
+
+SUFFIX = '.warc.gz'
+_WARC_DATE_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+_write_lock = threading.Lock()
+_pruned_day: Optional[str] = None
+
+class ArchivedPage:
+    """One archived response; `fetched_at` is aware UTC, `content` the body bytes"""
+
+    __slots__ = ('site', 'url', 'fetched_at', 'status', 'content_type', 'content')
+
+    def __init__(self, site: str, url: str, fetched_at: datetime, status: int, content_type: str, content: bytes):
+        self.site = site
+        self.url = url
+        self.fetched_at = fetched_at
+        self.status = status
+        self.content_type = content_type
+        self.content = content
+
+    def __repr__(self):
+        return f"ArchivedPage({self.site!r}, {self.url!r}, {self.fetched_at:{_WARC_DATE_FORMAT}})"
+
+    @property
+    def text(self) -> str:
+        """Body decoded with the charset of its Content-Type (UTF-8 otherwise)"""
+        charset = 'utf-8'
+        for param in self.content_type.split(';')[1:]:
+            name, _, value = param.strip().partition('=')
+            if name.lower() == 'charset' and value:
+                charset = value.strip('"\'')
+        try:
+            return self.content.decode(charset, errors='replace')
+        except LookupError:
+            return self.content.decode('utf-8', errors='replace')
+
+def _header_value(value: str) -> str:
+    # Header values must stay on one line
+    return value.replace('\r', ' ').replace('\n', ' ')
+
+def build_record(site: str, url: str, status: int, content_type: str, content: bytes,
+                 fetched_at: datetime) -> bytes:
+    """One gzip member holding the WARC response record of a page"""
+    http_block = (
+        f"HTTP/1.1 {status}\r\n"
+        f"Content-Type: {_header_value(content_type)}\r\n"
+        f"Content-Length: {len(content)}\r\n"
+        "\r\n"
+    ).encode('latin-1', errors='replace') + content
+    warc_headers = (
+        "WARC/1.0\r\n"
+        "WARC-Type: response\r\n"
+        f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>\r\n"
+        f"WARC-Date: {fetched_at.astimezone(timezone.utc):{_WARC_DATE_FORMAT}}\r\n"
+        f"WARC-Target-URI: {_header_value(url)}\r\n"
+        f"X-Scrape-Site: {_header_value(site)}\r\n"
+        "Content-Type: application/http; msgtype=response\r\n"
+        f"Content-Length: {len(http_block)}\r\n"
+        "\r\n"
+    ).encode('utf-8')
+    return gzip.compress(warc_headers + http_block + b"\r\n\r\n")
+
+def archive_page(site: str, url: str, status: int, content_type: str, content: bytes,
+                 fetched_at: Optional[datetime] = None, directory: Optional[str] = None):
+    """
+    Append one page to today's archive file of `site`. Archiving must never
+    fail a scrape: errors are logged and swallowed.
+    """
+    global _pruned_day
+    directory = directory or ARCHIVE_DIR
+    fetched_at = fetched_at or datetime.now(timezone.utc)
+    day = fetched_at.astimezone(timezone.utc).strftime('%Y-%m-%d')
+    try:
+        record = build_record(site, url, status, content_type or '', content or b'', fetched_at)
+        day_dir = os.path.join(directory, day)
+        with _write_lock:
+            if _pruned_day != day:
+                _pruned_day = day
+                prune(directory)
+            os.makedirs(day_dir, exist_ok=True)
+            with open(os.path.join(day_dir, f"{site}{SUFFIX}"), 'ab') as f:
+                f.write(record)
+    except Exception as e:
+        logger.warning(f"[{site}] Could not archive {url}: {e}")
+
+def archive_response(site: str, url: str, response):
+    """archive_page() for the requests.Response of `url`, when archiving is enabled"""
+    if ARCHIVE_ENABLED:
+        archive_page(site, url, response.status_code,
+                     response.headers.get('Content-Type', ''), response.content)
+
+def _day_dirs(directory: str):
+    """(day, path) of the archive's day directories, oldest first"""
+    try:
+        names = sorted(os.listdir(directory))
+    except FileNotFoundError:
+        return []
+    days = []
+    for name in names:
+        try:
+            day = date.fromisoformat(name)
+        except ValueError:
+            continue
+        path = os.path.join(directory, name)
+        if os.path.isdir(path):
+            days.append((day, path))
+    return days
+
+def _dir_size(path: str) -> int:
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+def prune(directory: Optional[str] = None, max_bytes: int = ARCHIVE_MAX_BYTES,
+          max_days: int = ARCHIVE_MAX_DAYS, today: Optional[date] = None):
+    """
+    Apply retention: drop day directories older than `max_days`, then the
+    oldest ones until the archive fits in `max_bytes` (today's is kept).
+    Returns (directories removed, bytes freed).
+    """
+    directory = directory or ARCHIVE_DIR
+    today = today or datetime.now(timezone.utc).date()
+    oldest_kept = today - timedelta(days=max_days)
+    days = [(day, path, _dir_size(path)) for day, path in _day_dirs(directory)]
+    total = sum(size for _, _, size in days)
+    removed = 0
+    freed = 0
+    for day, path, size in days:
+        if day >= today:
+            break
+        if day >= oldest_kept and total <= max_bytes:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+        freed += size
+        removed += 1
+    if removed:
+        logger.info(f"Page archive: removed {removed} day(s), {freed / 1024 / 1024:.1f} MB")
+    return removed, freed
+
+def _read_headers(stream) -> Optional[dict]:
+    """Header lines up to the blank line as a dict (lowercased names); None at end of stream"""
+    line = stream.readline()
+    while line in (b'\r\n', b'\n'):
+        line = stream.readline()
+    if not line:
+        return None
+    headers = {'': line.strip().decode('latin-1')}
+    for line in iter(stream.readline, b''):
+        if line in (b'\r\n', b'\n'):
+            break
+        name, _, value = line.decode('utf-8', errors='replace').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    return headers
+
+def read_archive_file(path: str, site: Optional[str] = None) -> Iterator[ArchivedPage]:
+    """
+    Pages of one archive file in write order. A truncated last record (the
+    process died mid-write) ends the file with a warning.
+    """
+    site = site or os.path.basename(path)[:-len(SUFFIX)]
+    with gzip.open(path, 'rb') as stream:
+        while True:
+            try:
+                warc = _read_headers(stream)
+                if warc is None:
+                    return
+                block = stream.read(int(warc.get('content-length', '0')))
+            except (EOFError, OSError, ValueError) as e:
+                logger.warning(f"Page archive {path} ends with a damaged record: {e}")
+                return
+            if warc.get('warc-type') != 'response':
+                continue
+            head, _, body = block.partition(b'\r\n\r\n')
+            status_line, *header_lines = head.decode('latin-1').split('\r\n')
+            content_type = ''
+            for line in header_lines:
+                name, _, value = line.partition(':')
+                if name.strip().lower() == 'content-type':
+                    content_type = value.strip()
+            parts = status_line.split()
+            yield ArchivedPage(
+                site=warc.get('x-scrape-site') or site,
+                url=warc.get('warc-target-uri', ''),
+                fetched_at=datetime.strptime(warc['warc-date'], _WARC_DATE_FORMAT).replace(tzinfo=timezone.utc),
+                status=int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 0,
+                content_type=content_type,
+                content=body,
+            )
+
+def iter_pages(directory: Optional[str] = None, sites: Optional[Iterable[str]] = None,
+               since: Optional[datetime] = None, until: Optional[datetime] = None) -> Iterator[ArchivedPage]:
+    """
+    Archived pages, oldest day first, optionally only of `sites` and fetched
+    in [since, until) (aware datetimes).
+    """
+    directory = directory or ARCHIVE_DIR
+    sites = set(sites) if sites else None
+    for day, path in _day_dirs(directory):
+        if since is not None and day < since.astimezone(timezone.utc).date():
+            continue
+        if until is not None and day > until.astimezone(timezone.utc).date():
+            break
+        for name in sorted(os.listdir(path)):
+            if not name.endswith(SUFFIX) or (sites is not None and name[:-len(SUFFIX)] not in sites):
+                continue
+            for page in read_archive_file(os.path.join(path, name)):
+                if since is not None and page.fetched_at < since:
+                    continue
+                if until is not None and page.fetched_at >= until:
+                    continue
+                yield page
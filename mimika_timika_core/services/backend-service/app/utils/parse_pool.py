@@ -0,0 +1,268 @@
+"""
+Fetch/parse pipeline for the paginated search scrapers (Antara, Kompas, Detik).
+
+BeautifulSoup parsing holds the GIL, so a scraper that fetches and parses
+page by page spends most of a run either waiting on the network or parsing
+while nothing is fetched. PagePipeline splits the two:
+
+- a fetch thread downloads the pages of a scrape in order and hands the raw
+  bytes over through a bounded queue (PARSE_QUEUE_SIZE pages), so it blocks
+  instead of buffering when parsing falls behind
+- each page is parsed by a module-level parse function of the scraper in a
+  shared ProcessPoolExecutor (PARSE_WORKERS processes), with at most one
+  page per worker in flight; only the raw bytes go to a worker and only the
+  parsed ScrapedArticle records come back
+
+With PARSE_WORKERS=0 (the default on Vercel, where worker processes are not
+available) pages are parsed in the calling thread, still overlapping the
+next fetch. Results come back in page order, so the scraper keeps deciding
+when to stop (empty page, no next link); leaving the with-block stops the
+fetch thread, which is at most a few pages ahead. With a run budget
+(utils/budget.py) the fetch thread also stops, after the pages it already
+has, once the next page would not fit before the deadline.
+
+Inside inline_pipelines() (a profiled section, utils/profiling.py) pipelines
+fetch and parse in the calling thread, one page after the other: profilers
+only see the thread they run in, which would otherwise just wait on queues.
+
+Settings (environment):
+  PARSE_WORKERS     parse processes (default min(4, CPUs); 0 on Vercel)
+  PARSE_QUEUE_SIZE  fetched pages waiting for a parse slot (default 2)
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from typing import Any, Callable, Iterable, Optional
+
+from .fetch import collect_fetch_stats, current_fetch_stats
+from .metrics import PARSE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+_IS_VERCEL = os.environ.get('VERCEL') == '1' or os.environ.get('VERCEL_ENV') is not None
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "0" if _IS_VERCEL else str(min(4, os.cpu_count() or 1))))
+PARSE_QUEUE_SIZE = max(1, int(os.getenv("PARSE_QUEUE_SIZE", "2")))
+
+_pool = None
+_pool_lock = threading.Lock()
+# Per thread: whether pipelines created in it run inline
+_inline = threading.local()
+
+def parse_pool() -> Optional[ProcessPoolExecutor]:
+    """The shared parse process pool, created on first use; None when parsing inline"""
+    global _pool
+    if PARSE_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            try:
+                # spawn: the API process runs scheduler and fetch threads, which fork() would copy mid-lock
+                _pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=get_context("spawn"))
+            except (OSError, NotImplementedError) as e:
+                logger.warning(f"Parse pool unavailable, parsing inline: {e}")
+                return None
+        return _pool
+
+def shutdown_parse_pool():
+    """Stop the worker processes (app shutdown, or after the pool broke)"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+@contextmanager
+def inline_pipelines():
+    """Make the PagePipelines created by this thread inside the with-block fetch and parse in it"""
+    previous = getattr(_inline, 'active', False)
+    _inline.active = True
+    try:
+        yield
+    finally:
+        _inline.active = previous
+
+def _timed_parse(parse: Callable, content: bytes, job: Any):
+    """Worker side: parse one page and report the parse time to the parent"""
+    start = time.perf_counter()
+    result = parse(content, job)
+    return result, time.perf_counter() - start
+
+class ParsedPage:
+    """One job's outcome: `result` of the parse function, or the fetch/parse `error`"""
+
+    __slots__ = ('job', 'result', 'error')
+
+    def __init__(self, job, result=None, error: Optional[BaseException] = None):
+        self.job = job
+        self.result = result
+        self.error = error
+
+_DONE = object()
+
+class PagePipeline:
+    """
+    Fetch the pages of `jobs` in a background thread and parse them in the
+    parse pool; iterate inside the with-block to get ParsedPages in job order:
+
+        with PagePipeline('kompas', page_numbers(), fetch, parse_search_page) as pages:
+            for page in pages:
+                ...
+
+    fetch(job) returns the page bytes. parse(content, job) must be a
+    module-level function (it is pickled to the worker) returning picklable
+    records. `delay()` gives the pause before each fetch after the first.
+    `budget` (a ScrapeBudget) is asked before each fetch and told its cost.
+    """
+
+    def __init__(self, site: str, jobs: Iterable, fetch: Callable[[Any], bytes],
+                 parse: Callable[[bytes, Any], Any], delay: Optional[Callable[[], float]] = None,
+                 budget=None):
+        self.site = site
+        self.jobs = jobs
+        self.fetch = fetch
+        self.parse = parse
+        self.delay = delay
+        self.budget = budget
+        self._pages = queue.Queue(maxsize=PARSE_QUEUE_SIZE)
+        self._stop = threading.Event()
+        self._in_flight = deque()
+        self._fetcher = None
+        if not getattr(_inline, 'active', False):
+            self._fetcher = threading.Thread(
+                target=self._fetch_stage, args=(current_fetch_stats(),), name=f"fetch-{site}", daemon=True
+            )
+
+    def __enter__(self):
+        if self._fetcher is not None:
+            self._fetcher.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        for _, future, _, _ in self._in_flight:
+            if future is not None:
+                future.cancel()
+        self._in_flight.clear()
+        # The fetch thread notices the stop between requests; wait so its
+        # counters and connections do not spill into the next site
+        if self._fetcher is not None:
+            self._fetcher.join()
+        return False
+
+    def _put(self, item) -> bool:
+        """Queue `item`, waiting for room; False once the consumer has stopped"""
+        while not self._stop.is_set():
+            try:
+                self._pages.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _fetches(self):
+        """(job, content, error) per job, paced by delay() and the budget, until stopped"""
+        first = True
+        for job in self.jobs:
+            delay = self.delay() if not first and self.delay is not None else 0
+            if self.budget is not None and not self.budget.allows(self.site, delay):
+                logger.info(f"[{self.site}] Run deadline near, not fetching {job!r}")
+                return
+            if delay and self._stop.wait(delay):
+                return
+            first = False
+            if self._stop.is_set():
+                return
+            start = time.monotonic()
+            try:
+                item = (job, self.fetch(job), None)
+            except Exception as e:
+                item = (job, None, e)
+            if self.budget is not None:
+                self.budget.record_page(self.site, time.monotonic() - start + delay)
+            yield item
+
+    def _fetch_stage(self, stats):
+        with collect_fetch_stats(stats):
+            for item in self._fetches():
+                if not self._put(item):
+                    return
+        self._put(_DONE)
+
+    def _inline_pages(self):
+        for job, content, error in self._fetches():
+            if error is not None:
+                yield ParsedPage(job, error=error)
+                continue
+            try:
+                page = ParsedPage(job, result=self.parse(content, job))
+            except Exception as e:
+                page = ParsedPage(job, error=e)
+            yield page
+
+    def _submit(self, pool, job, content):
+        try:
+            return pool.submit(_timed_parse, self.parse, content, job)
+        except (BrokenProcessPool, RuntimeError) as e:
+            logger.warning(f"[{self.site}] Parse pool unusable, parsing inline: {e}")
+            shutdown_parse_pool()
+            return None
+
+    def _result(self, future, job, content):
+        if future is not None:
+            try:
+                result, seconds = future.result()
+            except BrokenProcessPool as e:
+                # A worker died (e.g. out of memory): restart the pool next time, parse this page here
+                logger.warning(f"[{self.site}] Parse worker failed, parsing inline: {e}")
+                shutdown_parse_pool()
+            else:
+                PARSE_SECONDS.labels(self.site).observe(seconds)
+                return result
+        # Inline parse: parse_html records its own time
+        return self.parse(content, job)
+
+    def __iter__(self):
+        if self._fetcher is None:
+            yield from self._inline_pages()
+            return
+        pool = parse_pool()
+        window = max(1, PARSE_WORKERS)
+        done = False
+        while True:
+            # Hand fetched pages to the pool until every worker has one; only wait
+            # for the fetcher when there is nothing to collect meanwhile
+            while not done and len(self._in_flight) < window:
+                try:
+                    item = self._pages.get(block=not self._in_flight)
+                except queue.Empty:
+                    break
+                if item is _DONE:
+                    done = True
+                    break
+                job, content, error = item
+                future = None
+                if error is None and pool is not None:
+                    future = self._submit(pool, job, content)
+                    if future is None:
+                        pool = None
+                self._in_flight.append((job, future, content, error))
+
+            if not self._in_flight:
+                return
+            job, future, content, error = self._in_flight.popleft()
+            if error is not None:
+                yield ParsedPage(job, error=error)
+                continue
+            try:
+                page = ParsedPage(job, result=self._result(future, job, content))
+            except Exception as e:
+                page = ParsedPage(job, error=e)
+            yield page
@@ -0,0 +1,120 @@
+"""
+Opt-in profiling of scrape runs.
+
+A run is profiled when SCRAPE_PROFILE is set (1/true, or a backend name:
+pyinstrument / cprofile) or when the caller asks for it (/ingest/run?profile=1).
+Each site, the dedup/region pass and ingest are profiled as separate sections,
+written to <SCRAPE_PROFILE_DIR>/<run>/<section>.<ext>:
+
+- pyinstrument (sampling, preferred when installed): .speedscope.json,
+  open in https://www.speedscope.app
+- cProfile fallback: .prof, open with snakeviz or flameprof
+
+Profilers only sample the thread that starts them, so inside a section the
+paginated scrapers fetch and parse in that thread instead of their fetch
+thread and parse pool (utils/parse_pool.py inline_pipelines): the profile
+shows network, parse and normalization time, at the cost of a slower run.
+
+When profiling is off, profile_session() returns None and profiled() is a
+plain with-block, so the scrape path pays one None check per section.
+"""
+
+import cProfile
+import logging
+import os
+import re
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Optional
+
+from .parse_pool import inline_pipelines
+
+try:
+    from pyinstrument import Profiler as SamplingProfiler
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError:
+    SamplingProfiler = None
+    SpeedscopeRenderer = None
+
+logger = logging.getLogger(__name__)
+
+_IS_VERCEL = os.environ.get('VERCEL') == '1' or os.environ.get('VERCEL_ENV') is not None
+# Serverless filesystems are read-only outside /tmp
+PROFILE_DIR = os.getenv("SCRAPE_PROFILE_DIR", "/tmp/profiles" if _IS_VERCEL else "profiles")
+PROFILE_INTERVAL = float(os.getenv("SCRAPE_PROFILE_INTERVAL", "0.001"))  # pyinstrument sampling, seconds
+
+_TRUE_VALUES = ('1', 'true', 'yes', 'on')
+_SAFE_NAME_RE = re.compile(r'[^A-Za-z0-9_.-]+')
+
+class ProfileSession:
+    """Profiles the named sections of one run into its own directory"""
+
+    def __init__(self, directory: str, backend: str):
+        self.directory = directory
+        self.backend = backend
+        self.files: List[str] = []
+
+    @contextmanager
+    def section(self, name: str):
+        path = os.path.join(self.directory, _SAFE_NAME_RE.sub('_', name))
+        if self.backend == 'pyinstrument':
+            profiler = SamplingProfiler(interval=PROFILE_INTERVAL)
+            profiler.start()
+            try:
+                with inline_pipelines():
+                    yield
+            finally:
+                profiler.stop()
+                self._write(path + '.speedscope.json', lambda p: _write_text(p, profiler.output(SpeedscopeRenderer())))
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                with inline_pipelines():
+                    yield
+            finally:
+                profiler.disable()
+                self._write(path + '.prof', profiler.dump_stats)
+
+    def _write(self, path: str, writer):
+        # A profile that cannot be written must not fail the run it measured
+        try:
+            writer(path)
+            self.files.append(path)
+        except Exception as e:
+            logger.warning(f"Could not write profile {path}: {e}")
+
+def _write_text(path: str, text: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+def _backend(setting: str) -> str:
+    if setting == 'cprofile' or SamplingProfiler is None:
+        return 'cprofile'
+    return 'pyinstrument'
+
+def profile_session(requested: bool = False, label: str = "run") -> Optional[ProfileSession]:
+    """
+    A ProfileSession when `requested` or SCRAPE_PROFILE enables profiling, else None.
+    `label` (e.g. the trigger) is appended to the run directory name.
+    """
+    setting = os.getenv("SCRAPE_PROFILE", "").strip().lower()
+    if not requested and setting not in _TRUE_VALUES + ('pyinstrument', 'cprofile'):
+        return None
+
+    directory = os.path.join(PROFILE_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{label}")
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except OSError as e:
+        logger.warning(f"Profiling disabled, cannot create {directory}: {e}")
+        return None
+    return ProfileSession(directory, _backend(setting))
+
+@contextmanager
+def profiled(session: Optional[ProfileSession], name: str):
+    """Profile the with-block as section `name` of `session`; no-op when session is None"""
+    if session is None:
+        yield
+        return
+    with session.section(name):
+        yield
@@ -0,0 +1,101 @@
+"""
+Typed record for scraped articles, shared by scrapers, scraper_engine and ingest
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from .helpers import canonicalize_url, hash_canonical_url, normalize_category
+from .date_parser import parse_date, format_date, to_jakarta_naive, JAKARTA
+
+class ScrapedArticle:
+    """
+    One scraped article. The URL is canonicalized and hashed, the category
+    normalized and the date parsed once, when the record is built. Only the
+    category itself is normalized here; scrapers that classify from the
+    title and URL pass normalize_category(raw, title, url).
+    `published_at` is an aware datetime or None when the site gave no date.
+    """
+
+    __slots__ = (
+        'title', 'url', 'url_hash', 'description', 'published_at',
+        'category', 'source', 'image_url', 'region', 'search_keyword',
+    )
+
+    def __init__(
+        self,
+        title: str,
+        url: str,
+        description: str = "",
+        published_at: Optional[datetime] = None,
+        category: str = "news",
+        source: str = "Unknown",
+        image_url: Optional[str] = None,
+        region: str = "general",
+        search_keyword: Optional[str] = None,
+    ):
+        self.title = title
+        self.url = canonicalize_url(url)
+        self.url_hash = hash_canonical_url(self.url)
+        self.description = description or ""
+        self.published_at = published_at
+        self.category = normalize_category(category)
+        self.source = source
+        self.image_url = image_url or None
+        self.region = region
+        self.search_keyword = search_keyword
+
+    def __repr__(self):
+        return f"ScrapedArticle({self.source!r}, {self.url!r})"
+
+    @property
+    def date(self) -> str:
+        """Publication date as a WIB 'YYYY-MM-DD HH:MM:SS' string ('' if unknown)"""
+        return format_date(self.published_at) if self.published_at else ""
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ScrapedArticle":
+        """Build from a legacy article dict (url/source_url, description/summary, date/published_at)"""
+        published_at = data.get('published_at') or data.get('date')
+        if not isinstance(published_at, datetime):
+            published_at = parse_date(published_at, source=data.get('source'))
+        return cls(
+            title=data.get('title', 'No Title'),
+            url=data.get('url') or data.get('source_url', ''),
+            description=data.get('description') or data.get('summary', ''),
+            published_at=published_at,
+            category=data.get('category', 'news'),
+            source=data.get('source') or data.get('source_name', 'Unknown'),
+            image_url=data.get('image_url'),
+            region=data.get('region', 'general'),
+            search_keyword=data.get('search_keyword'),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-ready dict using the keys the scraper API has always returned"""
+        return {
+            'title': self.title,
+            'url': self.url,
+            'url_hash': self.url_hash,
+            'description': self.description,
+            'date': self.date,
+            'category': self.category,
+            'source': self.source,
+            'image_url': self.image_url or "",
+            'region': self.region,
+            'search_keyword': self.search_keyword,
+        }
+
+    def to_row(self) -> Dict[str, Any]:
+        """Column values for models.Article (dates stored as naive WIB, the current WIB time when unknown)"""
+        return {
+            'title': self.title or 'No Title',
+            'summary': self.description,
+            'source_url': self.url,
+            'url_hash': self.url_hash,
+            'source_name': self.source,
+            'category': self.category,
+            'region': self.region,
+            'image_url': self.image_url,
+            'published_at': to_jakarta_naive(self.published_at or datetime.now(JAKARTA)),
+        }
@@ -0,0 +1,98 @@
+"""
+Region attribution for scraped articles.
+
+Each site is searched once for all region keywords together, so the region
+comes from the article text (title + description) rather than from which
+keyword's search happened to return it. classify_regions() labels a whole
+batch with one regex pass over the joined titles and one over the joined
+descriptions of the articles whose title named no region. An article whose
+text names no region (the term is in its body) keeps the region of the
+search that found it, ScrapedArticle.search_keyword, as it did when each
+region was scraped separately.
+"""
+
+import re
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+# Region -> terms that place an article in it. Their union is what the scrapers search for.
+REGION_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    'timika': ('timika',),
+    'mimika': ('mimika',),
+}
+
+# Articles naming more than one region; both portals show them
+BOTH_REGION = 'both'
+# Articles naming no region and found by no region's search; shown on every portal
+DEFAULT_REGION = 'general'
+
+SEARCH_KEYWORDS = [term for terms in REGION_KEYWORDS.values() for term in terms]
+_TERM_REGIONS = {term: region for region, terms in REGION_KEYWORDS.items() for term in terms}
+
+# One named group per region, so match.lastgroup is the region itself
+_REGION_RE = re.compile(
+    r'\b(?:' + '|'.join(
+        f"(?P<{region}>" + '|'.join(re.escape(term) for term in terms) + ')'
+        for region, terms in REGION_KEYWORDS.items()
+    ) + r')\b',
+    re.IGNORECASE
+)
+_SEP = '\x00'
+
+def _regions_per_text(texts: Sequence[str]) -> List[Set[str]]:
+    """Region sets for each text, from a single finditer over the joined batch"""
+    found = [set() for _ in texts]
+    if not texts:
+        return found
+    # Matches arrive in order, so walk the text boundaries forward instead of searching them
+    index = 0
+    end = len(texts[0])
+    for match in _REGION_RE.finditer(_SEP.join(texts)):
+        position = match.start()
+        while position > end:
+            index += 1
+            end += len(texts[index]) + 1
+        found[index].add(match.lastgroup)
+    return found
+
+def keyword_region(keyword: Optional[str]) -> Optional[str]:
+    """Region of a search term (ScrapedArticle.search_keyword), None for other or no keywords"""
+    return _TERM_REGIONS.get((keyword or "").strip().lower())
+
+def classify_regions(titles: Sequence[str], descriptions: Sequence[str],
+                     fallbacks: Optional[Sequence[Optional[str]]] = None) -> List[str]:
+    """
+    Region label per article. The title decides when it names any region;
+    otherwise the description does. Datelines like "Timika (ANTARA) -" put a
+    second region term in many descriptions, so the title goes first.
+    One region -> that region, several -> BOTH_REGION, none -> the article's
+    `fallbacks` entry (its search region) or DEFAULT_REGION.
+    """
+    labels = []
+    by_title = _regions_per_text([title or "" for title in titles])
+    # Only articles whose title named nothing need their description scanned
+    undecided = [i for i, regions in enumerate(by_title) if not regions]
+    by_description = _regions_per_text([descriptions[i] or "" for i in undecided])
+    for i, regions in zip(undecided, by_description):
+        by_title[i] = regions
+
+    for i, regions in enumerate(by_title):
+        if not regions:
+            labels.append((fallbacks[i] if fallbacks else None) or DEFAULT_REGION)
+        elif len(regions) == 1:
+            labels.append(next(iter(regions)))
+        else:
+            labels.append(BOTH_REGION)
+    return labels
+
+def classify_region(title: str, description: str = "") -> str:
+    """classify_regions() for a single article"""
+    return classify_regions([title], [description])[0]
+
+def assign_regions(articles) -> None:
+    """Set `.region` on ScrapedArticle records in one batch"""
+    labels = classify_regions(
+        [a.title for a in articles], [a.description for a in articles],
+        [keyword_region(a.search_keyword) for a in articles],
+    )
+    for article, label in zip(articles, labels):
+        article.region = label
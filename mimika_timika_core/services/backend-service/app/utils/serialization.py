@@ -0,0 +1,59 @@
+"""
+Fast JSON responses for article endpoints.
+
+Rows read from our own database are already valid, so the article endpoints
+map them to plain dicts and encode them in one call instead of letting FastAPI
+validate each row against ArticleResponse and run jsonable_encoder over it.
+orjson is used when installed; the stdlib json module is the fallback.
+"""
+
+import json
+import time
+from datetime import date, datetime
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from .timing import add_timing
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Columns returned by the article endpoints, in ArticleResponse order
+ARTICLE_FIELDS = (
+    "title", "summary", "content", "image_url", "source_url", "source_name",
+    "category", "region", "published_at", "id", "created_at",
+)
+
+def article_columns(model):
+    """Column attributes for query.with_entities(), so rows skip ORM object construction"""
+    return [getattr(model, field) for field in ARTICLE_FIELDS]
+
+def row_to_dict(row) -> dict:
+    """Map a with_entities() row or an ORM Article to the response dict"""
+    if hasattr(row, "_mapping"):
+        return dict(row._mapping)
+    return {field: getattr(row, field) for field in ARTICLE_FIELDS}
+
+def _default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    """Encode to compact UTF-8 JSON bytes (timed as the request's `serialize` timing)"""
+    start = time.perf_counter()
+    if orjson is not None:
+        body = orjson.dumps(content)
+    else:
+        body = json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    add_timing("serialize", time.perf_counter() - start)
+    return body
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (or compact stdlib json)"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,220 @@
+"""
+Structured data embedded in news pages: JSON-LD (NewsArticle, ItemList),
+OpenGraph / article:* meta tags and app state such as Next.js __NEXT_DATA__.
+
+extract_structured() reads all of them in one regex scan of the raw HTML,
+so a scraper gets title, date, image and description without building a
+BeautifulSoup tree. Scrapers fall back to their CSS selectors and link
+harvesting only for what the page does not declare.
+"""
+
+import html
+import json
+import re
+from typing import Iterable, List, Optional
+from urllib.parse import urljoin
+
+# Every <script>...</script> and <meta ...> in document order; attributes are checked afterwards
+_TAG_RE = re.compile(r'<script\b([^>]*)>(.*?)</script\s*>|<meta\b([^>]*)>', re.IGNORECASE | re.DOTALL)
+_ATTR_RE = re.compile(r'([\w:.-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+))')
+
+ARTICLE_TYPES = {'NewsArticle', 'Article', 'ReportageNewsArticle', 'AnalysisNewsArticle', 'BlogPosting'}
+META_FIELDS = {
+    'og:title': 'title',
+    'og:description': 'description',
+    'og:image': 'image',
+    'og:url': 'url',
+    'article:published_time': 'published',
+}
+
+# Key spellings of article-like objects in embedded app state, in order of preference
+TITLE_KEYS = ('headline', 'title', 'name')
+# App state is full of named things with URLs (authors, tags, channels): articles have a title
+APP_STATE_TITLE_KEYS = ('headline', 'title')
+URL_KEYS = ('url', 'canonicalUrl', 'canonical_url', 'link', 'permalink', 'shareUrl')
+DATE_KEYS = ('datePublished', 'publishedAt', 'published_at', 'publishDate', 'publish_date', 'date')
+IMAGE_KEYS = ('image', 'thumbnailUrl', 'thumbnail', 'imageUrl', 'image_url', 'coverImage')
+DESCRIPTION_KEYS = ('description', 'summary', 'excerpt', 'lead')
+
+# Bounds for walking app-state JSON, which can be large
+MAX_DEPTH = 12
+MAX_ARTICLES = 200
+
+class StructuredArticle:
+    """One article declared by the page (raw strings; published is unparsed)"""
+
+    __slots__ = ('title', 'url', 'description', 'published', 'image')
+
+    def __init__(self, title="", url="", description="", published="", image=""):
+        self.title = title
+        self.url = url
+        self.description = description
+        self.published = published
+        self.image = image
+
+    def __repr__(self):
+        return f"StructuredArticle({self.url!r})"
+
+class StructuredData:
+    """
+    Page-level fields (from the first NewsArticle JSON-LD, completed by meta
+    tags) and `articles`, every article object the page lists.
+    """
+
+    __slots__ = ('title', 'url', 'description', 'published', 'image', 'articles')
+
+    def __init__(self):
+        self.title = ""
+        self.url = ""
+        self.description = ""
+        self.published = ""
+        self.image = ""
+        self.articles: List[StructuredArticle] = []
+
+def _attrs(text: str) -> dict:
+    return {
+        name.lower(): html.unescape(double or single or bare)
+        for name, double, single, bare in _ATTR_RE.findall(text)
+    }
+
+def _first_string(value) -> str:
+    """A string from a JSON value that may be a string, a list or an {url/src} object"""
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, list):
+        for item in value:
+            found = _first_string(item)
+            if found:
+                return found
+        return ""
+    if isinstance(value, dict):
+        for key in ('url', 'src', 'contentUrl', '@id'):
+            if isinstance(value.get(key), str):
+                return value[key].strip()
+    return ""
+
+def _pick(obj: dict, keys: Iterable[str]) -> str:
+    for key in keys:
+        if key in obj:
+            found = _first_string(obj[key])
+            if found:
+                return found
+    return ""
+
+def _article(obj: dict, base_url: Optional[str], title_keys=TITLE_KEYS) -> Optional[StructuredArticle]:
+    """StructuredArticle from an object with a title and a URL, else None"""
+    title = _pick(obj, title_keys)
+    url = _pick(obj, URL_KEYS) or _first_string(obj.get('mainEntityOfPage'))
+    if not title or not url or not url.startswith(('http', '/')):
+        return None
+    if base_url and url.startswith('/'):
+        url = urljoin(base_url, url)
+    return StructuredArticle(
+        title=title,
+        url=url,
+        description=_pick(obj, DESCRIPTION_KEYS),
+        published=_pick(obj, DATE_KEYS),
+        image=_pick(obj, IMAGE_KEYS),
+    )
+
+def _types(obj: dict) -> set:
+    value = obj.get('@type')
+    if isinstance(value, list):
+        return set(value)
+    return {value} if isinstance(value, str) else set()
+
+def _json_ld_objects(data) -> List[dict]:
+    """Top-level JSON-LD objects, with @graph containers flattened"""
+    items = data if isinstance(data, list) else [data]
+    objects = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        if isinstance(item.get('@graph'), list):
+            objects.extend(obj for obj in item['@graph'] if isinstance(obj, dict))
+        else:
+            objects.append(item)
+    return objects
+
+def _read_json_ld(data, result: StructuredData, found: list, base_url: Optional[str]):
+    for obj in _json_ld_objects(data):
+        types = _types(obj)
+        if types & ARTICLE_TYPES:
+            article = _article(obj, base_url)
+            if article is not None:
+                found.append(article)
+            if not result.title:
+                result.title = _pick(obj, TITLE_KEYS)
+                result.description = _pick(obj, DESCRIPTION_KEYS)
+                result.published = _pick(obj, DATE_KEYS)
+                result.image = _pick(obj, IMAGE_KEYS)
+                result.url = _pick(obj, URL_KEYS) or _first_string(obj.get('mainEntityOfPage'))
+        elif 'ItemList' in types:
+            for element in obj.get('itemListElement') or []:
+                if not isinstance(element, dict):
+                    continue
+                # ListItem wraps the article in `item`, or carries url/name itself
+                item = element.get('item')
+                article = _article(item if isinstance(item, dict) else element, base_url)
+                if article is not None:
+                    found.append(article)
+
+def _walk_app_state(value, found: list, base_url: Optional[str], depth: int = 0):
+    """Collect article-like objects from embedded app state (e.g. __NEXT_DATA__ props)"""
+    if depth > MAX_DEPTH or len(found) >= MAX_ARTICLES:
+        return
+    if isinstance(value, dict):
+        article = _article(value, base_url, APP_STATE_TITLE_KEYS)
+        if article is not None:
+            found.append(article)
+            return
+        for child in value.values():
+            if isinstance(child, (dict, list)):
+                _walk_app_state(child, found, base_url, depth + 1)
+    elif isinstance(value, list):
+        for child in value:
+            if isinstance(child, (dict, list)):
+                _walk_app_state(child, found, base_url, depth + 1)
+
+def extract_structured(markup: str, base_url: Optional[str] = None) -> StructuredData:
+    """
+    Read JSON-LD, meta tags and __NEXT_DATA__ from raw HTML in one pass.
+    Relative article URLs are resolved against `base_url`.
+    Malformed JSON blocks are skipped.
+    """
+    result = StructuredData()
+    meta = {}
+    found = []
+    for match in _TAG_RE.finditer(markup or ""):
+        script_attrs, body, meta_attrs = match.groups()
+        if meta_attrs is not None:
+            attrs = _attrs(meta_attrs)
+            field = META_FIELDS.get(attrs.get('property') or attrs.get('name') or '')
+            if field and attrs.get('content') and field not in meta:
+                meta[field] = attrs['content'].strip()
+            continue
+
+        attrs = _attrs(script_attrs)
+        is_json_ld = attrs.get('type', '').lower() == 'application/ld+json'
+        if not is_json_ld and attrs.get('id') != '__NEXT_DATA__':
+            continue
+        try:
+            data = json.loads(body)
+        except ValueError:
+            continue
+        if is_json_ld:
+            _read_json_ld(data, result, found, base_url)
+        else:
+            _walk_app_state(data.get('props', data) if isinstance(data, dict) else data, found, base_url)
+
+    # Meta tags fill whatever the JSON-LD left empty
+    for field, value in meta.items():
+        if not getattr(result, field):
+            setattr(result, field, value)
+
+    seen = set()
+    for article in found:
+        if article.url not in seen:
+            seen.add(article.url)
+            result.articles.append(article)
+    return result
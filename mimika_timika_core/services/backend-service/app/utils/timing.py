@@ -0,0 +1,189 @@
+"""
+Request timing for the API.
+
+TimingMiddleware gives every request a timings dict (through a context
+variable, so it follows sync endpoints into the threadpool) and sends it
+back as a Server-Timing header:
+
+    Server-Timing: db;dur=3.1;desc="2 queries", serialize;dur=0.7, compress;dur=1.2, app;dur=6.0
+
+`db` is filled by the SQLAlchemy hooks of install_query_timing(), which also
+log statements slower than SLOW_QUERY_MS with their parameters and EXPLAIN
+plan. `serialize` and `compress` come from utils/serialization.py and
+utils/compression.py. Request durations are kept per route in `route_latency`
+(p50/p95/p99 on GET /metrics/latency) and in Prometheus.
+
+Settings (environment):
+  SLOW_QUERY_MS          slow-query log threshold (default 100)
+  EXPLAIN_SLOW_QUERIES   attach the EXPLAIN plan to slow SELECTs (default 1)
+  LATENCY_WINDOW         recent requests kept per route (default 2048)
+  LATENCY_TARGET_P95_MS  p95 target reported by /metrics/latency (default 200, from the PRD)
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+from .metrics import API_REQUEST_SECONDS
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+EXPLAIN_SLOW_QUERIES = os.getenv("EXPLAIN_SLOW_QUERIES", "1").lower() in ("1", "true", "yes", "on")
+LATENCY_WINDOW = int(os.getenv("LATENCY_WINDOW", "2048"))
+LATENCY_TARGET_P95_MS = float(os.getenv("LATENCY_TARGET_P95_MS", "200"))
+
+# name -> [seconds, count] for the current request; None outside requests
+_timings: ContextVar[Optional[Dict[str, list]]] = ContextVar("request_timings", default=None)
+
+def add_timing(name: str, seconds: float):
+    """Add `seconds` to the current request's `name` timing (no-op outside a request)"""
+    timings = _timings.get()
+    if timings is None:
+        return
+    entry = timings.get(name)
+    if entry is None:
+        timings[name] = [seconds, 1]
+    else:
+        entry[0] += seconds
+        entry[1] += 1
+
+def server_timing(timings: Dict[str, list], total: float) -> str:
+    parts = []
+    for name, (seconds, count) in timings.items():
+        part = f"{name};dur={seconds * 1000:.1f}"
+        if name == "db":
+            part += f';desc="{count} queries"'
+        parts.append(part)
+    parts.append(f"app;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+class RouteLatency:
+    """Recent request durations per route, for in-process percentiles"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self._durations = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def observe(self, route: str, seconds: float):
+        with self._lock:
+            durations = self._durations.get(route)
+            if durations is None:
+                durations = self._durations[route] = deque(maxlen=self.window)
+            durations.append(seconds)
+            self._counts[route] = self._counts.get(route, 0) + 1
+
+    def summary(self, target_p95_ms: float = LATENCY_TARGET_P95_MS) -> dict:
+        with self._lock:
+            snapshot = {route: sorted(durations) for route, durations in self._durations.items()}
+            counts = dict(self._counts)
+
+        routes = {}
+        for route, durations in sorted(snapshot.items()):
+            p95_ms = _percentile(durations, 95) * 1000
+            routes[route] = {
+                "count": counts[route],
+                "window": len(durations),
+                "p50_ms": round(_percentile(durations, 50) * 1000, 2),
+                "p95_ms": round(p95_ms, 2),
+                "p99_ms": round(_percentile(durations, 99) * 1000, 2),
+                "max_ms": round(durations[-1] * 1000, 2),
+                "within_target": p95_ms < target_p95_ms,
+            }
+        return {"target_p95_ms": target_p95_ms, "routes": routes}
+
+    def clear(self):
+        with self._lock:
+            self._durations.clear()
+            self._counts.clear()
+
+def _percentile(sorted_values, percent: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return sorted_values[int(rank) - 1]
+
+route_latency = RouteLatency(LATENCY_WINDOW)
+
+class TimingMiddleware:
+    """
+    ASGI middleware adding Server-Timing and recording the request duration
+    under its route template ("GET /articles/{article_id}"). Add it last so it
+    wraps the other middleware and its header survives them.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = {}
+        token = _timings.set(timings)
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", server_timing(timings, time.perf_counter() - start))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _timings.reset(token)
+            # FastAPI stores the matched route in the scope; unmatched paths share one bucket
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            elapsed = time.perf_counter() - start
+            route_latency.observe(f"{scope['method']} {path}", elapsed)
+            API_REQUEST_SECONDS.labels(scope["method"], path).observe(elapsed)
+
+def _explain(conn, statement: str, parameters) -> str:
+    """EXPLAIN plan of `statement` through the raw DBAPI connection (bypasses these hooks)"""
+    prefix = "EXPLAIN QUERY PLAN" if conn.dialect.name == "sqlite" else "EXPLAIN"
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(f"{prefix} {statement}", parameters)
+        return "\n".join(" | ".join(str(col) for col in row) for row in cursor.fetchall())
+    finally:
+        cursor.close()
+
+def _log_slow_query(conn, statement: str, parameters, executemany: bool, elapsed: float):
+    plan = None
+    if EXPLAIN_SLOW_QUERIES and not executemany and statement.lstrip().upper().startswith("SELECT"):
+        try:
+            plan = _explain(conn, statement, parameters)
+        except Exception as e:
+            plan = f"(EXPLAIN failed: {e})"
+    params = repr(parameters)
+    if len(params) > 500:
+        params = params[:500] + "..."
+    message = f"Slow query ({elapsed * 1000:.1f} ms): {statement}\nParameters: {params}"
+    if plan:
+        message += f"\nPlan:\n{plan}"
+    logger.warning(message)
+
+def install_query_timing(engine):
+    """Time every statement on `engine` into the request's `db` timing and log slow ones"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_start
+        add_timing("db", elapsed)
+        if elapsed * 1000 >= SLOW_QUERY_MS:
+            _log_slow_query(conn, statement, parameters, executemany, elapsed)
@@ -0,0 +1,63 @@
+import sys
+import os
+import logging
+import argparse
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import models, database
+from app.services.ingest import migrate_url_hash
+from app.services.backfill import SOURCES, create_job, list_jobs, run_backfill
+
+# Setup basic logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _day(value):
+    """YYYY-MM-DD as naive UTC midnight"""
+    return datetime.strptime(value, '%Y-%m-%d')
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Queue and run historical backfill jobs (see app/services/backfill.py)')
+    parser.add_argument('--site', choices=sorted(SOURCES), help='Queue a job for this site')
+    parser.add_argument('--keyword', action='append', help='Keyword of the job (repeatable: one job per keyword)')
+    parser.add_argument('--since', type=_day, help='Window start, YYYY-MM-DD (UTC)')
+    parser.add_argument('--until', type=_day, help='Window end, YYYY-MM-DD (UTC, exclusive)')
+    parser.add_argument('--max-pages', type=int, help='Page cap of the job')
+    parser.add_argument('--run', action='store_true', help='Work through the queued jobs until none is left (resumes unfinished ones)')
+    parser.add_argument('--job', type=int, help='With --run: only this job')
+    parser.add_argument('--list', action='store_true', help='List the jobs')
+    args = parser.parse_args()
+
+    # Create DB tables if they don't exist
+    models.Base.metadata.create_all(bind=database.engine)
+    migrate_url_hash()
+
+    if args.site:
+        db = database.SessionLocal()
+        try:
+            for keyword in args.keyword or ['mimika']:
+                job = create_job(db, args.site, keyword, args.since, args.until, args.max_pages)
+                logger.info(f"Queued backfill job {job.id}: {job.site} '{job.keyword}'")
+        finally:
+            db.close()
+
+    if args.run:
+        for job in run_backfill(max_seconds=None, job_id=args.job):
+            logger.info(
+                f"Job {job['id']} ({job['site']} '{job['keyword']}'): {job['status']} at page {job['next_page']}, "
+                f"{job['articles_saved']} saved, {job['articles_updated']} updated"
+            )
+
+    if args.list:
+        db = database.SessionLocal()
+        try:
+            for job in list_jobs(db):
+                print(f"{job['id']:>4} {job['site']:<8} {job['keyword']:<12} {job['status']:<8} "
+                      f"page {job['next_page']:<5} pages {job['pages_fetched']:<5} "
+                      f"saved {job['articles_saved']:<5} updated {job['articles_updated']}"
+                      + (f"  error: {job['error']}" if job['error'] else ""))
+        finally:
+            db.close()
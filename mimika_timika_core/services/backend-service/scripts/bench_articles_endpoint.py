@@ -0,0 +1,97 @@
+import sys
+import os
+import json
+import time
+import timeit
+import tempfile
+from datetime import datetime, timedelta
+from typing import List
+
+# Use a throwaway SQLite database; must be set before the app is imported
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+
+# Add parent directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import Depends
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+
+from app import models, database
+from app.main import app, ArticleResponse
+from app.utils.helpers import url_hash
+from app.utils.serialization import article_columns, row_to_dict, dumps
+
+@app.get("/bench/legacy-articles", response_model=List[ArticleResponse])
+def legacy_articles(db: Session = Depends(database.get_db), limit: int = 1000):
+    """The /articles implementation before the fast path: ORM objects + response_model validation"""
+    return (
+        db.query(models.Article)
+        .filter(models.Article.region.in_(["mimika", "general"]))
+        .filter(models.Article.region != "timika")
+        .order_by(models.Article.published_at.desc())
+        .limit(limit)
+        .all()
+    )
+
+def seed(count=1000):
+    models.Base.metadata.create_all(bind=database.engine)
+    db = database.SessionLocal()
+    now = datetime.now()
+    for i in range(count):
+        url = f"https://www.antaranews.com/berita/{i}/bupati-mimika-resmikan-jalan"
+        db.add(models.Article(
+            title=f"Bupati Mimika resmikan jalan baru di Timika bagian {i}",
+            summary="Timika (ANTARA) - Pemerintah Kabupaten Mimika meresmikan ruas jalan baru. " * 3,
+            content="Isi berita lengkap. " * 100,
+            image_url=f"https://img.antaranews.com/{i}.jpg",
+            source_url=url,
+            url_hash=url_hash(url),
+            source_name="Antara News",
+            category="Regional",
+            region="mimika" if i % 2 else "general",
+            published_at=now - timedelta(minutes=i),
+        ))
+    db.commit()
+    db.close()
+
+def timed(client, path, rounds):
+    client.get(path)  # warm up
+    start = time.perf_counter()
+    for _ in range(rounds):
+        response = client.get(path)
+    elapsed = (time.perf_counter() - start) / rounds
+    return elapsed * 1000, len(response.content)
+
+def bench_serialization(limit, rounds):
+    """Encode only, without the HTTP round trip that dominates TestClient timings"""
+    db = database.SessionLocal()
+    adapter = TypeAdapter(List[ArticleResponse])
+    query = db.query(models.Article).order_by(models.Article.published_at.desc()).limit(limit)
+    objects = query.all()
+    rows = db.query(*article_columns(models.Article)).order_by(models.Article.published_at.desc()).limit(limit).all()
+
+    legacy = timeit.timeit(
+        lambda: json.dumps(jsonable_encoder(adapter.validate_python(objects, from_attributes=True))),
+        number=rounds) / rounds
+    fast = timeit.timeit(lambda: dumps([row_to_dict(r) for r in rows]), number=rounds) / rounds
+    db.close()
+    print(f"serialize legacy (validate + jsonable_encoder): {legacy * 1000:8.2f} ms")
+    print(f"serialize fast (row dicts + dumps)            : {fast * 1000:8.2f} ms ({legacy / fast:.1f}x)")
+
+def bench():
+    seed(1000)
+    client = TestClient(app)
+    for limit in (100, 1000):
+        rounds = 50 if limit == 100 else 10
+        legacy_ms, legacy_bytes = timed(client, f"/bench/legacy-articles?limit={limit}", rounds)
+        fast_ms, fast_bytes = timed(client, f"/articles?region=mimika&limit={limit}", rounds)
+        print(f"--- {limit} rows ---")
+        print(f"legacy (ORM + response_model): {legacy_ms:8.2f} ms  {legacy_bytes} bytes")
+        print(f"fast (rows + FastJSONResponse): {fast_ms:8.2f} ms  {fast_bytes} bytes ({legacy_ms / fast_ms:.1f}x)")
+        bench_serialization(limit, rounds)
+
+if __name__ == "__main__":
+    bench()
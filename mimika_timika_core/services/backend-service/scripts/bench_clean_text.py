@@ -0,0 +1,45 @@
+import sys
+import os
+import re
+import random
+import timeit
+
+# Add parent directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.helpers import clean_text, clean_texts
+
+def legacy_clean_text(text):
+    """clean_text as it was before clean_texts(): two uncompiled re.sub calls per string"""
+    if not text:
+        return ""
+    text = re.sub(r'\s+', ' ', text.strip())
+    text = re.sub(r'<[^>]+>', '', text)
+    return text
+
+def sample_fields(cards=1000, seed=42):
+    """Title, description and date text for `cards` search-result cards"""
+    rng = random.Random(seed)
+    words = ["Mimika", "Timika", "Papua", "Bupati", "warga", "jalan", "banjir", "Freeport",
+             "pendidikan", "kesehatan", "&amp;", "<b>", "</b>", "\n", "\u00a0"]
+    fields = []
+    for _ in range(cards):
+        fields.append("  " + " ".join(rng.choice(words) for _ in range(12)) + "  ")
+        fields.append(" ".join(rng.choice(words) for _ in range(40)))
+        fields.append("Senin, 10 Desember 2024 20:15 WIB")
+    return fields
+
+def bench():
+    for cards in (100, 1000):
+        fields = sample_fields(cards)
+        number = max(1, 20000 // cards)
+        legacy = timeit.timeit(lambda: [legacy_clean_text(t) for t in fields], number=number) / number
+        single = timeit.timeit(lambda: [clean_text(t) for t in fields], number=number) / number
+        batch = timeit.timeit(lambda: clean_texts(fields), number=number) / number
+        print(f"--- {cards} cards ({len(fields)} fields) ---")
+        print(f"legacy clean_text per call : {legacy * 1000:8.3f} ms")
+        print(f"clean_text per call        : {single * 1000:8.3f} ms")
+        print(f"clean_texts batch          : {batch * 1000:8.3f} ms ({legacy / batch:.1f}x vs legacy)")
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,81 @@
+import sys
+import os
+import time
+import random
+import tempfile
+from datetime import datetime, timedelta
+
+# Use a throwaway SQLite database; must be set before the app is imported
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+
+# Add parent directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+from app import models, database
+from app.main import app
+from app.utils.helpers import url_hash
+from app.utils.compression import response_cache, brotli
+
+PATH = "/articles?region=mimika&limit={limit}"
+
+def seed(count=1000, seed=42):
+    """Rows with varied text, so compression ratios resemble real articles rather than repeated filler"""
+    rng = random.Random(seed)
+    vocabulary = [
+        "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 10)))
+        for _ in range(3000)
+    ] + ["Mimika", "Timika", "Papua", "Bupati", "Freeport", "Kabupaten", "warga", "pemerintah"]
+    words = lambda n: " ".join(rng.choice(vocabulary) for _ in range(n))
+
+    models.Base.metadata.create_all(bind=database.engine)
+    db = database.SessionLocal()
+    now = datetime.now()
+    for i in range(count):
+        url = f"https://www.antaranews.com/berita/{4000000 + i}/{words(6).replace(' ', '-')}"
+        db.add(models.Article(
+            title=words(10).capitalize(),
+            summary=words(25),
+            content=words(300) if i % 3 == 0 else None,
+            image_url=f"https://img.antaranews.com/cache/800x533/{rng.getrandbits(64):x}.jpg",
+            source_url=url,
+            url_hash=url_hash(url),
+            source_name=rng.choice(["Antara News", "Kompas.com", "Detik.com", "SeputarPapua"]),
+            category=rng.choice(["Regional", "Nasional", "Ekonomi", "Politik"]),
+            region="mimika" if i % 2 else "general",
+            published_at=now - timedelta(minutes=i),
+        ))
+    db.commit()
+    db.close()
+
+def timed(client, path, encoding, rounds, warm):
+    """Average latency in ms and wire size; `warm=False` clears the response cache every round"""
+    headers = {"Accept-Encoding": encoding}
+    total = 0.0
+    for _ in range(rounds):
+        if not warm:
+            response_cache.clear()
+        start = time.perf_counter()
+        response = client.get(path, headers=headers)
+        total += time.perf_counter() - start
+    # httpx decodes the body; the raw stream length is the bytes on the wire
+    wire = int(response.headers.get("content-length", len(response.content)))
+    return total / rounds * 1000, wire, response.headers.get("content-encoding", "identity")
+
+def bench():
+    seed(1000)
+    client = TestClient(app)
+    encodings = ["identity", "gzip"] + (["br"] if brotli is not None else [])
+    for limit in (100, 1000):
+        rounds = 50 if limit == 100 else 10
+        path = PATH.format(limit=limit)
+        print(f"--- {limit} rows ---")
+        for encoding in encodings:
+            cold_ms, wire, applied = timed(client, path, encoding, rounds, warm=False)
+            warm_ms, _, _ = timed(client, path, encoding, rounds, warm=True)
+            print(f"{encoding:8} -> {applied:8} {wire:9d} bytes   "
+                  f"miss {cold_ms:7.2f} ms   cached {warm_ms:7.2f} ms")
+
+if __name__ == "__main__":
+    bench()
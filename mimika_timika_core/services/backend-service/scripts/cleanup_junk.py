@@ -1,38 +1,23 @@
 import sys
 import os
-import logging
+import argparse
 
 # Add parent directory
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app import models, database
+from app import database
+from app.services.cleanup import cleanup_junk, CLEANUP_BATCH_SIZE
 
-def cleanup_junk_articles():
+def cleanup_junk_articles(dry_run=False, batch_size=CLEANUP_BATCH_SIZE):
     db = database.SessionLocal()
     try:
-        junk_keywords = [
-            "tentang kami", "about us", "contact", "hubungi kami", "redaksi",
-            "pedoman", "cyber media", "siber", "privacy", "kebijakan privasi",
-            "disclaimer", "karir", "lowongan", "galeri foto", "video story",
-            "term of use", "ketentuan", "indeks berita"
-        ]
-        
         print("Scanning for junk articles...")
-        count = 0
-        
-        # Inefficient but safe: iterate and check (or use SQL LIKE)
-        # Using SQL LIKE for major keywords to be faster
-        for keyword in junk_keywords:
-            # Check Title
-            deleted = db.query(models.Article).filter(models.Article.title.ilike(f"%{keyword}%")).delete(synchronize_session=False)
-            count += deleted
-            # Check URL just in case
-            deleted_url = db.query(models.Article).filter(models.Article.source_url.ilike(f"%{keyword}%")).delete(synchronize_session=False)
-            count += deleted_url
-            
-        db.commit()
-        print(f"Successfully deleted {count} junk articles/pages.")
-        
+        result = cleanup_junk(db, batch_size=batch_size, dry_run=dry_run, match_urls=True)
+        if dry_run:
+            print(f"Dry run: {result['deleted']} junk articles/pages would be deleted.")
+        else:
+            print(f"Successfully deleted {result['deleted']} junk articles/pages.")
+
     except Exception as e:
         print(f"Error during cleanup: {e}")
         db.rollback()
@@ -40,4 +25,8 @@ def cleanup_junk_articles():
         db.close()
 
 if __name__ == "__main__":
-    cleanup_junk_articles()
+    parser = argparse.ArgumentParser(description="Delete non-article pages (menus, legal pages, galleries)")
+    parser.add_argument("--dry-run", action="store_true", help="Only count matching articles")
+    parser.add_argument("--batch-size", type=int, default=CLEANUP_BATCH_SIZE)
+    args = parser.parse_args()
+    cleanup_junk_articles(dry_run=args.dry_run, batch_size=args.batch_size)
@@ -1,30 +1,48 @@
 import sys
 import os
 import logging
-from datetime import datetime
+import argparse
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app import models, database
 from app.services.scraper_engine import run_all_scrapers
-from app.utils.helpers import normalize_category, validate_source
+from app.services.ingest import migrate_url_hash
+from app.utils.profiling import profile_session
+from app.utils.budget import ScrapeBudget
+from app.services.scrape_runs import RunCheckpoint, last_scraped, migrate_scrape_runs, site_yields
+from app.services.source_health import load_health, save_health
+from app.services.scraper_engine import SCRAPERS
 
 # Setup basic logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def manual_ingest():
+def manual_ingest(profile=False, budget_seconds=None):
     logger.info("Starting manual ingestion...")
     
     # Create DB tables if they don't exist
     models.Base.metadata.create_all(bind=database.engine)
+    migrate_url_hash()
+    migrate_scrape_runs()
     
     db = database.SessionLocal()
+    session = profile_session(profile, label="manual")
+    # Each site is ingested as it completes; an interrupted run is resumed by the next one
+    checkpoint = RunCheckpoint(db, "manual")
+    scrape_result = None
+    error = None
     
     try:
-        # Run scrapers
-        scrape_result = run_all_scrapers(return_json=True)
+        # Run scrapers, best-yielding sites first
+        budget = ScrapeBudget.from_env(budget_seconds, yields=site_yields(db, SCRAPERS))
+        load_health(db, SCRAPERS)
+        scrape_result = run_all_scrapers(
+            return_json=False, profile=session, budget=budget, checkpoint=checkpoint,
+            last_scraped=last_scraped(db, SCRAPERS),
+        )
+        save_health(db, SCRAPERS)
         
         if scrape_result.get('status') != 'success':
             logger.error("Scraper failed")
@@ -33,67 +51,23 @@ def manual_ingest():
         articles_data = scrape_result.get('data', {}).get('articles', [])
         logger.info(f"Scraper found {len(articles_data)} articles in total.")
         
-        saved_count = 0
-        updated_count = 0
-        
-        for article in articles_data:
-            # Validate source
-            if not validate_source(article.get('url')):
-                continue
-
-            # Check for existing URL
-            existing = db.query(models.Article).filter(models.Article.source_url == article['url']).first()
-            if existing:
-                # Update logic
-                updated = False
-                if not existing.image_url and article.get('image_url'):
-                    existing.image_url = article.get('image_url')
-                    updated = True
-                
-                normalized_cat = normalize_category(article.get('category'))
-                if existing.category in ["news", "News"] and normalized_cat != "Nasional":
-                    existing.category = normalized_cat
-                    updated = True
-                    
-                if updated:
-                    db.add(existing)
-                    updated_count += 1
-                continue
-                
-            # Parse date
-            published_at = datetime.now()
-            try:
-                if article.get('date'):
-                    # Try flexible parsing if needed, but scraper usually standardizes or helpers.extract_date does
-                    # Here we assume scraper returns string, we try verification
-                    try:
-                        published_at = datetime.strptime(article['date'], '%Y-%m-%d %H:%M:%S')
-                    except:
-                        pass
-            except ValueError:
-                pass 
-                
-            new_article = models.Article(
-                title=article.get('title', 'No Title'),
-                summary=article.get('description', ''),
-                source_url=article.get('url', ''),
-                source_name=article.get('source', 'Unknown'),
-                category=normalize_category(article.get('category', 'news')),
-                region=article.get('region', 'general'),
-                image_url=article.get('image_url', None),
-                published_at=published_at
-            )
-            
-            db.add(new_article)
-            saved_count += 1
-            
-        db.commit()
+        saved_count = checkpoint.ingest_result['saved']
+        updated_count = checkpoint.ingest_result['updated']
         logger.info(f"Ingestion Complete. Saved: {saved_count}, Updated: {updated_count}")
         
     except Exception as e:
         logger.error(f"Error during ingestion: {e}")
+        db.rollback()
+        error = str(e)
     finally:
+        checkpoint.finish(scrape_result, error)
         db.close()
+        if session:
+            logger.info(f"Profiles written to {session.directory}")
 
 if __name__ == "__main__":
-    manual_ingest()
+    parser = argparse.ArgumentParser(description='Scrape all sites and ingest the results')
+    parser.add_argument('--profile', action='store_true', help='Profile each site and the ingest (see app/utils/profiling.py)')
+    parser.add_argument('--budget', type=float, help='Run deadline in seconds (default SCRAPE_BUDGET_SECONDS, see app/utils/budget.py)')
+    args = parser.parse_args()
+    manual_ingest(profile=args.profile, budget_seconds=args.budget)
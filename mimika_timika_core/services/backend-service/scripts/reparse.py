@@ -0,0 +1,64 @@
+import sys
+import os
+import logging
+import argparse
+from datetime import datetime, timedelta, timezone
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import models, database
+from app.services.ingest import ingest_articles, migrate_url_hash
+from app.services.reparse import PAGE_PARSERS, reparse_archive
+from app.utils.page_archive import ARCHIVE_DIR, prune
+
+# Setup basic logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _day(value):
+    """YYYY-MM-DD as the start of that UTC day"""
+    return datetime.strptime(value, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+
+def reparse(sites=None, since=None, until=None, directory=None, dry_run=False):
+    logger.info(f"Re-parsing archived pages in {directory or ARCHIVE_DIR}...")
+    result = reparse_archive(sites=sites, since=since, until=until, directory=directory)
+
+    for site, stats in sorted(result['sites'].items()):
+        logger.info(
+            f"[{site}] {stats['pages']} pages, {stats['articles']} articles, "
+            f"{stats['errors']} errors, parsed in {stats['parse_seconds']}s"
+        )
+    articles = result['articles']
+    logger.info(f"Re-parse found {len(articles)} unique articles in total.")
+    if dry_run or not articles:
+        return
+
+    # Create DB tables if they don't exist
+    models.Base.metadata.create_all(bind=database.engine)
+    migrate_url_hash()
+
+    db = database.SessionLocal()
+    try:
+        ingested = ingest_articles(db, articles)
+        logger.info(f"Ingestion Complete. Saved: {ingested['saved']}, Updated: {ingested['updated']}")
+    except Exception as e:
+        logger.error(f"Error during ingestion: {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Re-run the current parsers over the page archive and ingest the results, without network')
+    parser.add_argument('--site', action='append', choices=sorted(PAGE_PARSERS), help='Only this site (repeatable)')
+    parser.add_argument('--since', type=_day, help='First fetch day, YYYY-MM-DD (UTC)')
+    parser.add_argument('--until', type=_day, help='Last fetch day, YYYY-MM-DD (UTC, inclusive)')
+    parser.add_argument('--dir', help=f'Archive directory (default PAGE_ARCHIVE_DIR, "{ARCHIVE_DIR}")')
+    parser.add_argument('--dry-run', action='store_true', help='Parse and report, do not ingest')
+    parser.add_argument('--prune', action='store_true', help='Apply the archive retention first')
+    args = parser.parse_args()
+
+    if args.prune:
+        removed, freed = prune(args.dir)
+        logger.info(f"Pruned {removed} day(s), {freed / 1024 / 1024:.1f} MB")
+    until = args.until + timedelta(days=1) if args.until else None
+    reparse(sites=args.site, since=args.since, until=until, directory=args.dir, dry_run=args.dry_run)
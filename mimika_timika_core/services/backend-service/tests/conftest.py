@@ -0,0 +1,50 @@
+"""
+Shared fixtures. Run from services/backend-service: python -m pytest -q tests
+"""
+
+import os
+import sys
+
+# Before the app is imported: no file database, no page archive on disk
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("PAGE_ARCHIVE", "0")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import database, models
+
+@pytest.fixture
+def engine(monkeypatch):
+    """
+    An empty in-memory SQLite database, installed as database.engine and
+    database.SessionLocal so code that opens its own sessions uses it too.
+    Tables are not created: tests that need the current schema use `db`.
+    """
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(autocommit=False, autoflush=False, bind=engine))
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def db(engine):
+    """A session on the in-memory database with every table created"""
+    models.Base.metadata.create_all(bind=engine)
+    session = database.SessionLocal()
+    yield session
+    session.close()
+
+@pytest.fixture
+def client(db):
+    """TestClient on the app with its sessions on the in-memory database (startup hooks do not run)"""
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    app.dependency_overrides[database.get_db] = lambda: db
+    yield TestClient(app)
+    app.dependency_overrides.clear()
@@ -0,0 +1,51 @@
+from datetime import datetime
+
+import pytest
+
+from app import models
+from app.services.ingest_versions import bump_versions
+
+@pytest.fixture
+def articles(db):
+    rows = {}
+    for region in ("mimika", "timika", "general"):
+        row = models.Article(
+            title=f"Berita {region}", source_url=f"https://www.kompas.com/read/{region}",
+            source_name="Kompas", category="news", region=region, published_at=datetime(2024, 12, 10),
+        )
+        db.add(row)
+        rows[region] = row
+    bump_versions(db, ["mimika", "timika", "general"])
+    db.commit()
+    return {region: row.id for region, row in rows.items()}
+
+def test_conditional_get_of_an_article(client, articles):
+    first = client.get(f"/articles/{articles['timika']}", headers={"x-region": "timika"})
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    again = client.get(f"/articles/{articles['timika']}", headers={"x-region": "timika", "if-none-match": etag})
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+
+def test_other_region_etag_does_not_turn_a_404_into_a_304(client, articles):
+    etag = client.get(f"/articles/{articles['timika']}", headers={"x-region": "timika"}).headers["etag"]
+
+    # The mimika portal may not see timika articles, whatever validators it sends
+    for headers in ({"if-none-match": etag}, {"if-none-match": "*"},
+                    {"if-modified-since": "Fri, 01 Jan 2100 00:00:00 GMT"}):
+        response = client.get(f"/articles/{articles['timika']}", headers={"x-region": "mimika", **headers})
+        assert response.status_code == 404
+
+def test_missing_article_is_a_404_with_validators(client, articles):
+    response = client.get("/articles/999999", headers={"if-none-match": "*"})
+    assert response.status_code == 404
+
+def test_etag_differs_per_region(client, articles):
+    path = f"/articles/{articles['general']}"
+    etags = {
+        client.get(path, headers={"x-region": "mimika"}).headers["etag"],
+        client.get(path, headers={"x-region": "timika"}).headers["etag"],
+        client.get(path).headers["etag"],
+    }
+    assert len(etags) == 3
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import models
+from app.services import backfill
+from app.services.backfill import create_job
+from app.utils.records import ScrapedArticle
+
+API_KEY = {"x-api-key": "papua-news-secret-2024"}
+
+@pytest.fixture(autouse=True)
+def api_secret(monkeypatch):
+    monkeypatch.delenv("API_SECRET", raising=False)
+
+def test_create_job_stores_naive_utc(db):
+    wib = timezone(timedelta(hours=7))
+    job = create_job(db, "detik", "mimika",
+                     since=datetime(2024, 1, 1, 7, 0, tzinfo=wib),
+                     until=datetime(2024, 2, 1, 0, 0))
+    db.refresh(job)
+    assert job.since == datetime(2024, 1, 1, 0, 0)
+    assert job.since.tzinfo is None
+    assert job.until == datetime(2024, 2, 1, 0, 0)
+
+def test_create_job_compares_mixed_values_in_utc(db):
+    wit = timezone(timedelta(hours=9))
+    # 2024-01-01 08:00 WIT is 2023-12-31 23:00 UTC, before the naive since
+    with pytest.raises(ValueError):
+        create_job(db, "kompas", "timika", since=datetime(2024, 1, 1, 0, 0),
+                   until=datetime(2024, 1, 1, 8, 0, tzinfo=wit))
+
+def test_create_job_rejects_unknown_sites(db):
+    with pytest.raises(ValueError):
+        create_job(db, "cnn", "mimika")
+
+def test_api_accepts_naive_and_aware_window(client):
+    response = client.post("/backfill/jobs", headers=API_KEY, json={
+        "site": "detik", "keyword": "mimika",
+        "since": "2024-01-01T00:00:00", "until": "2024-02-01T00:00:00Z",
+    })
+    assert response.status_code == 200
+    job = response.json()
+    assert job["since"] == "2024-01-01T00:00:00"
+    assert job["until"] == "2024-02-01T00:00:00"
+
+def test_api_converts_offsets(client):
+    response = client.post("/backfill/jobs", headers=API_KEY, json={
+        "site": "antara", "keyword": "timika", "since": "2024-01-01T07:00:00+07:00",
+    })
+    assert response.status_code == 200
+    assert response.json()["since"] == "2024-01-01T00:00:00"
+
+def test_api_rejects_an_empty_window(client):
+    response = client.post("/backfill/jobs", headers=API_KEY, json={
+        "site": "detik", "keyword": "mimika",
+        "since": "2024-02-01T08:00:00+08:00", "until": "2024-02-01T00:00:00",
+    })
+    assert response.status_code == 400
+
+def test_run_job_slice_drops_undated_articles(db, monkeypatch):
+    wib = timezone(timedelta(hours=7))
+    page = [
+        ScrapedArticle("Banjir di Timika meluas", "https://news.detik.com/berita/d-1/banjir-timika",
+                       published_at=datetime(2024, 1, 15, 9, 0, tzinfo=wib), source="Detik.com"),
+        ScrapedArticle("Jalan Trans Papua dibuka", "https://news.detik.com/berita/d-2/trans-papua", source="Detik.com"),
+    ]
+    monkeypatch.setitem(backfill.SOURCES, "detik", backfill.BackfillSource(
+        lambda job, n: f"https://news.detik.com/search?page={n}", lambda content, keyword, n: (page, False), {}))
+    monkeypatch.setattr(backfill, "fetch_page", lambda *args, **kwargs: type("Response", (), {"content": b""}))
+
+    job = create_job(db, "detik", "mimika", since=datetime(2024, 1, 1), until=datetime(2024, 2, 1))
+    backfill.run_job_slice(db, job, deadline=float("inf"))
+
+    assert job.status == "done"
+    assert [a.source_url for a in db.query(models.Article)] == ["https://news.detik.com/berita/d-1/banjir-timika"]
@@ -0,0 +1,191 @@
+from datetime import datetime, timedelta
+
+import pytest
+import requests
+
+from app import models
+from app.services import source_health
+from app.utils import circuit, fetch
+from app.utils.circuit import (
+    CLOSED, OPEN, HALF_OPEN, CircuitBreaker, CircuitOpenError, CircuitRegistry,
+    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_COOLDOWN_MINUTES, CIRCUIT_MAX_COOLDOWN_MINUTES,
+)
+
+COOLDOWN = CIRCUIT_COOLDOWN_MINUTES * 60
+MAX_COOLDOWN = CIRCUIT_MAX_COOLDOWN_MINUTES * 60
+
+class Clock:
+    """Naive UTC time that only moves when a test advances it"""
+
+    def __init__(self):
+        self.now = datetime(2024, 12, 10, 12, 0)
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += timedelta(seconds=seconds)
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker('antara', clock=clock)
+
+def _open(breaker):
+    for _ in range(CIRCUIT_FAILURE_THRESHOLD):
+        breaker.record_failure("connection refused")
+    assert breaker.state == OPEN
+
+def _wait_out(breaker, clock):
+    clock.advance((breaker.retry_at - clock()).total_seconds())
+
+def test_closed_breaker_admits_requests(breaker):
+    for _ in range(CIRCUIT_FAILURE_THRESHOLD - 1):
+        assert breaker.acquire() is False
+        breaker.record_failure("timeout")
+    assert breaker.state == CLOSED
+    assert breaker.acquire() is False
+
+def test_success_resets_the_failure_count(breaker):
+    for _ in range(CIRCUIT_FAILURE_THRESHOLD - 1):
+        breaker.record_failure("timeout")
+    breaker.record_success()
+    for _ in range(CIRCUIT_FAILURE_THRESHOLD - 1):
+        breaker.record_failure("timeout")
+    assert breaker.state == CLOSED
+
+def test_consecutive_failures_open_it_for_the_cooldown(breaker, clock):
+    _open(breaker)
+    assert breaker.cooldown == COOLDOWN
+    assert breaker.opened_at == clock()
+    assert breaker.retry_at == clock() + timedelta(seconds=COOLDOWN)
+    assert breaker.cooling_down()
+
+    clock.advance(COOLDOWN - 1)
+    with pytest.raises(CircuitOpenError) as raised:
+        breaker.acquire()
+    assert raised.value.retry_at == breaker.retry_at
+    assert breaker.state == OPEN
+
+def test_after_the_cooldown_a_single_probe_goes_out(breaker, clock):
+    _open(breaker)
+    _wait_out(breaker, clock)
+    assert not breaker.cooling_down()
+
+    assert breaker.acquire() is True
+    assert breaker.state == HALF_OPEN
+    # Nothing else goes out while the probe is in flight
+    with pytest.raises(CircuitOpenError) as raised:
+        breaker.acquire()
+    assert raised.value.retry_at is None
+
+def test_successful_probe_closes_it(breaker, clock):
+    _open(breaker)
+    _wait_out(breaker, clock)
+    breaker.acquire()
+    breaker.record_success()
+
+    assert breaker.state == CLOSED
+    assert breaker.failures == 0
+    assert breaker.cooldown is None and breaker.retry_at is None
+    assert breaker.last_success_at == clock()
+    assert breaker.acquire() is False
+
+def test_failed_probes_double_the_cooldown_up_to_the_cap(breaker, clock):
+    _open(breaker)
+    expected = COOLDOWN
+    for _ in range(12):
+        _wait_out(breaker, clock)
+        assert breaker.acquire() is True
+        breaker.record_failure("HTTP 503")
+        expected = min(expected * 2, MAX_COOLDOWN)
+        assert breaker.state == OPEN
+        assert breaker.cooldown == expected
+        assert breaker.retry_at == clock() + timedelta(seconds=expected)
+    assert breaker.cooldown == MAX_COOLDOWN
+
+def test_a_breaker_loaded_half_open_probes_again(clock):
+    # The process died with its probe in flight
+    breaker = CircuitBreaker('kompas', state=HALF_OPEN, failures=4, cooldown=COOLDOWN, clock=clock)
+    assert breaker.acquire() is True
+
+@pytest.mark.parametrize("status, failure", [
+    (200, False), (304, False), (404, False), (410, False),
+    (403, True), (429, True), (500, True), (503, True),
+])
+def test_failure_statuses(status, failure):
+    assert circuit.is_failure_status(status) is failure
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = CircuitRegistry()
+    monkeypatch.setattr(source_health, "breakers", registry)
+    monkeypatch.setattr(fetch, "breakers", registry)
+    return registry
+
+def test_health_round_trip(db, registry, clock, monkeypatch):
+    opened = CircuitBreaker('antara', clock=clock)
+    _open(opened)
+    _wait_out(opened, clock)
+    opened.acquire()
+    opened.record_failure("HTTP 503")
+    registry.replace(opened)
+    registry.get('detik').record_success()
+
+    source_health.save_health(db, ['antara', 'detik'])
+    row = db.get(models.SourceHealth, 'antara')
+    assert (row.state, row.consecutive_failures, row.cooldown_seconds) == (OPEN, CIRCUIT_FAILURE_THRESHOLD + 1, COOLDOWN * 2)
+
+    # Another process loads what this one saved
+    fresh = CircuitRegistry()
+    monkeypatch.setattr(source_health, "breakers", fresh)
+    source_health.load_health(db, ['antara', 'detik', 'cnn'])
+    loaded = fresh.get('antara')
+    assert loaded.to_dict() == opened.to_dict()
+    assert loaded.cooling_down(clock())
+    assert fresh.get('detik').state == CLOSED
+    assert fresh.get('detik').last_success_at is not None
+    assert fresh.get('cnn').to_dict() == CircuitBreaker('cnn').to_dict()
+
+    health = {entry['site']: entry for entry in source_health.list_health(db, ['antara', 'cnn'])}
+    assert health['antara']['state'] == OPEN
+    assert health['cnn']['state'] == CLOSED and health['cnn']['updated_at'] is None
+
+def test_save_health_updates_existing_rows(db, registry, clock):
+    breaker = CircuitBreaker('tempo', clock=clock)
+    registry.replace(breaker)
+    _open(breaker)
+    source_health.save_health(db, ['tempo'])
+    breaker.record_success()
+    source_health.save_health(db, ['tempo'])
+
+    rows = db.query(models.SourceHealth).filter(models.SourceHealth.site == 'tempo').all()
+    assert len(rows) == 1
+    assert rows[0].state == CLOSED and rows[0].retry_at is None
+
+def test_fetch_page_stops_the_retry_ladder_when_the_breaker_opens(monkeypatch, registry):
+    attempts = []
+    sleeps = []
+
+    def refuse(url, **kwargs):
+        attempts.append(url)
+        raise requests.exceptions.ConnectionError("refused")
+
+    monkeypatch.setattr(fetch.requests, "get", refuse)
+    monkeypatch.setattr(fetch.time, "sleep", sleeps.append)
+    monkeypatch.setattr(fetch.host_limiter, "interval", 0)
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        fetch.fetch_page('antara', 'https://www.antaranews.com/search?q=mimika', retries=10, backoff=5)
+    # The breaker opened on the threshold-th attempt: no further retries or backoff
+    assert len(attempts) == CIRCUIT_FAILURE_THRESHOLD
+    assert len(sleeps) == CIRCUIT_FAILURE_THRESHOLD - 1
+    assert registry.get('antara').state == OPEN
+
+    # Later fetches fail at once, without a request
+    with pytest.raises(CircuitOpenError):
+        fetch.fetch_page('antara', 'https://www.antaranews.com/search?q=timika', retries=2)
+    assert len(attempts) == CIRCUIT_FAILURE_THRESHOLD
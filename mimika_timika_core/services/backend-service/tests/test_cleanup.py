@@ -0,0 +1,44 @@
+from datetime import datetime
+
+import pytest
+
+from app import models
+from app.services.cleanup import cleanup_junk
+
+ROWS = {
+    # Title contains a keyword, in any case
+    'menu': ("Tentang Kami", "https://www.seputarpapua.com/tentang-kami"),
+    'legal': ("PEDOMAN Media Siber", "https://www.kompas.com/read/pedoman"),
+    # A keyword in the URL only
+    'url': ("Kontak daerah dibuka", "https://www.detik.com/contact"),
+    # A slug spelling of a keyword, in the title and the URL
+    'slug': ("Tentang-kami dan warga Timika", "https://www.seputarpapua.com/read/tentang-kami-warga"),
+    'news': ("Banjir di Timika meluas", "https://www.kompas.com/read/banjir-timika"),
+}
+
+@pytest.fixture
+def articles(db):
+    for title, url in ROWS.values():
+        db.add(models.Article(title=title, source_url=url, source_name="Kompas", category="news",
+                              region="timika", published_at=datetime(2024, 12, 10)))
+    db.commit()
+
+def remaining(db):
+    names = {title: name for name, (title, _) in ROWS.items()}
+    return {names[article.title] for article in db.query(models.Article)}
+
+def test_cleanup_deletes_keyword_titles_only(db, articles):
+    assert cleanup_junk(db, batch_size=2)['deleted'] == 2
+    assert remaining(db) == {'url', 'slug', 'news'}
+
+def test_cleanup_matching_urls_takes_literal_keywords(db, articles):
+    assert cleanup_junk(db, match_urls=True, dry_run=True)['deleted'] == 3
+    assert len(remaining(db)) == len(ROWS)
+
+    assert cleanup_junk(db, match_urls=True)['deleted'] == 3
+    assert remaining(db) == {'slug', 'news'}
+
+def test_cleanup_endpoint_is_title_only(client, db, articles):
+    response = client.get("/maintenance/cleanup-junk", params={"key": "papua-news-secret-2024"})
+    assert response.json() == {"status": "success", "deleted_count": 2, "message": "Junk data cleaned."}
+    assert remaining(db) == {'url', 'slug', 'news'}
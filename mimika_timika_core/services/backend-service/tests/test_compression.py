@@ -0,0 +1,110 @@
+import gzip
+
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.utils import compression
+from app.utils.compression import CompressionMiddleware, ResponseCache, negotiate_encoding
+
+BODY = b'{"title": "Banjir di Timika meluas"}' * 100
+
+@pytest.mark.parametrize("header, brotli_installed, encoding", [
+    (None, True, None),
+    ("", True, None),
+    ("identity", True, None),
+    ("gzip", True, "gzip"),
+    ("GZIP, deflate", True, "gzip"),
+    ("*", True, "gzip"),
+    ("gzip;q=0", True, None),
+    ("gzip; q=0.5", True, "gzip"),
+    ("gzip;q=abc", True, None),
+    ("br, gzip", True, "br"),
+    ("br;q=0, gzip", True, "gzip"),
+    # Without the brotli package, br is never chosen
+    ("br, gzip", False, "gzip"),
+    ("br", False, None),
+])
+def test_negotiate_encoding(header, brotli_installed, encoding, monkeypatch):
+    monkeypatch.setattr(compression, "brotli", object() if brotli_installed else None)
+    assert negotiate_encoding(header) == encoding
+
+def test_response_cache_evicts_least_recently_used(monkeypatch):
+    # Small bodies are stored as is, so sizes are the body lengths
+    monkeypatch.setattr(compression, "COMPRESS_MIN_SIZE", 1024)
+    cache = ResponseCache(max_bytes=10)
+    cache.store('W/"1"', None, b"aaaa")
+    cache.store('W/"2"', None, b"bbbb")
+    assert cache.get('W/"1"', None) == (b"aaaa", None)
+
+    # Over budget: W/"2" was used least recently
+    cache.store('W/"3"', None, b"cccc")
+    assert cache.get('W/"2"', None) is None
+    assert cache.get('W/"1"', None) is not None and cache.get('W/"3"', None) is not None
+    assert cache.size == 8
+
+    # Replacing an entry replaces its size; bodies over the budget are returned uncached
+    cache.store('W/"1"', None, b"aa")
+    assert cache.size == 6
+    assert cache.store('W/"4"', None, b"x" * 11) == (b"x" * 11, None)
+    assert cache.get('W/"4"', None) is None and cache.size == 6
+
+def test_response_cache_keys_on_the_encoding():
+    cache = ResponseCache(max_bytes=1 << 20)
+    body, encoding = cache.store('W/"1"', "gzip", BODY)
+    assert encoding == "gzip" and gzip.decompress(body) == BODY
+    assert cache.get('W/"1"', "gzip") == (body, "gzip")
+    assert cache.get('W/"1"', None) is None
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/large")
+    def large():
+        return Response(BODY, media_type="application/json")
+
+    @app.get("/small")
+    def small():
+        return Response(BODY[:100], media_type="application/json")
+
+    @app.get("/image")
+    def image():
+        return Response(BODY, media_type="image/png")
+
+    @app.get("/encoded")
+    def encoded():
+        return Response(gzip.compress(BODY), media_type="application/json", headers={"Content-Encoding": "gzip"})
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([BODY, BODY]), media_type="application/json")
+
+    return TestClient(app)
+
+def test_middleware_compresses_large_bodies(client):
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(BODY)
+    assert response.content == BODY
+
+@pytest.mark.parametrize("path, accept", [
+    ("/large", "identity"),
+    ("/small", "gzip"),
+    ("/image", "gzip"),
+    ("/stream", "gzip"),
+])
+def test_middleware_passes_other_responses_through(client, path, accept):
+    response = client.get(path, headers={"Accept-Encoding": accept})
+    assert "content-encoding" not in response.headers
+    assert "vary" not in response.headers
+    assert response.content.startswith(BODY[:100])
+
+def test_middleware_leaves_encoded_bodies_alone(client):
+    response = client.get("/encoded", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "vary" not in response.headers
+    assert response.content == BODY
@@ -0,0 +1,132 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.utils import date_parser
+from app.utils.date_parser import JAKARTA, parse_date, parse_dates, format_date, to_jakarta_naive
+
+WIB = timezone(timedelta(hours=7))
+WITA = timezone(timedelta(hours=8))
+WIT = timezone(timedelta(hours=9))
+NOW = datetime(2024, 12, 10, 20, 15, tzinfo=JAKARTA)
+
+# text -> (expected instant, expected UTC offset in hours)
+FORMATS = [
+    # epoch seconds and milliseconds (Detik's d-time)
+    ("1733836500", datetime(2024, 12, 10, 13, 15, tzinfo=timezone.utc), 7),
+    ("1733836500000", datetime(2024, 12, 10, 13, 15, tzinfo=timezone.utc), 7),
+    (1733836500, datetime(2024, 12, 10, 13, 15, tzinfo=timezone.utc), 7),
+    # ISO 8601
+    ("2024-12-10T20:15:00+07:00", datetime(2024, 12, 10, 20, 15, tzinfo=WIB), 7),
+    ("2024-12-10T13:15:00Z", datetime(2024, 12, 10, 13, 15, tzinfo=timezone.utc), 0),
+    ("2024-12-10T20:15:00.123+0800", datetime(2024, 12, 10, 20, 15, tzinfo=WITA), 8),
+    ("2024-12-10 20:15:00", datetime(2024, 12, 10, 20, 15, tzinfo=JAKARTA), 7),
+    ("2024-12-10", datetime(2024, 12, 10, tzinfo=JAKARTA), 7),
+    # RFC 822 feed dates
+    ("Tue, 10 Dec 2024 20:15:00 +0700", datetime(2024, 12, 10, 20, 15, tzinfo=WIB), 7),
+    ("10 Dec 2024 13:15:00 GMT", datetime(2024, 12, 10, 13, 15, tzinfo=timezone.utc), 0),
+    ("Tue, 10 Dec 2024 13:15:00 -0000", datetime(2024, 12, 10, 13, 15, tzinfo=timezone.utc), 0),
+    # Indonesian month names, with and without time and zone
+    ("Selasa, 10 Desember 2024 20:15 WIB", datetime(2024, 12, 10, 20, 15, tzinfo=WIB), 7),
+    ("10 Des 2024 20:15 WIB", datetime(2024, 12, 10, 20, 15, tzinfo=WIB), 7),
+    ("10 Des 2024", datetime(2024, 12, 10, tzinfo=JAKARTA), 7),
+    ("10 Desember 2024 | 20.15 WITA", datetime(2024, 12, 10, 20, 15, tzinfo=WITA), 8),
+    ("Rabu, 5 Agustus 2024 pukul 09.30 WIT", datetime(2024, 8, 5, 9, 30, tzinfo=WIT), 9),
+    ("1 Nopember 2024, 07:05:09", datetime(2024, 11, 1, 7, 5, 9, tzinfo=JAKARTA), 7),
+    ("17 Mei 2024 - 10:00 WIB", datetime(2024, 5, 17, 10, 0, tzinfo=WIB), 7),
+    ("3 Pebruari 2024", datetime(2024, 2, 3, tzinfo=JAKARTA), 7),
+    # numeric day/month/year
+    ("10/12/2024, 20:15 WIB", datetime(2024, 12, 10, 20, 15, tzinfo=WIB), 7),
+    ("10-12-2024", datetime(2024, 12, 10, tzinfo=JAKARTA), 7),
+    ("Selasa, 10/12/2024 20.15 WITA", datetime(2024, 12, 10, 20, 15, tzinfo=WITA), 8),
+    # relative to NOW
+    ("2 jam yang lalu", NOW - timedelta(hours=2), 7),
+    ("5 menit lalu", NOW - timedelta(minutes=5), 7),
+    ("30 detik yang lalu", NOW - timedelta(seconds=30), 7),
+    ("3 hari lalu", NOW - timedelta(days=3), 7),
+    ("1 minggu yang lalu", NOW - timedelta(weeks=1), 7),
+    ("2 Pekan lalu", NOW - timedelta(weeks=2), 7),
+    ("kemarin", NOW - timedelta(days=1), 7),
+    ("Baru saja", NOW, 7),
+    ("hari ini", NOW, 7),
+]
+
+@pytest.mark.parametrize("text, expected, offset_hours", FORMATS)
+def test_parse_date_formats(text, expected, offset_hours):
+    result = parse_date(text, now=NOW)
+    assert result == expected
+    assert result.utcoffset() == timedelta(hours=offset_hours)
+
+@pytest.mark.parametrize("text", [None, "", "tanpa tanggal", "Redaksi Kompas", "31/02/2024", "10 Foo 2024"])
+def test_parse_date_unrecognized(text):
+    assert parse_date(text, now=NOW) is None
+
+def test_source_cache_remembers_the_matching_parser():
+    source = "test-cache-remember"
+    assert parse_date("10 Desember 2024 20:15 WIB", source, NOW) == datetime(2024, 12, 10, 20, 15, tzinfo=WIB)
+    assert date_parser._source_formats[source] == 'long'
+    assert parse_date("11 Desember 2024 08:00 WIB", source, NOW) == datetime(2024, 12, 11, 8, 0, tzinfo=WIB)
+    assert date_parser._source_formats[source] == 'long'
+
+@pytest.mark.parametrize("first, second, expected, parser", [
+    # The site switched from month names to epoch timestamps
+    ("10 Desember 2024 20:15 WIB", "1733836500", datetime(2024, 12, 10, 13, 15, tzinfo=timezone.utc), 'epoch'),
+    # ... from ISO to relative dates
+    ("2024-12-10T20:15:00+07:00", "2 jam yang lalu", NOW - timedelta(hours=2), 'relative'),
+    # ... from epoch to numeric dates
+    ("1733836500", "09/12/2024 10:00 WIB", datetime(2024, 12, 9, 10, 0, tzinfo=WIB), 'numeric'),
+    # The cached parser raises (impossible date) and the others are still tried
+    ("10/12/2024", "31/02/2024 atau 2024-02-28", datetime(2024, 2, 28, tzinfo=JAKARTA), 'iso'),
+])
+def test_source_cache_falls_back_when_the_format_changes(first, second, expected, parser):
+    source = f"test-cache-{parser}"
+    assert parse_date(first, source, NOW) is not None
+    assert parse_date(second, source, NOW) == expected
+    assert date_parser._source_formats[source] == parser
+
+@pytest.mark.parametrize("cached", [name for name, _ in date_parser.PARSERS])
+@pytest.mark.parametrize("text, expected, offset_hours", FORMATS)
+def test_cached_parser_never_changes_a_result(cached, text, expected, offset_hours, monkeypatch):
+    # e.g. a cached 'long' must not read the RFC 822 "10 Dec 2024 13:15:00 GMT" as WIB
+    monkeypatch.setitem(date_parser._source_formats, "test-cached", cached)
+    result = parse_date(text, "test-cached", NOW)
+    assert result == expected
+    assert result.utcoffset() == timedelta(hours=offset_hours)
+
+@pytest.mark.parametrize("text, expected", [
+    # Day/month/year, cached or not
+    ("02/01/2024", datetime(2024, 1, 2, tzinfo=JAKARTA)),
+    # Other formats naming the same day are not read as numeric day/month
+    ("2024-01-02", datetime(2024, 1, 2, tzinfo=JAKARTA)),
+    ("Tue, 02 Jan 2024 00:00:00 +0700", datetime(2024, 1, 2, tzinfo=WIB)),
+    # Month/day/year is not a supported format: rejected, not misread
+    ("01/25/2024", None),
+])
+def test_cached_numeric_parser_keeps_day_and_month(text, expected, monkeypatch):
+    monkeypatch.setitem(date_parser._source_formats, "test-numeric", 'numeric')
+    assert parse_date(text, "test-numeric", NOW) == expected
+    assert parse_date(text, now=NOW) == expected
+
+def test_source_cache_is_per_source():
+    assert parse_date("1733836500", "test-source-a", NOW) is not None
+    assert parse_date("10 Desember 2024", "test-source-b", NOW) == datetime(2024, 12, 10, tzinfo=JAKARTA)
+    assert date_parser._source_formats["test-source-a"] == 'epoch'
+    assert date_parser._source_formats["test-source-b"] == 'long'
+
+def test_unrecognized_text_keeps_the_cached_parser():
+    source = "test-cache-miss"
+    parse_date("10 Desember 2024", source, NOW)
+    assert parse_date("tanpa tanggal", source, NOW) is None
+    assert date_parser._source_formats[source] == 'long'
+
+def test_parse_dates_shares_one_now():
+    first, second = parse_dates(["5 menit lalu", "5 menit yang lalu"])
+    assert first == second
+
+def test_format_date_and_to_jakarta_naive():
+    utc = datetime(2024, 12, 10, 13, 15, tzinfo=timezone.utc)
+    assert format_date(utc) == "2024-12-10 20:15:00"
+    assert to_jakarta_naive(utc) == datetime(2024, 12, 10, 20, 15)
+    assert to_jakarta_naive(datetime(2024, 12, 10, 20, 15, tzinfo=WITA)) == datetime(2024, 12, 10, 19, 15)
+    naive = datetime(2024, 12, 10, 20, 15)
+    assert to_jakarta_naive(naive) is naive
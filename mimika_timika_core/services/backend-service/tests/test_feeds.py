@@ -0,0 +1,59 @@
+from datetime import datetime
+
+import pytest
+
+from app import models
+from app.scrapers import feed_scraper
+from app.services.scrape_runs import last_scraped
+
+RSS = b"""<?xml version="1.0"?>
+<rss version="2.0"><channel>
+  <item><title>Banjir di Timika meluas</title><link>https://news.detik.com/berita/d-3/banjir-timika</link>
+    <pubDate>Tue, 10 Dec 2024 11:00:00 +0000</pubDate></item>
+  <item><title>Harga cabai naik di Jakarta</title><link>https://news.detik.com/berita/d-2/cabai</link>
+    <pubDate>Tue, 10 Dec 2024 10:00:00 +0000</pubDate></item>
+  <item><title>Pasar baru di Mimika dibuka</title><link>https://news.detik.com/berita/d-1/pasar-mimika</link>
+    <pubDate>Tue, 10 Dec 2024 09:00:00 +0000</pubDate></item>
+</channel></rss>
+"""
+
+@pytest.fixture(autouse=True)
+def feed(monkeypatch):
+    monkeypatch.setattr(feed_scraper, "fetch_feed", lambda site, url, timeout=10: RSS)
+
+def scrape(since):
+    return feed_scraper.scrape_feeds('detik', keyword=['timika', 'mimika'], since=since)
+
+def test_feed_reaching_back_to_the_last_scrape_is_a_success():
+    result = scrape(datetime(2024, 12, 10, 9, 30))
+    assert result['status'] == 'success'
+    assert [a.search_keyword for a in result['data']['articles']] == ['timika', 'mimika']
+
+@pytest.mark.parametrize("since", [
+    # Down or paused since before the oldest entry: older articles may have scrolled out
+    datetime(2024, 12, 10, 8, 0),
+    # No successful scrape on record (first run)
+    None,
+])
+def test_feed_not_reaching_back_is_a_miss(since):
+    result = scrape(since)
+    assert result['status'] == 'miss'
+    # What the feed did find is kept
+    assert len(result['data']['articles']) == 2
+
+def test_last_scraped_ignores_failed_sites(db):
+    def run(started_at, **sites):
+        row = models.ScrapeRun(trigger='scheduler', status='success', started_at=started_at)
+        db.add(row)
+        db.flush()
+        for site, (status, pages, errors) in sites.items():
+            db.add(models.ScrapeRunSite(run_id=row.id, site=site, status=status, pages_fetched=pages, fetch_errors=errors))
+
+    run(datetime(2024, 12, 10, 6, 0), detik=('success', 2, 0), kompas=('empty', 1, 0), antara=('success', 1, 0))
+    run(datetime(2024, 12, 10, 6, 30), detik=('empty', 1, 0), kompas=('empty', 0, 3), antara=('error', 1, 1))
+    db.commit()
+    assert last_scraped(db, ['detik', 'kompas', 'antara', 'cnn']) == {
+        'detik': datetime(2024, 12, 10, 6, 30),
+        'kompas': datetime(2024, 12, 10, 6, 0),
+        'antara': datetime(2024, 12, 10, 6, 0),
+    }
@@ -0,0 +1,80 @@
+from datetime import datetime
+
+from sqlalchemy import event
+
+from app import models
+from app.services import ingest
+from app.services.ingest import find_existing_by_hash, ingest_articles
+from app.utils.helpers import url_hash
+from app.utils.records import ScrapedArticle
+
+def article(n, **fields):
+    return ScrapedArticle(f"Berita Timika nomor {n}", f"https://www.kompas.com/read/2024/12/10/{n}/timika",
+                          published_at=datetime(2024, 12, 10), source="Kompas.com", region="timika", **fields)
+
+def versions(db):
+    return {row.region: row.version for row in db.query(models.IngestVersion)}
+
+def test_ingest_inserts_new_articles_and_skips_rejected_ones(db):
+    result = ingest_articles(db, [
+        article(1),
+        # The same page under a tracking-parameter variant of its URL
+        ScrapedArticle("Berita Timika nomor 1", "https://www.kompas.com/read/2024/12/10/1/timika?utm_source=x"),
+        ScrapedArticle("Tentang Kami", "https://www.kompas.com/tentang-kami"),
+        ScrapedArticle("Iklan Timika hari ini", "https://ads.example.com/timika"),
+        # Legacy dicts are converted
+        {"title": "Berita Mimika nomor 2", "source_url": "https://www.detik.com/berita/d-2/mimika",
+         "source_name": "Detik.com", "region": "mimika", "date": "10/12/2024"},
+    ])
+
+    assert (result['saved'], result['updated']) == (2, 0)
+    assert result['by_source'] == {'Kompas.com': {'saved': 1, 'updated': 0}, 'Detik.com': {'saved': 1, 'updated': 0}}
+    stored = {row.source_url: row for row in db.query(models.Article)}
+    assert set(stored) == {"https://www.kompas.com/read/2024/12/10/1/timika", "https://www.detik.com/berita/d-2/mimika"}
+    assert stored["https://www.detik.com/berita/d-2/mimika"].published_at == datetime(2024, 12, 10)
+    assert versions(db) == {'timika': 1, 'mimika': 1}
+
+def test_existing_articles_get_a_missing_image_or_a_better_category(db):
+    db.add_all([
+        models.Article(**{**article(1).to_row(), 'category': 'news'}),
+        models.Article(**article(2).to_row()),
+        models.Article(**{**article(3).to_row(), 'category': 'Ekonomi', 'image_url': 'https://img.example.com/old.jpg'}),
+    ])
+    db.commit()
+
+    result = ingest_articles(db, [
+        article(1, category="ekonomi"),
+        article(2, image_url="https://img.example.com/2.jpg"),
+        # Nothing to fill in: already categorized and illustrated
+        article(3, category="olahraga", image_url="https://img.example.com/new.jpg"),
+    ])
+
+    assert (result['saved'], result['updated']) == (0, 2)
+    rows = {row.source_url.split('/')[-2]: row for row in db.query(models.Article)}
+    assert rows['1'].category == 'Ekonomi'
+    assert rows['2'].image_url == "https://img.example.com/2.jpg"
+    assert (rows['3'].category, rows['3'].image_url) == ('Ekonomi', "https://img.example.com/old.jpg")
+    assert versions(db) == {'timika': 1}
+
+def test_unchanged_articles_do_not_bump_versions(db):
+    ingest_articles(db, [article(1)])
+    assert ingest_articles(db, [article(1)]) == {'saved': 0, 'updated': 0, 'by_source': {}}
+    assert versions(db) == {'timika': 1}
+
+def test_existing_hashes_are_looked_up_in_batches(db, engine, monkeypatch):
+    ingest_articles(db, [article(n) for n in range(5)])
+    monkeypatch.setattr(ingest, "LOOKUP_BATCH_SIZE", 2)
+
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "url_hash IN" in statement:
+            statements.append(statement)
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        hashes = [url_hash(article(n).url) for n in range(7)]
+        found = find_existing_by_hash(db, hashes)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert set(found) == set(hashes[:5])
+    assert len(statements) == 4
@@ -0,0 +1,74 @@
+import json
+
+from app.scrapers.cnn_scraper import HARVESTER
+
+SEARCH_URL = "https://www.cnnindonesia.com/search/?query=timika"
+
+def item_list(*articles):
+    return json.dumps({
+        "@context": "https://schema.org", "@type": "ItemList",
+        "itemListElement": [
+            {"@type": "ListItem", "position": n, "item": {"@type": "NewsArticle", **article}}
+            for n, article in enumerate(articles, 1)
+        ],
+    })
+
+def page(structured="", results=""):
+    return f"""<html><head>
+<script type="application/ld+json">{structured}</script>
+</head><body>
+  <nav><a href="https://www.cnnindonesia.com/nasional/20241210090000-20-1/sidebar-trending-hari-ini">Sidebar trending hari ini</a></nav>
+  <div class="list media_rows">{results}</div>
+</body></html>"""
+
+RESULT = """
+  <article><a href="https://www.cnnindonesia.com/nasional/20241210080000-20-7/banjir-di-timika?utm_source=search">
+    <h2>Banjir di Timika meluas</h2></a><p>Warga mengungsi.</p></article>
+  <article><a href="https://www.cnnindonesia.com/tag/timika"><h2>Tag Timika dan sekitarnya</h2></a></article>
+"""
+
+def test_structured_hits_must_name_the_search_keyword():
+    structured = item_list(
+        {"headline": "Banjir di Timika meluas", "url": "https://www.cnnindonesia.com/nasional/20241210080000-20-7/banjir",
+         "datePublished": "2024-12-10T08:00:00+07:00"},
+        # Named in the URL only
+        {"headline": "Pasar baru dibuka hari ini", "url": "https://www.cnnindonesia.com/nasional/20241210070000-20-6/pasar-timika"},
+        # A trending list on the same page
+        {"headline": "Harga cabai naik di Jakarta", "url": "https://www.cnnindonesia.com/ekonomi/20241210060000-92-5/cabai"},
+    )
+    articles = HARVESTER.harvest(page(structured, RESULT), set(), 10, page_url=SEARCH_URL, keyword='timika')
+
+    assert [a.url.rsplit('/', 1)[-1] for a in articles] == ['banjir', 'pasar-timika']
+    assert articles[0].published_at is not None
+    assert {a.search_keyword for a in articles} == {'timika'}
+
+def test_unrelated_structured_lists_fall_back_to_the_results_container():
+    structured = item_list(
+        {"headline": "Harga cabai naik di Jakarta", "url": "https://www.cnnindonesia.com/ekonomi/20241210060000-92-5/cabai"},
+    )
+    seen = set()
+    articles = HARVESTER.harvest(page(structured, RESULT), seen, 10, page_url=SEARCH_URL, keyword='timika')
+
+    # Tag pages fail the URL pattern; the nav link is outside the container
+    assert [(a.title, a.description) for a in articles] == [("Banjir di Timika meluas", "Warga mengungsi.")]
+    assert articles[0].url == "https://www.cnnindonesia.com/nasional/20241210080000-20-7/banjir-di-timika"
+    assert seen == {articles[0].url}
+
+    # URLs seen on an earlier page are skipped
+    again = HARVESTER.harvest(page(structured, RESULT), seen, 10, page_url=SEARCH_URL, keyword='timika')
+    assert articles[0].url not in {a.url for a in again}
+
+def test_without_a_keyword_structured_hits_are_taken_as_declared():
+    structured = item_list(
+        {"headline": "Harga cabai naik di Jakarta", "url": "https://www.cnnindonesia.com/ekonomi/20241210060000-92-5/cabai"},
+    )
+    articles = HARVESTER.harvest(page(structured, RESULT), set(), 10, page_url=SEARCH_URL)
+    assert [a.title for a in articles] == ["Harga cabai naik di Jakarta"]
+
+def test_harvest_stops_at_the_limit():
+    results = "".join(
+        f'<a href="https://www.cnnindonesia.com/nasional/2024121008000{n}-20-{n}/berita-timika"><h3>Berita Timika nomor {n}</h3></a>'
+        for n in range(5)
+    )
+    assert len(HARVESTER.harvest(page(results=results), set(), 3, keyword='timika')) == 3
+    assert HARVESTER.harvest(page(results=results), set(), 0) == []
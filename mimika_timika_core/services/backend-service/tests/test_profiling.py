@@ -0,0 +1,68 @@
+import pstats
+import threading
+
+import pytest
+
+from app.scrapers import kompas_scraper
+from app.utils import parse_pool
+from app.utils.budget import ScrapeBudget
+from app.utils.profiling import ProfileSession, profile_session, profiled
+
+RESULTS_PAGE = b"""
+<html><body><div class="articleList -list">
+  <div class="articleItem">
+    <a class="article-link" href="https://regional.kompas.com/read/2024/12/10/1/banjir-di-timika">
+      <h2 class="articleTitle">Banjir di Timika meluas</h2>
+    </a>
+    <div class="articlePost"><div class="articlePost-date">10/12/2024, 09:15 WIB</div></div>
+    <div class="articleLead"><p>Warga Mimika mengungsi.</p></div>
+  </div>
+</div></body></html>
+"""
+EMPTY_PAGE = b'<html><body><div class="articleList -list"></div></body></html>'
+
+@pytest.fixture
+def kompas_pages(monkeypatch):
+    """Kompas search answered from memory: one result page, then an empty one"""
+    fetched = []
+
+    def fetch_page(site, url, **kwargs):
+        fetched.append(threading.current_thread().name)
+        return type("Response", (), {"content": RESULTS_PAGE if len(fetched) == 1 else EMPTY_PAGE})
+
+    monkeypatch.setattr(kompas_scraper, "fetch_page", fetch_page)
+    monkeypatch.setattr(kompas_scraper.random, "uniform", lambda a, b: 0)
+    # Pipelines would otherwise fetch in a thread and parse in worker processes
+    monkeypatch.setattr(parse_pool, "PARSE_WORKERS", 2)
+    return fetched
+
+def test_profiled_site_fetches_and_parses_in_the_profiled_thread(tmp_path, kompas_pages, monkeypatch):
+    monkeypatch.setattr(parse_pool, "parse_pool", lambda: pytest.fail("parse pool used while profiling"))
+    session = ProfileSession(str(tmp_path), 'cprofile')
+    with profiled(session, 'kompas'):
+        result = kompas_scraper.scrape_kompas(keyword='timika', budget=ScrapeBudget())
+
+    assert result['status'] == 'success' and len(result['data']['articles']) == 1
+    assert kompas_pages == [threading.current_thread().name] * 2
+
+    [path] = session.files
+    functions = {function for _, _, function in pstats.Stats(path).stats}
+    assert {'fetch_page', 'parse_search_page', 'parse_date', 'normalize_category'} <= functions
+
+def test_unprofiled_pipelines_keep_their_fetch_thread(kompas_pages, monkeypatch):
+    monkeypatch.setattr(parse_pool, "parse_pool", lambda: None)
+    result = kompas_scraper.scrape_kompas(keyword='timika', budget=ScrapeBudget())
+    assert len(result['data']['articles']) == 1
+    assert set(kompas_pages) == {'fetch-kompas'}
+
+def test_profiling_is_off_unless_requested(monkeypatch, tmp_path):
+    monkeypatch.delenv("SCRAPE_PROFILE", raising=False)
+    assert profile_session() is None
+    with profiled(None, 'kompas'):
+        pass
+
+    monkeypatch.setenv("SCRAPE_PROFILE", "cprofile")
+    monkeypatch.setattr("app.utils.profiling.PROFILE_DIR", str(tmp_path))
+    session = profile_session(label="manual")
+    assert session.backend == 'cprofile'
+    assert session.directory.startswith(str(tmp_path)) and session.directory.endswith("-manual")
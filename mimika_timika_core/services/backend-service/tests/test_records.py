@@ -0,0 +1,51 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.scrapers import kompas_scraper
+from app.utils.date_parser import JAKARTA
+from app.utils.records import ScrapedArticle
+
+@pytest.fixture
+def utc_host(monkeypatch):
+    """Run the test with the process local time zone set to UTC"""
+    if not hasattr(time, 'tzset'):
+        pytest.skip("time.tzset is not available on this platform")
+    monkeypatch.setenv("TZ", "UTC")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+def test_to_row_stores_dates_as_naive_wib():
+    article = ScrapedArticle(
+        "Banjir di Timika", "https://www.kompas.com/read/1/timika",
+        published_at=datetime(2024, 12, 10, 13, 15, tzinfo=timezone.utc),
+    )
+    assert article.to_row()['published_at'] == datetime(2024, 12, 10, 20, 15)
+
+def test_to_row_unknown_date_is_the_current_wib_time(utc_host):
+    article = ScrapedArticle("Banjir di Timika", "https://www.kompas.com/read/1/timika")
+    stored = article.to_row()['published_at']
+    assert stored.tzinfo is None
+    # Not the host's local (UTC) time, which would sort 7 hours too old
+    assert abs(stored - datetime.now(JAKARTA).replace(tzinfo=None)) < timedelta(seconds=5)
+
+def test_records_normalize_only_the_category():
+    # A title naming Timika does not turn a given category into 'Regional'
+    article = ScrapedArticle("Harga cabai di Timika naik", "https://www.cnnindonesia.com/ekonomi/1/cabai",
+                             category="ekonomi")
+    assert article.category == "Ekonomi"
+    legacy = ScrapedArticle.from_dict({
+        "title": "Harga cabai di Timika naik", "source_url": "https://example.com/1/cabai", "category": "news",
+    })
+    assert legacy.category == "Nasional"
+
+def test_search_scrapers_classify_from_title_and_url():
+    page = b"""<div class="articleList -list"><div class="articleItem">
+      <a class="article-link" href="https://www.kompas.com/read/2024/12/10/1/cabai-naik">
+        <h2 class="articleTitle">Harga cabai di Timika naik</h2></a>
+    </div></div>"""
+    [article] = kompas_scraper.parse_search_page(page, None)
+    assert article.category == "Regional"
@@ -0,0 +1,38 @@
+import pytest
+
+from app.utils.records import ScrapedArticle
+from app.utils.regions import BOTH_REGION, DEFAULT_REGION, assign_regions, classify_regions, keyword_region
+
+@pytest.mark.parametrize("title, description, region", [
+    ("Banjir di Timika meluas", "", 'timika'),
+    ("Bupati Mimika resmikan pasar", "", 'mimika'),
+    ("Timika dan Mimika bersiap", "", BOTH_REGION),
+    # The title decides before a dateline in the description
+    ("Bupati Mimika resmikan pasar", "Timika (ANTARA) - Pasar baru dibuka.", 'mimika'),
+    ("Pasar baru dibuka", "Timika (ANTARA) - Pasar baru dibuka.", 'timika'),
+    ("Pasar baru dibuka di Papua", "Warga menyambut gembira.", DEFAULT_REGION),
+    # Whole words only
+    ("Mimikaland dibuka", "", DEFAULT_REGION),
+])
+def test_classify_regions(title, description, region):
+    assert classify_regions([title], [description]) == [region]
+
+def test_text_without_a_region_falls_back_to_the_search_region():
+    titles = ["Pasar baru dibuka di Papua", "Banjir di Timika meluas", "Jalan rusak diperbaiki"]
+    descriptions = ["Warga menyambut gembira.", "", ""]
+    assert classify_regions(titles, descriptions, ['mimika', 'mimika', None]) == ['mimika', 'timika', DEFAULT_REGION]
+
+@pytest.mark.parametrize("keyword, region", [
+    ('timika', 'timika'), ('Mimika ', 'mimika'), ('mimika timika', None), ('papua', None), (None, None),
+])
+def test_keyword_region(keyword, region):
+    assert keyword_region(keyword) == region
+
+def test_assign_regions_keeps_the_search_region_of_articles_naming_none():
+    found_by_timika = ScrapedArticle("Pasar baru dibuka di Papua", "https://www.kompas.com/read/1/pasar",
+                                     search_keyword='timika')
+    unsearched = ScrapedArticle("Pasar baru dibuka di Papua", "https://www.kompas.com/read/2/pasar")
+    named = ScrapedArticle("Bupati Mimika resmikan pasar", "https://www.kompas.com/read/3/pasar",
+                           search_keyword='timika')
+    assign_regions([found_by_timika, unsearched, named])
+    assert [found_by_timika.region, unsearched.region, named.region] == ['timika', DEFAULT_REGION, 'mimika']
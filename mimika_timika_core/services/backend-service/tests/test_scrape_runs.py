@@ -0,0 +1,191 @@
+import logging
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import models
+from app.services import scrape_runs, scraper_engine
+from app.services.scrape_runs import RunCheckpoint, completed_sites, run_is_dead, SCRAPE_RUN_HEARTBEAT_MINUTES
+from app.utils.budget import ScrapeBudget
+from app.utils.circuit import CircuitRegistry
+from app.utils.fetch import current_fetch_stats
+from app.utils.records import ScrapedArticle
+
+NOW = datetime(2024, 12, 10, 12, 0)
+HEARTBEAT = timedelta(minutes=SCRAPE_RUN_HEARTBEAT_MINUTES)
+
+@pytest.fixture(autouse=True)
+def active_runs(monkeypatch):
+    """The runs this process has in progress, empty for each test"""
+    active = set()
+    monkeypatch.setattr(scrape_runs, "_active_runs", active)
+    return active
+
+def restart(monkeypatch):
+    """Make this process look like the next one started with the same pid (a restarted container)"""
+    monkeypatch.setattr(scrape_runs, "OWNER", f"{scrape_runs.HOST}:{os.getpid()}:restarted")
+    monkeypatch.setattr(scrape_runs, "_active_runs", set())
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+def article(site, n):
+    return ScrapedArticle(f"Banjir di Timika bagian {n}", f"https://www.{site}.com/read/{n}/banjir-timika", source=site)
+
+def site_result(status, pages=1, errors=0, count=0):
+    return {'status': status, 'count': count, 'pages_fetched': pages, 'fetch_errors': errors}
+
+# run_is_dead
+
+def test_a_run_of_this_process_is_dead_once_no_longer_in_progress(active_runs):
+    run = models.ScrapeRun(id=7, owner=scrape_runs.OWNER, started_at=NOW - timedelta(days=1))
+    active_runs.add(7)
+    assert not run_is_dead(run, NOW)
+    active_runs.discard(7)
+    assert run_is_dead(run, NOW)
+
+@pytest.mark.skipif(os.name != 'posix', reason="pids are only checked on POSIX")
+def test_a_run_of_an_earlier_process_on_this_host_is_judged_by_its_pid():
+    old = NOW - timedelta(days=1)
+    alive = models.ScrapeRun(owner=f"{scrape_runs.HOST}:{os.getppid()}:a1b2c3d4", started_at=old, heartbeat_at=old)
+    # A long site without a heartbeat does not make a live process dead
+    assert not run_is_dead(alive, NOW)
+    gone = models.ScrapeRun(owner=f"{scrape_runs.HOST}:{dead_pid()}:a1b2c3d4", started_at=NOW, heartbeat_at=NOW)
+    assert run_is_dead(gone, NOW)
+
+def test_a_run_of_this_pid_but_an_earlier_process_is_dead():
+    run = models.ScrapeRun(owner=f"{scrape_runs.HOST}:{os.getpid()}:a1b2c3d4", started_at=NOW, heartbeat_at=NOW)
+    assert run_is_dead(run, NOW)
+
+@pytest.mark.parametrize("owner", ["worker-2:41:a1b2c3d4", None])
+def test_other_runs_are_dead_after_the_heartbeat(owner):
+    run = models.ScrapeRun(owner=owner, started_at=NOW - HEARTBEAT * 3, heartbeat_at=NOW - HEARTBEAT + timedelta(seconds=1))
+    assert not run_is_dead(run, NOW)
+    run.heartbeat_at = NOW - HEARTBEAT - timedelta(seconds=1)
+    assert run_is_dead(run, NOW)
+    # Rows from before heartbeats were recorded go by their start
+    run.heartbeat_at = None
+    assert run_is_dead(run, NOW)
+
+# completed_sites
+
+def test_completed_sites_need_articles_or_clean_fetches(db):
+    run = models.ScrapeRun(trigger='scheduler', status='running', started_at=NOW)
+    db.add(run)
+    db.flush()
+    for site, status, pages, errors in [
+        ('detik', 'success', 3, 1),
+        ('cnn', 'empty', 2, 0),        # nothing new on the site
+        ('antara', 'empty', 0, 4),     # every fetch failed
+        ('tempo', 'empty', 3, 1),      # some fetches failed
+        ('kumparan', 'empty', 0, 0),   # nothing fetched at all
+        ('kompas', 'error', 1, 1),
+        ('seputarpapua', 'skipped', 0, 0),
+    ]:
+        db.add(models.ScrapeRunSite(run_id=run.id, site=site, status=status, pages_fetched=pages, fetch_errors=errors))
+    db.commit()
+    assert completed_sites(db, [run.id]) == {'detik': run.id, 'cnn': run.id}
+    assert completed_sites(db, []) == {}
+
+# RunCheckpoint
+
+@pytest.fixture
+def engine_sites(monkeypatch):
+    """run_all_scrapers on fake search scrapers only, without logging to logs/ or circuit state from other tests"""
+    sites = {}
+    monkeypatch.setattr(scraper_engine, "SCRAPERS", sites)
+    monkeypatch.setattr(scraper_engine, "FEED_DISCOVERY", False)
+    monkeypatch.setattr(scraper_engine, "breakers", CircuitRegistry())
+    monkeypatch.setattr(scraper_engine, "setup_logging", lambda: logging.getLogger("scraper_engine"))
+    return sites
+
+def scraper(site, count=0, errors=0, crash=False):
+    calls = []
+
+    def scrape(keyword=None, budget=None):
+        calls.append(site)
+        stats = current_fetch_stats()
+        stats.pages += 0 if errors else 1
+        stats.errors += errors
+        if crash:
+            raise KeyboardInterrupt("process killed")
+        return {'status': 'success', 'data': {'articles': [article(site, n) for n in range(count)]}}
+
+    scrape.calls = calls
+    return scrape
+
+def test_resume_after_a_run_that_failed_midway(db, engine_sites, monkeypatch):
+    engine_sites.update(
+        detik=scraper('detik', count=2),
+        antara=scraper('antara', errors=4),   # down: its errors are swallowed, the site comes back empty
+        cnn=scraper('cnn'),                   # up, nothing new
+        kompas=scraper('kompas', crash=True),
+    )
+    first = RunCheckpoint(db, 'scheduler')
+    with pytest.raises(KeyboardInterrupt):
+        scraper_engine.run_all_scrapers(return_json=False, budget=ScrapeBudget(), checkpoint=first)
+    first_id = first.run.id
+    assert db.query(models.Article).count() == 2
+
+    restart(monkeypatch)
+    engine_sites.update(
+        detik=scraper('detik', count=2),
+        antara=scraper('antara', count=1),
+        cnn=scraper('cnn'),
+        kompas=scraper('kompas', count=1),
+    )
+    second = RunCheckpoint(db, 'scheduler')
+    assert second.done == {'detik': first_id, 'cnn': first_id}
+    result = scraper_engine.run_all_scrapers(return_json=False, budget=ScrapeBudget(), checkpoint=second)
+    run = second.finish(result)
+
+    assert engine_sites['detik'].calls == [] and engine_sites['cnn'].calls == []
+    assert engine_sites['antara'].calls == ['antara'] and engine_sites['kompas'].calls == ['kompas']
+    assert result['site_results']['detik']['error'] == f"completed by run {first_id}"
+    assert run.status == 'success'
+    assert db.get(models.ScrapeRun, first_id).status == 'interrupted'
+    assert db.query(models.Article).count() == 4
+
+def test_a_live_run_is_neither_resumed_nor_interrupted(db):
+    live = RunCheckpoint(db, 'scheduler')
+    live.site_done('detik', site_result('success', count=1), [article('detik', 1)])
+
+    other = RunCheckpoint(db, 'api')
+    assert other.done == {}
+    other.site_done('detik', site_result('success', count=1), [article('detik', 1)])
+    other.finish({'status': 'success', 'site_results': {}})
+    db.refresh(live.run)
+    assert live.run.status == 'running'
+
+    assert live.finish({'status': 'success', 'site_results': {}}).status == 'success'
+    assert not scrape_runs._active_runs
+
+def test_site_done_refreshes_the_heartbeat(db):
+    checkpoint = RunCheckpoint(db, 'scheduler', started_at=NOW)
+    assert checkpoint.run.owner == scrape_runs.OWNER
+    assert checkpoint.run.heartbeat_at == NOW
+    checkpoint.site_done('cnn', site_result('empty'), [])
+    assert checkpoint.run.heartbeat_at > NOW
+
+def test_dead_runs_outside_the_resume_window_are_interrupted_at_once(db, monkeypatch):
+    started = datetime.utcnow() - timedelta(minutes=scrape_runs.SCRAPE_RESUME_MINUTES + 5)
+    old = RunCheckpoint(db, 'scheduler', started_at=started)
+    old.site_done('detik', site_result('success', count=1), [article('detik', 1)])
+
+    restart(monkeypatch)
+    checkpoint = RunCheckpoint(db, 'scheduler')
+    assert checkpoint.done == {}
+    assert db.get(models.ScrapeRun, old.run.id).status == 'interrupted'
+
+def test_migrate_scrape_runs_adds_the_owner_columns(engine):
+    from sqlalchemy import inspect, text
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE scrape_runs (id INTEGER PRIMARY KEY, trigger VARCHAR(32), status VARCHAR(16), started_at DATETIME)"))
+    scrape_runs.migrate_scrape_runs()
+    columns = {column['name'] for column in inspect(engine).get_columns('scrape_runs')}
+    assert {'owner', 'heartbeat_at'} <= columns
@@ -0,0 +1,86 @@
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from app.scrapers import detik_scraper, kompas_scraper
+from app.utils import parse_pool
+from app.utils.budget import ScrapeBudget
+
+KOMPAS_ITEM = """
+  <div class="articleItem">
+    <a class="article-link" href="https://regional.kompas.com/read/2024/12/10/{n}/berita-{term}">
+      <h2 class="articleTitle">Berita daerah nomor {n} hari ini</h2>
+    </a>
+    <div class="articlePost"><div class="articlePost-date">10/12/2024, 09:15 WIB</div></div>
+  </div>
+"""
+DETIK_ITEM = """
+  <article class="list-content__item">
+    <a href="https://news.detik.com/berita/d-{n}/berita-{term}"></a>
+    <h3 class="media__title">Berita daerah nomor {n} hari ini</h3>
+    <div class="media__date"><span d-time="1733797200">10 Des 2024</span></div>
+  </article>
+"""
+
+def kompas_page(term, page):
+    if page > 1:
+        return '<div class="articleList -list"></div>'
+    return '<div class="articleList -list">' + KOMPAS_ITEM.format(n=len(term), term=term) + '</div>'
+
+def detik_page(term, page):
+    items = DETIK_ITEM.format(n=len(term) * 10 + page, term=f"{term}-{page}")
+    return f'<div class="column-6"><div class="list-content">{items}</div></div>'
+
+@pytest.fixture
+def search(monkeypatch):
+    """Answer a scraper's search pages from `render(term, page)`; returns the (term, page) requests made"""
+    requests = []
+    monkeypatch.setattr(parse_pool, "parse_pool", lambda: None)
+    monkeypatch.setattr(kompas_scraper.random, "uniform", lambda a, b: 0)
+
+    def install(module, param, render):
+        def fetch_page(site, url, **kwargs):
+            query = parse_qs(urlparse(url).query)
+            term, page = query[param][0], int(query['page'][0])
+            requests.append((term, page))
+            return type("Response", (), {"content": render(term, page).encode()})
+        monkeypatch.setattr(module, "fetch_page", fetch_page)
+        return requests
+
+    return install
+
+def test_kompas_searches_each_keyword(search):
+    requests = search(kompas_scraper, 'q', kompas_page)
+    result = kompas_scraper.scrape_kompas(keyword=['timika', 'mimika'], budget=ScrapeBudget())
+
+    # The fetch thread may read ahead past the empty page
+    assert {term for term, _ in requests} == {'timika', 'mimika'}
+    assert {('timika', 1), ('timika', 2), ('mimika', 1), ('mimika', 2)} <= set(requests)
+    articles = result['data']['articles']
+    assert {(a.url.rsplit('-', 1)[-1], a.search_keyword) for a in articles} == {('timika', 'timika'), ('mimika', 'mimika')}
+
+def test_detik_searches_each_keyword(search, monkeypatch):
+    monkeypatch.setattr(detik_scraper, "page_cap", lambda default: 2)
+    requests = search(detik_scraper, 'query', detik_page)
+    result = detik_scraper.scrape_detik(keyword=['timika', 'mimika'], budget=ScrapeBudget())
+
+    assert sorted(requests) == [('mimika', 1), ('mimika', 2), ('timika', 1), ('timika', 2)]
+    articles = result['data']['articles']
+    assert len(articles) == 4
+    assert all(a.url.split('/berita-')[1].startswith(a.search_keyword) for a in articles)
+
+def test_kompas_pages_are_only_capped_by_scrape_pages_limit(search, monkeypatch):
+    def deep_results(term, page):
+        if page > 60:
+            return '<div class="articleList -list"></div>'
+        return '<div class="articleList -list">' + KOMPAS_ITEM.format(n=page, term=term) + '</div>'
+
+    requests = search(kompas_scraper, 'q', deep_results)
+    result = kompas_scraper.scrape_kompas(keyword='timika', budget=ScrapeBudget())
+    assert len(result['data']['articles']) == 60
+
+    monkeypatch.setattr("app.utils.budget.SCRAPE_PAGES_LIMIT", 3)
+    requests.clear()
+    result = kompas_scraper.scrape_kompas(keyword='timika', budget=ScrapeBudget())
+    assert len(result['data']['articles']) == 3
+    assert max(page for _, page in requests) == 3
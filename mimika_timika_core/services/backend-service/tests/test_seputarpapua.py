@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.scrapers import seputarpapua_scraper
+from app.utils.budget import ScrapeBudget
+
+CARD = """
+  <div class="article-item">
+    <div class="article-text">
+      <h3><a href="https://seputarpapua.com/view/{slug}.html">Berita Timika tentang {slug}</a></h3>
+      <div class="snippet">Warga Timika menyambut gembira.</div>
+    </div>
+  </div>
+"""
+SEARCH_PAGE = '<div class="widget-content">' + "".join(
+    CARD.format(slug=slug) for slug in ("bertanggal", "tanpa-tanggal", "gagal")) + '</div>'
+
+DETAIL_PAGES = {
+    "https://seputarpapua.com/view/bertanggal.html":
+        '<meta property="article:published_time" content="2024-12-10T09:00:00+09:00">',
+    "https://seputarpapua.com/view/tanpa-tanggal.html":
+        '<html><body><div class="entry-content">Tanpa tanggal.</div></body></html>',
+}
+
+@pytest.fixture
+def pages(monkeypatch):
+    def fetch_page(site, url, **kwargs):
+        if "?s=" in url:
+            return type("Response", (), {"text": SEARCH_PAGE})
+        if url not in DETAIL_PAGES:
+            raise ConnectionError(url)
+        return type("Response", (), {"text": DETAIL_PAGES[url]})
+
+    monkeypatch.setattr(seputarpapua_scraper, "fetch_page", fetch_page)
+    monkeypatch.setattr(seputarpapua_scraper.time, "sleep", lambda seconds: None)
+
+def test_cards_without_a_detail_date_are_skipped(pages):
+    result = seputarpapua_scraper.scrape_seputarpapua(keyword='timika', budget=ScrapeBudget())
+
+    assert result['status'] == 'success'
+    [article] = result['data']['articles']
+    assert article.url == "https://seputarpapua.com/view/bertanggal.html"
+    assert article.published_at == datetime(2024, 12, 10, 9, 0, tzinfo=timezone(timedelta(hours=9)))
+    assert article.search_keyword == 'timika'
+
+def test_article_page_without_a_date_gives_none():
+    found = seputarpapua_scraper.parse_article_details(
+        DETAIL_PAGES["https://seputarpapua.com/view/tanpa-tanggal.html"], "https://seputarpapua.com/view/tanpa-tanggal.html")
+    assert found['date_obj'] is None and found['date'] == ""
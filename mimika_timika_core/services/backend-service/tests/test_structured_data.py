@@ -0,0 +1,54 @@
+import json
+
+from app.utils.structured_data import extract_structured
+
+def script(data, **attrs):
+    attributes = "".join(f' {name}="{value}"' for name, value in attrs.items())
+    return f"<script{attributes}>{json.dumps(data)}</script>"
+
+def test_news_article_json_ld_completed_by_meta_tags():
+    markup = (
+        '<meta property="og:image" content="https://img.example.com/a.jpg">'
+        '<meta property="og:title" content="Judul dari OpenGraph">'
+        + script({"@context": "https://schema.org", "@graph": [
+            {"@type": "WebSite", "name": "Situs", "url": "https://example.com/"},
+            {"@type": ["NewsArticle"], "headline": "Banjir di Timika", "url": "https://example.com/read/1",
+             "datePublished": "2024-12-10T09:00:00+07:00", "description": "Warga mengungsi."},
+        ]}, type="application/ld+json")
+    )
+    data = extract_structured(markup)
+    assert (data.title, data.url, data.published, data.description) == (
+        "Banjir di Timika", "https://example.com/read/1", "2024-12-10T09:00:00+07:00", "Warga mengungsi.")
+    # Meta tags fill only what the JSON-LD left empty
+    assert data.image == "https://img.example.com/a.jpg"
+    assert [a.url for a in data.articles] == ["https://example.com/read/1"]
+
+def test_item_list_and_next_data_articles_are_resolved_and_deduplicated():
+    markup = (
+        script({"@type": "ItemList", "itemListElement": [
+            {"@type": "ListItem", "item": {"headline": "Pasar Mimika dibuka", "url": "/read/2",
+                                           "image": {"url": "https://img.example.com/2.jpg"}}},
+            {"@type": "ListItem", "name": "Berita tanpa tautan"},
+        ]}, type="application/ld+json")
+        + script({"props": {"pageProps": {
+            "author": {"name": "Redaksi", "url": "/author/redaksi"},
+            "results": [{"title": "Pasar Mimika dibuka", "url": "/read/2"},
+                        {"title": "Jalan Timika diperbaiki", "permalink": "https://example.com/read/3",
+                         "publishedAt": "2024-12-10"}],
+        }}}, id="__NEXT_DATA__", type="application/json")
+    )
+    data = extract_structured(markup, base_url="https://example.com/search?q=mimika")
+    assert [(a.title, a.url) for a in data.articles] == [
+        ("Pasar Mimika dibuka", "https://example.com/read/2"),
+        ("Jalan Timika diperbaiki", "https://example.com/read/3"),
+    ]
+    assert data.articles[0].image == "https://img.example.com/2.jpg"
+    assert data.articles[1].published == "2024-12-10"
+
+def test_malformed_and_unrelated_scripts_are_skipped():
+    markup = (
+        '<script type="application/ld+json">{"@type": "NewsArticle", </script>'
+        '<script>var state = {"title": "Bukan data", "url": "/x"};</script>'
+    )
+    data = extract_structured(markup)
+    assert data.title == "" and data.articles == []
@@ -0,0 +1,123 @@
+import pytest
+from sqlalchemy import inspect, text
+
+from app import database, models
+from app.services.ingest import backfill_url_hashes, migrate_url_hash
+from app.utils.helpers import canonicalize_url, url_hash
+
+CANONICAL = [
+    # scheme and host
+    ("http://www.detik.com/berita/d-1/mimika", "https://www.detik.com/berita/d-1/mimika"),
+    ("//www.detik.com/berita/d-1/mimika", "https://www.detik.com/berita/d-1/mimika"),
+    ("HTTPS://WWW.Kompas.COM/read/1/timika", "https://www.kompas.com/read/1/timika"),
+    ("  https://www.kompas.com/read/1/timika  ", "https://www.kompas.com/read/1/timika"),
+    # ports
+    ("https://www.kompas.com:443/read/1", "https://www.kompas.com/read/1"),
+    ("http://www.kompas.com:80/read/1", "https://www.kompas.com/read/1"),
+    ("https://www.kompas.com:8443/read/1", "https://www.kompas.com:8443/read/1"),
+    # AMP variants
+    ("https://amp.kompas.com/read/1/timika", "https://kompas.com/read/1/timika"),
+    ("https://www.antaranews.com/amp/berita/1/mimika", "https://www.antaranews.com/berita/1/mimika"),
+    ("https://www.cnnindonesia.com/nasional/1/mimika/amp", "https://www.cnnindonesia.com/nasional/1/mimika"),
+    ("https://www.tempo.co/read/1/mimika.amp", "https://www.tempo.co/read/1/mimika"),
+    # fragments, slashes
+    ("https://www.detik.com/berita/d-1/mimika#comments", "https://www.detik.com/berita/d-1/mimika"),
+    ("https://www.detik.com/berita/d-1/mimika/", "https://www.detik.com/berita/d-1/mimika"),
+    ("https://www.detik.com//berita///d-1/mimika", "https://www.detik.com/berita/d-1/mimika"),
+    ("https://www.detik.com", "https://www.detik.com/"),
+    ("https://www.detik.com/", "https://www.detik.com/"),
+    # dropped params
+    ("https://www.detik.com/berita/d-1?utm_source=fb&utm_medium=social", "https://www.detik.com/berita/d-1"),
+    ("https://www.detik.com/berita/d-1?fbclid=abc&gclid=def&_ga=1", "https://www.detik.com/berita/d-1"),
+    ("https://www.kompas.com/read/1?page=all&amp=1&single=1", "https://www.kompas.com/read/1"),
+    ("https://www.kompas.com/read/1?UTM_Campaign=x&Ref=home", "https://www.kompas.com/read/1"),
+    ("https://www.kompas.com/read/1?q=", "https://www.kompas.com/read/1"),
+    # kept params are sorted
+    ("https://www.antaranews.com/search?q=mimika&id=7", "https://www.antaranews.com/search?id=7&q=mimika"),
+    ("https://www.antaranews.com/search?utm_source=x&q=mimika&id=7", "https://www.antaranews.com/search?id=7&q=mimika"),
+    # left alone
+    ("", ""),
+    ("mailto:redaksi@kompas.com", "mailto:redaksi@kompas.com"),
+    ("ftp://files.kompas.com/a", "ftp://files.kompas.com/a"),
+]
+
+@pytest.mark.parametrize("url, expected", CANONICAL)
+def test_canonicalize_url(url, expected):
+    assert canonicalize_url(url) == expected
+
+@pytest.mark.parametrize("url, expected", CANONICAL)
+def test_canonicalize_url_is_idempotent(url, expected):
+    assert canonicalize_url(expected) == expected
+
+def test_url_hash_is_fixed_width_and_equal_for_variants():
+    variants = [
+        "http://www.detik.com/berita/d-1/mimika/?utm_source=x#top",
+        "https://WWW.DETIK.COM/berita/d-1/mimika",
+        "https://www.detik.com:443/berita/d-1/mimika/amp",
+    ]
+    hashes = {url_hash(url) for url in variants}
+    assert len(hashes) == 1
+    assert len(hashes.pop()) == 40
+    assert url_hash("https://www.detik.com/berita/d-2/mimika") != url_hash(variants[0])
+
+def _article(url, **kwargs):
+    return models.Article(title=url, source_url=url, source_name="detik", region="mimika", **kwargs)
+
+def test_backfill_url_hashes_leaves_collisions_null(db):
+    hashed = "https://www.detik.com/berita/d-1/mimika"
+    db.add(_article(hashed, url_hash=url_hash(hashed)))
+    db.add_all([
+        _article("http://www.detik.com/berita/d-1/mimika/"),   # duplicate of the hashed row
+        _article("https://www.kompas.com/read/2/timika?utm_source=x"),
+        _article("http://www.kompas.com/read/2/timika"),          # duplicate of the row before it
+        _article("https://www.antaranews.com/berita/3/mimika"),
+    ])
+    db.commit()
+
+    # A batch smaller than the table walks past the NULL rows it leaves behind
+    assert backfill_url_hashes(db, batch_size=2) == 2
+
+    rows = {row.source_url: row.url_hash for row in db.query(models.Article)}
+    assert rows["http://www.detik.com/berita/d-1/mimika/"] is None
+    assert rows["https://www.kompas.com/read/2/timika?utm_source=x"] == url_hash("https://www.kompas.com/read/2/timika")
+    assert rows["http://www.kompas.com/read/2/timika"] is None
+    assert rows["https://www.antaranews.com/berita/3/mimika"] == url_hash("https://www.antaranews.com/berita/3/mimika")
+    # Running it again has nothing left to do
+    assert backfill_url_hashes(db) == 0
+
+LEGACY_ARTICLES = """
+CREATE TABLE articles (
+    id INTEGER PRIMARY KEY,
+    title VARCHAR, summary TEXT, content TEXT, image_url VARCHAR,
+    source_url VARCHAR UNIQUE, source_name VARCHAR, category VARCHAR,
+    region VARCHAR, published_at DATETIME, created_at DATETIME
+)
+"""
+
+def test_migrate_url_hash_on_a_legacy_table(engine):
+    with engine.begin() as conn:
+        conn.execute(text(LEGACY_ARTICLES))
+        for url in (
+            "https://www.detik.com/berita/d-1/mimika",
+            "http://www.detik.com/berita/d-1/mimika#top",
+            "https://www.kompas.com/read/2/timika",
+        ):
+            conn.execute(text("INSERT INTO articles (title, source_url) VALUES (:url, :url)"), {"url": url})
+
+    migrate_url_hash()
+
+    inspector = inspect(engine)
+    assert "url_hash" in {col["name"] for col in inspector.get_columns("articles")}
+    unique = [idx for idx in inspector.get_indexes("articles") if idx["column_names"] == ["url_hash"]]
+    assert unique and unique[0]["unique"]
+
+    with engine.connect() as conn:
+        rows = dict(conn.execute(text("SELECT source_url, url_hash FROM articles")).fetchall())
+    assert rows["https://www.detik.com/berita/d-1/mimika"] == url_hash("https://www.detik.com/berita/d-1/mimika")
+    assert rows["http://www.detik.com/berita/d-1/mimika#top"] is None
+    assert rows["https://www.kompas.com/read/2/timika"] == url_hash("https://www.kompas.com/read/2/timika")
+
+    # Startup runs it every time: a second pass changes nothing
+    migrate_url_hash()
+    with engine.connect() as conn:
+        assert dict(conn.execute(text("SELECT source_url, url_hash FROM articles")).fetchall()) == rows